@@ -1,30 +1,104 @@
-from dotenv import load_dotenv
 import os
 import sys
-import subprocess
+import argparse
+
+### OPTIONS
+parser = argparse.ArgumentParser(description="EvoVis dashboard of ENAS run results.")
+parser.add_argument("run", nargs="*", metavar="run_results_path", help="Directory of the run results, or 'index <run_results_path>' to index a run.")
+parser.add_argument("--live", action="store_true", help="Follow a run that is still evolving.")
+parser.add_argument("--runs-root", help="Directory containing run directories to serve.")
+parser.add_argument("--production", action="store_true", help="Serve with several workers after preloading the run.")
+parser.add_argument("--workers", type=int, help="Number of worker processes in production mode.")
+parser.add_argument("--threads", type=int, help="Number of threads per worker in production mode.")
+parser.add_argument("--host", help="Interface to bind.")
+parser.add_argument("--port", type=int, help="Port to bind.")
+parser.add_argument("--debug", action="store_true", help="Run the Dash debug server with hot reloading.")
+parser.add_argument("--profile-startup", action="store_true", help="Print the time of the startup phases and imports.")
+parser.add_argument("--profile-dir", help="Directory of profiles of slow callback requests.")
+parser.add_argument("--profile-slow-ms", type=float, help="Duration in milliseconds from which callback requests are profiled.")
+options = parser.parse_args()
+
+if options.live:
+    os.environ["EVOVIS_LIVE"] = "1"
+
+if options.runs_root:
+    os.environ["EVOVIS_RUNS_ROOT"] = options.runs_root
+
+if options.profile_dir:
+    os.environ["EVOVIS_PROFILE_DIR"] = options.profile_dir
+
+if options.profile_slow_ms is not None:
+    os.environ["EVOVIS_PROFILE_SLOW_MS"] = str(options.profile_slow_ms)
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
+
+### INDEX RUN RESULTS
+if len(options.run) == 2 and options.run[0] == "index":
+    from runstore import build_run_index
+    from summary import get_run_summary
+
+    count = build_run_index(options.run[1])
+    get_run_summary(options.run[1])
+    print(f"Indexed {count} individuals of {options.run[1]} and wrote its summary")
+    sys.exit(0)
 
 ### RUN RESULTS PATH
-if len(sys.argv) == 2:
-    with open('.env', 'w') as env:
-        env.write(f'RUN_RESULTS_PATH={sys.argv[1]}\n')
+if len(options.run) == 1:
+    os.environ["RUN_RESULTS_PATH"] = options.run[0]
+
+elif options.run:
+    parser.error("expected a single run results path or 'index <run_results_path>'")
 
 else:
+    from dotenv import load_dotenv
     load_dotenv()
-    
+
     if 'RUN_RESULTS_PATH' in os.environ:
-        
+
         RUN = os.getenv("RUN_RESULTS_PATH")
         print(f"ENAS run results files: {RUN}")
-        
+
+    elif 'EVOVIS_RUNS_ROOT' in os.environ:
+        print(f"ENAS runs directory: {os.getenv('EVOVIS_RUNS_ROOT')}")
+
     else:
-        print("Error: Please run the dashboard with the run results directory path specified after 'python3 app.py' or specify the environmental variable 'RUN_RESULTS_PATH'.")
+        print("Error: Please run the dashboard with the run results directory path specified after 'python3 EvoVis.py' or specify the environmental variable 'RUN_RESULTS_PATH'.")
         sys.exit(1)
-        
+
+### IMPORT APP
+if __name__ == "__main__":
+    from startup import StartupProfile
+
+    profile = StartupProfile()
+
+    with profile.phase("import app"), profile.track_imports():
+        from app import app
+
+    # The first request registers the page router and the callbacks of the app
+    if options.profile_startup:
+        with profile.phase("first request"), app.server.test_client() as client:
+            client.get("/")
+
+        profile.report()
+
+### EXECUTE APP IN PRODUCTION MODE
+if __name__ == "__main__" and options.production:
+    from runs import resolve_run
+    from serve import serve_production
+
+    serve_production(
+        app,
+        runs=[resolve_run()],
+        workers=options.workers,
+        threads=options.threads,
+        host=options.host,
+        port=options.port,
+    )
+    sys.exit(0)
+
 ### EXECUTE APP
 if __name__ == "__main__":
-    app = "./src/app.py"  
-    
-    try:
-        subprocess.run([sys.executable, app], check=True)
-    except subprocess.CalledProcessError as e:
-        print(f"Error executing script: {e}")
+    from serve import get_serve_options
+
+    serve_options = get_serve_options(host=options.host, port=options.port)
+    app.run(host=serve_options["host"], port=serve_options["port"], debug=options.debug)
@@ -0,0 +1,222 @@
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from synthetic_run import write_synthetic_run
+
+##########################################################################################
+
+# MODULE DATA LAYER BENCHMARK
+
+# The Data Layer Benchmark times the data access functions and the page layouts of the
+# dashboard on synthetic runs of growing size, so a function that becomes quadratic in the
+# number of individuals shows up before a real run hits it. Every benchmark is timed once
+# on a cold run, the first call including loading and indexing the run files, and then
+# repeatedly warm. The results are written as JSON, and a previous result file can be
+# compared with the current one.
+# Usage: python benchmarks/bench_data_layer.py --sizes=5x20,20x100,50x400 --output=bench.json
+
+###########################################################################################
+
+# Run sizes as generations x population
+DEFAULT_SIZES = "5x20,20x100,50x400"
+
+# Number of warm repetitions of every benchmark
+DEFAULT_REPEAT = 5
+
+# Ratio of warm medians from which a comparison marks a benchmark as slower
+SLOWER_RATIO = 1.25
+
+# Difference in seconds below which a benchmark isn't marked as slower, shorter timings are noise
+SLOWER_SECONDS = 0.001
+
+
+### BENCHMARKS ###
+
+def data_benchmarks(run):
+    """
+    Functions without arguments calling the data layer on a run, load_run first.
+
+    Args:
+        run (str): The directory of the run results.
+
+    Returns:
+        dict: Benchmark name to function.
+    """
+    from evolution import get_individuals, get_family_tree, get_best_individuals
+    from genepool import get_genepool
+    from runstore import get_run_store
+
+    # The individual of the family tree is taken from the directories, so loading the run is timed by load_run
+    generations = sorted(int(entry.split("_")[1]) for entry in os.listdir(run) if entry.startswith("Generation_"))
+    middle = generations[len(generations) // 2]
+    individual = sorted(os.listdir(os.path.join(run, f"Generation_{middle}")))[0]
+
+    return {
+        "load_run": lambda: get_individuals(run, value="names"),
+        # Warm queries run within the refresh interval, this times the check a query does after it
+        "refresh_check": lambda: get_run_store(run).refresh(force=True),
+        "get_individuals_results": lambda: get_individuals(run, value="results", as_generation_dict=True),
+        "get_individuals_chromosome": lambda: get_individuals(run, value="chromosome", as_generation_dict=True),
+        "get_family_tree": lambda: get_family_tree(run, middle, individual),
+        "get_genepool": lambda: get_genepool(run),
+        "get_best_individuals": lambda: get_best_individuals(run),
+    }
+
+def layout_benchmarks(name):
+    """
+    Functions without arguments building the layouts of the dashboard pages for a run.
+
+    Args:
+        name (str): Name of a run in EVOVIS_RUNS_ROOT.
+
+    Returns:
+        dict: Benchmark name to function.
+    """
+    import dash
+
+    # Importing the app registers the pages in dash.page_registry, the app object itself isn't used
+    import app
+
+    return {
+        f"layout_{module.split('.')[-1]}": (lambda layout=page["layout"]: layout(run=name))
+        for module, page in dash.page_registry.items()
+        if module != "pages.comparison_page"
+    }
+
+def time_call(function):
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+def run_benchmarks(benchmarks, repeat):
+    """
+    Time benchmark functions once cold and repeatedly warm.
+
+    Returns:
+        dict: Benchmark name to "cold", "warm_median" and "warm_min" seconds.
+    """
+    results = {}
+
+    for name, function in benchmarks.items():
+        cold = time_call(function)
+        warm = [time_call(function) for _ in range(repeat)]
+        results[name] = {"cold": cold, "warm_median": statistics.median(warm), "warm_min": min(warm)}
+
+    return results
+
+
+### SUITE ###
+
+def parse_sizes(sizes):
+    """List of (generations, population) tuples of a 'GxP,GxP' string."""
+    return [tuple(int(value) for value in size.split("x")) for size in sizes.split(",") if size]
+
+def git_commit():
+    """Commit of the working tree, None outside of a git repository."""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_suite(sizes, repeat=DEFAULT_REPEAT, seed=0, runs_root=None):
+    """
+    Benchmark the data layer and the page layouts on synthetic runs.
+
+    Args:
+        sizes (list): (generations, population) tuples of the runs.
+        repeat (int): Number of warm repetitions.
+        seed (int): Seed of the synthetic runs.
+        runs_root (str, optional): Directory of the synthetic runs, default is a temporary directory.
+
+    Returns:
+        dict: "commit", "python", "platform", "repeat" and "results", a list of dictionaries with the run
+        size, the benchmark name and its timings in seconds.
+    """
+    runs_root = runs_root or tempfile.mkdtemp(prefix="evovis_bench_")
+    os.environ["EVOVIS_RUNS_ROOT"] = runs_root
+
+    results = []
+
+    for generations, population in sizes:
+        name = f"synthetic_{generations}x{population}"
+        run = os.path.join(runs_root, name)
+
+        start = time.perf_counter()
+        write_synthetic_run(run, generations=generations, population=population, seed=seed)
+        print(f"{name}: written in {time.perf_counter() - start:.2f}s")
+
+        timings = run_benchmarks(data_benchmarks(run), repeat)
+        timings.update(run_benchmarks(layout_benchmarks(name), repeat))
+
+        for benchmark, timing in timings.items():
+            results.append({"generations": generations, "population": population, "individuals": generations * population, "benchmark": benchmark, **timing})
+            print(f"{name}: {benchmark:<40} cold {timing['cold']:8.4f}s  warm {timing['warm_median']:8.4f}s")
+
+    return {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "results": results,
+    }
+
+def compare(previous, current):
+    """
+    Print the ratio of the warm medians and the cold times of two suite results.
+
+    Args:
+        previous (dict): Earlier result of run_suite.
+        current (dict): Later result of run_suite.
+    """
+    def keyed(suite):
+        return {(result["generations"], result["population"], result["benchmark"]): result for result in suite["results"]}
+
+    before, after = keyed(previous), keyed(current)
+    print(f"\nComparison {previous.get('commit')} -> {current.get('commit')}")
+
+    for key in sorted(before.keys() & after.keys()):
+        warm = after[key]["warm_median"] / max(before[key]["warm_median"], 1e-9)
+        cold = after[key]["cold"] / max(before[key]["cold"], 1e-9)
+        slower = [
+            after[key][timing] / max(before[key][timing], 1e-9) >= SLOWER_RATIO and after[key][timing] - before[key][timing] >= SLOWER_SECONDS
+            for timing in ("warm_median", "cold")
+        ]
+        mark = "  slower" if any(slower) else ""
+        print(f"{key[0]}x{key[1]} {key[2]:<40} warm x{warm:6.2f}  cold x{cold:6.2f}{mark}")
+
+
+### COMMAND LINE ###
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the data layer of the dashboard on synthetic runs.")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="Comma separated run sizes as generations x population.")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Number of warm repetitions.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--runs-root", help="Directory of the synthetic runs, default is a temporary directory.")
+    parser.add_argument("--output", default="bench_data_layer.json", help="JSON file of the results.")
+    parser.add_argument("--compare", help="JSON file of an earlier result to compare with.")
+    options = parser.parse_args(argv)
+
+    suite = run_suite(parse_sizes(options.sizes), options.repeat, options.seed, options.runs_root)
+
+    with open(options.output, "w") as file:
+        json.dump(suite, file, indent=2)
+    print(f"Results written to {options.output}")
+
+    if options.compare:
+        with open(options.compare, "r") as file:
+            compare(json.load(file), suite)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,385 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import threading
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from synthetic_run import write_synthetic_run
+
+##########################################################################################
+
+# MODULE LOAD TEST
+
+# The Load Test Module replays user sessions against the Dash callback endpoint of the
+# dashboard with many concurrent users. A session is a list of callback requests as the
+# browser sends them: page visits, generation slider moves and node taps in the family
+# tree, node taps in the gene pool and tab changes of the run results. Sessions are
+# generated from the individuals and genes of a run, or replayed from a JSON file of
+# recorded requests. Requests go through the Flask test client or a local HTTP server and
+# the report holds the throughput and the p50/p95/p99 latency per callback. Everything
+# runs offline, by default on a synthetic run.
+# Usage: python benchmarks/load_test.py --users=20 --sessions=5 --generations=20 --population=100
+
+###########################################################################################
+
+# Percentiles of the latency report
+PERCENTILES = [50, 95, 99]
+
+# Label of the page routing callback of Dash
+PAGE_LABEL = "page"
+
+
+### CALLBACK REQUESTS ###
+
+def parse_outputs(output):
+    """
+    Outputs of a callback key of the app.
+
+    Args:
+        output (str): Callback key, e.g. "graph.figure" or "..a.children...b.data..".
+
+    Returns:
+        dict or list: {"id", "property"} of a single output or a list of them for several outputs.
+    """
+    if not output.startswith(".."):
+        component_id, prop = output.rsplit(".", 1)
+        return {"id": component_id, "property": prop}
+
+    parts = output[2:-2].split("...")
+    return [dict(zip(("id", "property"), part.rsplit(".", 1))) for part in parts]
+
+class CallbackRequests:
+    """
+    Request bodies of the callbacks of a Dash app by the name of the callback function.
+
+    Example:
+        >>> requests = CallbackRequests(app)
+        >>> requests.body("set_cytoscape", {"gen-range-slider.value": [2, 3, 4], "ind-select.value": "quick_gecko"}, "gen-range-slider.value")
+    """
+
+    def __init__(self, app):
+        self.callbacks = {}
+
+        for output, callback in app.callback_map.items():
+            function = callback.get("callback")
+            if function is None:
+                continue
+
+            name = PAGE_LABEL if function.__module__.startswith("dash") else function.__name__
+            self.callbacks[name] = (output, callback)
+
+        self.labels = {output: name for name, (output, _) in self.callbacks.items()}
+
+    def body(self, name, values, changed):
+        """
+        Request body of a callback.
+
+        Args:
+            name (str): Name of the callback function, PAGE_LABEL for a page visit.
+            values (dict): "id.property" to value of the inputs and states, missing ones are None.
+            changed (str): "id.property" of the input that triggered the callback.
+
+        Returns:
+            dict: Body of a POST request to /_dash-update-component.
+        """
+        output, callback = self.callbacks[name]
+
+        def dependencies(items):
+            return [{"id": item["id"], "property": item["property"], "value": values.get(f"{item['id']}.{item['property']}")} for item in items]
+
+        return {
+            "output": output,
+            "outputs": parse_outputs(output),
+            "inputs": dependencies(callback["inputs"]),
+            "state": dependencies(callback["state"]),
+            "changedPropIds": [changed],
+        }
+
+    def label(self, body):
+        """Name of the callback of a request body, the output key for unknown callbacks."""
+        return self.labels.get(body.get("output"), body.get("output"))
+
+
+### SESSIONS ###
+
+class SessionGenerator:
+    """
+    Random user sessions of a run.
+
+    Attributes:
+        run (str): The directory of the run results.
+        name (str): The name of the run sent in the 'run-name' store.
+    """
+
+    def __init__(self, requests, run, name, rng):
+        from evolution import get_generations, get_individuals
+        from genepool import get_genepool
+
+        self.requests = requests
+        self.name = name
+        self.rng = rng
+        self.generations = get_generations(run, as_int=True)
+        self.individuals = {generation: get_individuals(run, range(generation, generation + 1), value="names") for generation in self.generations}
+        self.genes = [element["data"] for element in get_genepool(run)[0] if "layer" in element["data"]]
+
+    def _body(self, callback, values, changed):
+        return self.requests.body(callback, {"run-name.data": self.name, **values}, changed)
+
+    def page(self, path):
+        search = f"?run={self.name}"
+        return self._body(PAGE_LABEL, {"_pages_location.pathname": path, "_pages_location.search": search}, "_pages_location.pathname")
+
+    def slider_move(self):
+        """Requests of moving the generation slider of the family tree and selecting an individual."""
+        generation = self.rng.choice(self.generations)
+        gen_range = [max(self.generations[0], generation - 1), generation, min(self.generations[-1], generation + 1)]
+        individual = self.rng.choice(self.individuals[generation])
+
+        return [
+            self._body("set_individuals_select", {"gen-range-slider.value": gen_range}, "gen-range-slider.value"),
+            self._body("set_cytoscape", {"gen-range-slider.value": gen_range, "ind-select.value": individual}, "gen-range-slider.value"),
+            self._body("set_values", {"gen-range-slider.value": gen_range, "ind-select.value": individual}, "ind-select.value"),
+        ]
+
+    def node_tap(self):
+        """Requests of tapping an individual in the family tree."""
+        generation = self.rng.choice(self.generations)
+        gen_range = [max(self.generations[0], generation - 1), generation, min(self.generations[-1], generation + 1)]
+        individual = self.rng.choice(self.individuals[generation])
+        node = {"id": individual, "label": individual[0:3], "generation": generation, "extinct": False}
+        values = {"gen-range-slider.value": gen_range, "ind-select.value": individual, "cytoscape-family-tree.tapNodeData": node}
+
+        return [
+            self._body("set_cytoscape", values, "cytoscape-family-tree.tapNodeData"),
+            self._body("set_values", values, "cytoscape-family-tree.tapNodeData"),
+        ]
+
+    def gene_tap(self):
+        """Request of tapping a gene in the gene pool."""
+        return [self._body("display_node_data", {"cytoscape-genepool.tapNodeData": self.rng.choice(self.genes)}, "cytoscape-genepool.tapNodeData")]
+
+    def results_tab(self, tab):
+        """Requests of opening a tab of the run results page."""
+        callbacks = ["set_general_cards", "set_fitness_plot", "set_pareto_plot"] if tab == "plots" else ["set_best_individuals"]
+        return [self._body(callback, {"run-results-tabs.value": tab}, "run-results-tabs.value") for callback in callbacks]
+
+    def session(self, interactions=5):
+        """
+        A random session: a page visit followed by interactions on the page.
+
+        Args:
+            interactions (int): Number of interactions after the page visit.
+
+        Returns:
+            list: Request bodies.
+        """
+        page = self.rng.choice(["family-tree", "family-tree", "genepool", "results", "hyperparameters"])
+
+        if page == "family-tree":
+            requests = [self.page("/family-tree")]
+            for _ in range(interactions):
+                requests += self.slider_move() if self.rng.random() < 0.5 else self.node_tap()
+        elif page == "genepool":
+            requests = [self.page("/genepool")]
+            for _ in range(interactions):
+                requests += self.gene_tap()
+        elif page == "results":
+            requests = [self.page("/results")] + self.results_tab("plots") + self.results_tab("best-individuals")
+        else:
+            requests = [self.page("/")]
+
+        return requests
+
+
+### TRANSPORTS ###
+
+class TestClientTransport:
+    """Requests through a Flask test client per thread, the app answers in the calling thread."""
+
+    def __init__(self, server):
+        self.server = server
+        self._local = threading.local()
+
+    def post(self, body):
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = self._local.client = self.server.test_client()
+        return client.post("/_dash-update-component", json=body).status_code
+
+    def close(self):
+        pass
+
+class HTTPTransport:
+    """Requests over HTTP to a threaded local server of the app."""
+
+    def __init__(self, server, host="127.0.0.1", port=0):
+        from werkzeug.serving import make_server
+
+        self.http_server = make_server(host, port, server, threaded=True)
+        self.url = f"http://{host}:{self.http_server.server_port}/_dash-update-component"
+        threading.Thread(target=self.http_server.serve_forever, daemon=True).start()
+
+    def post(self, body):
+        request = urllib.request.Request(self.url, json.dumps(body).encode("utf-8"), {"Content-Type": "application/json"})
+        try:
+            with urllib.request.urlopen(request) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as e:
+            return e.code
+
+    def close(self):
+        self.http_server.shutdown()
+
+
+### LOAD TEST ###
+
+def run_load(transport, requests, sessions, users, think=0.0):
+    """
+    Replay sessions with concurrent users.
+
+    Args:
+        transport (TestClientTransport or HTTPTransport): Transport of the requests.
+        requests (CallbackRequests): Callbacks of the app, used for the labels.
+        sessions (list): Sessions as lists of request bodies, every user replays its share in order.
+        users (int): Number of concurrent users.
+        think (float): Seconds a user waits between two requests.
+
+    Returns:
+        tuple: List of (label, seconds, status) of every request and the wall time in seconds.
+    """
+    samples = []
+    samples_lock = threading.Lock()
+
+    def user(user_sessions):
+        user_samples = []
+        for session in user_sessions:
+            for body in session:
+                start = time.perf_counter()
+                status = transport.post(body)
+                user_samples.append((requests.label(body), time.perf_counter() - start, status))
+                if think:
+                    time.sleep(think)
+        with samples_lock:
+            samples.extend(user_samples)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=users) as pool:
+        list(pool.map(user, [sessions[idx::users] for idx in range(users)]))
+
+    return samples, time.perf_counter() - start
+
+def latency_report(samples, wall):
+    """
+    Throughput and latency percentiles per callback.
+
+    Returns:
+        dict: "requests", "errors", "seconds", "throughput" and "callbacks", callback label to "requests", "errors",
+        "throughput" and "p50", "p95", "p99" and "max" latency in milliseconds.
+    """
+    callbacks = {}
+    for label, seconds, status in samples:
+        callbacks.setdefault(label, []).append((seconds, status))
+
+    report = {
+        "requests": len(samples),
+        "errors": sum(status >= 400 for _, _, status in samples),
+        "seconds": wall,
+        "throughput": len(samples) / wall if wall else 0.0,
+        "callbacks": {},
+    }
+
+    for label, values in sorted(callbacks.items()):
+        latencies = np.array([seconds for seconds, _ in values]) * 1000
+        report["callbacks"][label] = {
+            "requests": len(values),
+            "errors": sum(status >= 400 for _, status in values),
+            "throughput": len(values) / wall if wall else 0.0,
+            **{f"p{percentile}": float(np.percentile(latencies, percentile)) for percentile in PERCENTILES},
+            "max": float(latencies.max()),
+        }
+
+    return report
+
+def print_report(report):
+    print(f"\n{report['requests']} requests, {report['errors']} errors in {report['seconds']:.2f}s: {report['throughput']:.1f} requests/s")
+    print(f"{'callback':<28}{'requests':>9}{'errors':>8}{'req/s':>9}" + "".join(f"{'p' + str(p) + ' ms':>10}" for p in PERCENTILES) + f"{'max ms':>10}")
+    for label, callback in report["callbacks"].items():
+        print(f"{label[:27]:<28}{callback['requests']:>9}{callback['errors']:>8}{callback['throughput']:>9.1f}"
+              + "".join(f"{callback['p' + str(p)]:>10.1f}" for p in PERCENTILES) + f"{callback['max']:>10.1f}")
+
+
+### COMMAND LINE ###
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the Dash callbacks of the dashboard with concurrent users.")
+    parser.add_argument("--run", help="Directory of the run results, default is a synthetic run.")
+    parser.add_argument("--generations", type=int, default=20, help="Generations of the synthetic run.")
+    parser.add_argument("--population", type=int, default=100, help="Population of the synthetic run.")
+    parser.add_argument("--users", type=int, default=20, help="Number of concurrent users.")
+    parser.add_argument("--sessions", type=int, default=5, help="Number of generated sessions per user.")
+    parser.add_argument("--interactions", type=int, default=5, help="Number of interactions per generated session.")
+    parser.add_argument("--think-ms", type=float, default=0, help="Milliseconds a user waits between two requests.")
+    parser.add_argument("--replay", help="JSON file of recorded sessions, a list of lists of callback request bodies.")
+    parser.add_argument("--save-sessions", help="Write the sessions to a JSON file to replay them later.")
+    parser.add_argument("--transport", choices=["test-client", "http"], default="test-client")
+    parser.add_argument("--warmup", type=int, default=1, help="Number of sessions replayed by a single user before the test.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="JSON file of the report.")
+    options = parser.parse_args(argv)
+
+    run = options.run
+    if run is None:
+        run = os.path.join(tempfile.mkdtemp(prefix="evovis_load_"), f"synthetic_{options.generations}x{options.population}")
+        write_synthetic_run(run, generations=options.generations, population=options.population, seed=options.seed)
+
+    os.environ["RUN_RESULTS_PATH"] = run
+
+    from app import app
+    from runs import run_name
+
+    # The first request registers the callbacks of the app
+    with app.server.test_client() as client:
+        client.get("/")
+
+    requests = CallbackRequests(app)
+    rng = random.Random(options.seed)
+
+    if options.replay:
+        with open(options.replay, "r") as file:
+            sessions = json.load(file)
+    else:
+        generator = SessionGenerator(requests, run, run_name(run), rng)
+        sessions = [generator.session(options.interactions) for _ in range(options.users * options.sessions)]
+
+    if options.save_sessions:
+        with open(options.save_sessions, "w") as file:
+            json.dump(sessions, file)
+
+    transport = HTTPTransport(app.server) if options.transport == "http" else TestClientTransport(app.server)
+
+    try:
+        run_load(transport, requests, sessions[:options.warmup], 1)
+        samples, wall = run_load(transport, requests, sessions, options.users, options.think_ms / 1000)
+    finally:
+        transport.close()
+
+    report = latency_report(samples, wall)
+    report.update({"run": run, "users": options.users, "sessions": len(sessions), "transport": options.transport})
+    print_report(report)
+
+    if options.output:
+        with open(options.output, "w") as file:
+            json.dump(report, file, indent=2)
+
+if __name__ == "__main__":
+    main()
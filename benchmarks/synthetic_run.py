@@ -0,0 +1,343 @@
+import os
+import sys
+import json
+import random
+import shutil
+import argparse
+from collections import deque
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from genepool import SearchSpace
+
+##########################################################################################
+
+# MODULE SYNTHETIC RUN
+
+# The Synthetic Run Module writes EvoNAS runs of any size in the on-disk format of the
+# dashboard: config.json, search_space.json, crossover_parents.csv and a directory per
+# individual with its chromosome.json and results.json. Chromosomes are random walks
+# through the layer rules of a real search space. The individuals of a generation are
+# the crossovers of the best individuals of the previous generation, with mutations, so
+# the lineage and the gene usage look like an evolving run. Runs are reproducible by seed.
+# Usage: python benchmarks/synthetic_run.py <output_dir> --generations=50 --population=200
+
+###########################################################################################
+
+EXAMPLE_RUN = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "enas_example_run_results")
+
+ADJECTIVES = [
+    "agile", "ancient", "azure", "bold", "brave", "bright", "calm", "clever", "cosmic", "crimson",
+    "curious", "daring", "eager", "electric", "fancy", "fierce", "gentle", "giga", "golden", "happy",
+    "humble", "icy", "jolly", "keen", "lively", "lucky", "mega", "mighty", "misty", "noble",
+    "notorious", "optimistic", "patient", "proud", "quaint", "quick", "rapid", "royal", "rusty", "shiny",
+    "silent", "smoky", "spectral", "spotted", "sunny", "swift", "tangerine", "tidy", "vivid", "wild",
+]
+
+ANIMALS = [
+    "aardwark", "badger", "bat", "beaver", "bison", "caterpillar", "cheetah", "cobra", "cockle", "cow",
+    "crane", "dingo", "dolphin", "eagle", "ermine", "falcon", "ferret", "galago", "gecko", "heron",
+    "ibis", "impala", "jackal", "jackdaw", "jackrabbit", "koala", "lemur", "leech", "lynx", "macaque",
+    "marten", "mole", "newt", "ocelot", "oriole", "otter", "panda", "porcupine", "quail", "raven",
+    "rooster", "saluki", "snail", "swift", "tapir", "terrier", "turtle", "walrus", "wren", "yak",
+]
+
+# Measurements of the example run with their config.json entries
+DEFAULT_MEASUREMENTS = ["memory_footprint_h5", "inference_time", "val_acc", "fitness"]
+
+
+### CHROMOSOMES ###
+
+def _terminal_distances(search_space):
+    """Number of layers from every layer to a layer without successors."""
+    predecessors = {}
+    for layer, targets in search_space.successors.items():
+        for target in targets:
+            predecessors.setdefault(target, set()).add(layer)
+
+    layers = set(search_space.successors) | set(predecessors)
+    terminals = [layer for layer in layers if not search_space.successors.get(layer)]
+    distances = {layer: 0 for layer in terminals}
+    queue = deque(terminals)
+
+    while queue:
+        layer = queue.popleft()
+        for predecessor in predecessors.get(layer, ()):
+            if predecessor not in distances:
+                distances[predecessor] = distances[layer] + 1
+                queue.append(predecessor)
+
+    return distances
+
+def _gene(layer, genes, rng):
+    """Gene of a layer with parameter values drawn from the gene pool ranges."""
+    template = genes.get(layer, {"layer": layer, "f_name": layer})
+    gene = {}
+
+    for key, value in template.items():
+        if key == "group":
+            continue
+
+        # [minimum, maximum, step] ranges of numbers and lists of choices
+        if isinstance(value, list) and len(value) == 3 and all(isinstance(item, (int, float)) for item in value) and value[2] > 0:
+            low, high, step = value
+            steps = max(0, int((high - low) // step))
+            value = low + step * rng.randint(0, steps)
+        elif isinstance(value, list) and value:
+            value = rng.choice(value)
+
+        gene[key] = value
+
+    return gene
+
+class ChromosomeSampler:
+    """
+    Random chromosomes and crossovers that follow the layer rules of a search space.
+
+    Chromosomes, including children of crossovers, have at most length genes followed by the shortest way to an
+    end layer, so they don't grow over the generations.
+
+    Attributes:
+        search_space (SearchSpace): The search space the chromosomes are drawn from.
+        length (int): Number of layers after which a chromosome takes the shortest way to an end layer.
+    """
+
+    def __init__(self, search_space, length, rng):
+        self.search_space = search_space
+        self.length = length
+        self.rng = rng
+        self.genes = {gene["layer"]: gene for gene in search_space.genes}
+        self.distances = _terminal_distances(search_space)
+
+    def walk(self, layer="Start", genes=None):
+        """Genes of a random walk from a layer, the layer itself is not included."""
+        genes = list(genes or [])
+
+        while True:
+            successors = sorted(target for target in self.search_space.successors.get(layer, ()) if target in self.distances)
+
+            if not successors:
+                return genes
+
+            if len(genes) >= self.length:
+                nearest = min(self.distances[target] for target in successors)
+                successors = [target for target in successors if self.distances[target] == nearest]
+
+            layer = self.rng.choice(successors)
+            genes.append(_gene(layer, self.genes, self.rng))
+
+    def random(self):
+        """A new random chromosome."""
+        return self.walk()
+
+    def max_length(self):
+        """Upper bound of the number of genes of the chromosomes of the sampler."""
+        return self.length + max(self.distances.values())
+
+    def _limit(self, genes):
+        """Cut a chromosome longer than length after length genes and take the shortest way to an end layer."""
+        if len(genes) <= self.length:
+            return genes
+        return self.walk(genes[self.length - 1]["layer"], genes[:self.length])
+
+    def crossover(self, parent1, parent2, attempts=20):
+        """
+        Child of two chromosomes: the genes of parent1 before a crossover point followed by the genes of
+        parent2 from a crossover point, where the layer rules allow the transition. Children longer than
+        length are cut like random walks.
+
+        Returns:
+            tuple: Child chromosome, crossover point of parent1 and crossover point of parent2.
+        """
+        for _ in range(attempts):
+            point1 = self.rng.randint(1, max(1, len(parent1) - 1))
+            point2 = self.rng.randint(1, max(1, len(parent2) - 1))
+            head, tail = parent1[:point1], parent2[point2:]
+
+            if tail and tail[0]["layer"] in self.search_space.successors.get(head[-1]["layer"], ()):
+                return self._limit([dict(gene) for gene in head + tail]), point1, point2
+
+        # Without a compatible pair of points the head of parent1 is completed by a random walk
+        point1 = self.rng.randint(1, max(1, len(parent1) - 1))
+        head = [dict(gene) for gene in parent1[:point1]]
+        return self._limit(self.walk(head[-1]["layer"], head)), point1, len(parent2)
+
+    def mutate(self, chromosome):
+        """Draw the parameter values of a random gene again."""
+        idx = self.rng.randrange(len(chromosome))
+        chromosome[idx] = _gene(chromosome[idx]["layer"], self.genes, self.rng)
+        return chromosome
+
+
+### MEASUREMENTS ###
+
+def _measurement_config(measurement, example):
+    return example.get(measurement, {
+        "displayname": measurement.replace("_", " ").title(),
+        "unit": None,
+        "run-result-plot": True,
+        "individual-info-plot": True,
+        "individual-info-img": None,
+        "pareto-optimlity-plot": True,
+        "board": False,
+    })
+
+def _results(chromosome, generation, generations, measurements, error, rng):
+    """Measurements of an individual, larger and deeper chromosomes are bigger and slower, accuracy grows over the generations."""
+    size = sum(gene.get("filters", 8) * gene.get("kernel_size", 1) for gene in chromosome)
+    progress = generation / max(1, generations)
+    accuracy = min(0.99, max(0.05, 0.35 + 0.4 * progress + rng.gauss(0, 0.05)))
+    values = {
+        "memory_footprint_h5": int(2_000_000 + size * 2500 * rng.uniform(0.8, 1.2)),
+        "inference_time": max(0.01, 0.05 * len(chromosome) * rng.uniform(0.5, 1.5)),
+        "val_acc": accuracy,
+        "fitness": accuracy,
+    }
+
+    if error:
+        return {"memory_footprint_h5": values["memory_footprint_h5"], "fitness": 0, "error": True}
+
+    results = {measurement: values.get(measurement, rng.random() * (0.5 + progress)) for measurement in measurements}
+    # The dashboard ranks individuals by fitness
+    results.setdefault("fitness", values["fitness"])
+    results["error"] = False
+    return results
+
+
+### RUN ###
+
+def _names(rng):
+    """Endless unique adjective_animal names."""
+    used = set()
+    while True:
+        name = f"{rng.choice(ADJECTIVES)}_{rng.choice(ANIMALS)}"
+        if name in used:
+            name = f"{name}_{len(used)}"
+        used.add(name)
+        yield name
+
+def _write_json(path, data):
+    with open(path, "w") as file:
+        json.dump(data, file, indent=4)
+
+def write_synthetic_run(path, generations=5, population=20, chromosome_length=14, measurements=None, error_rate=0.05,
+                        best_models=4, mutation_rate=20, search_space=None, seed=0):
+    """
+    Write a synthetic run directory.
+
+    Args:
+        path (str): Directory of the run, created if it doesn't exist. Existing generation directories are replaced.
+        generations (int): Number of generations.
+        population (int): Number of individuals per generation.
+        chromosome_length (int): Number of layers after which chromosomes take the shortest way to an end layer.
+        measurements (list, optional): Measurement keys of results.json, default is DEFAULT_MEASUREMENTS.
+            Unknown measurements get values between 0 and 1 and a generic config.json entry.
+        error_rate (float): Share of individuals whose training failed ("error": true).
+        best_models (int): Number of best individuals of a generation that are parents of the next generation.
+        mutation_rate (int): Percentage of children with a mutated gene.
+        search_space (str, optional): Path of the search_space.json the chromosomes are drawn from, default is the one of the example run.
+        seed (int): Seed of the random numbers, the same arguments write the same run.
+
+    Returns:
+        str: The directory of the run.
+
+    Example:
+        >>> write_synthetic_run("/tmp/runs/large", generations=50, population=400, seed=1)
+        '/tmp/runs/large'
+    """
+    rng = random.Random(seed)
+    measurements = list(measurements or DEFAULT_MEASUREMENTS)
+    search_space_path = search_space or os.path.join(EXAMPLE_RUN, "search_space.json")
+    sampler = ChromosomeSampler(SearchSpace.from_file(search_space_path), chromosome_length, rng)
+    names = _names(rng)
+
+    os.makedirs(path, exist_ok=True)
+    for entry in os.listdir(path):
+        if entry.startswith("Generation_"):
+            shutil.rmtree(os.path.join(path, entry))
+
+    shutil.copyfile(search_space_path, os.path.join(path, "search_space.json"))
+
+    with open(os.path.join(EXAMPLE_RUN, "config.json"), "r") as file:
+        example = json.load(file)
+
+    hyperparameters = example["hyperparameters"]
+    hyperparameters["generations"]["value"] = generations
+    hyperparameters["population_size"]["value"] = population
+    hyperparameters["nb_best_models_crossover"]["value"] = best_models
+    hyperparameters["mutation_rate"]["value"] = mutation_rate
+    hyperparameters["random_seed"]["value"] = seed
+
+    _write_json(os.path.join(path, "config.json"), {
+        "hyperparameters": hyperparameters,
+        "results": {measurement: _measurement_config(measurement, example["results"]) for measurement in measurements},
+    })
+
+    individuals = [(next(names), sampler.random()) for _ in range(population)]
+
+    with open(os.path.join(path, "crossover_parents.csv"), "w") as crossover_file:
+        for generation in range(1, generations + 1):
+            generation_dir = os.path.join(path, f"Generation_{generation}")
+            fitness = {}
+
+            for name, chromosome in individuals:
+                individual_dir = os.path.join(generation_dir, name)
+                os.makedirs(individual_dir)
+                results = _results(chromosome, generation, generations, measurements, rng.random() < error_rate, rng)
+                fitness[name] = results["fitness"]
+                _write_json(os.path.join(individual_dir, "chromosome.json"), chromosome)
+                _write_json(os.path.join(individual_dir, "results.json"), results)
+
+            # The best individuals are the parents of the next population, the crossovers of the last generation have no directory
+            chromosomes = dict(individuals)
+            parents = sorted(chromosomes, key=lambda name: fitness[name], reverse=True)[:max(2, best_models)]
+            children = []
+
+            for _ in range(population):
+                parent1, parent2 = rng.sample(parents, 2)
+                child, point1, point2 = sampler.crossover(chromosomes[parent1], chromosomes[parent2])
+
+                if rng.random() * 100 < mutation_rate:
+                    sampler.mutate(child)
+
+                name = next(names)
+                children.append((name, child))
+                crossover_file.write(f'Generation: {generation},"Parent_1: ({parent1}, {point1})","Parent_2: ({parent2}, {point2})",New_Individual: {name}\n')
+
+            individuals = children
+
+    return path
+
+
+### COMMAND LINE ###
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write a synthetic EvoNAS run.")
+    parser.add_argument("path", help="Directory of the run.")
+    parser.add_argument("--generations", type=int, default=5)
+    parser.add_argument("--population", type=int, default=20)
+    parser.add_argument("--chromosome-length", type=int, default=14)
+    parser.add_argument("--measurements", default=",".join(DEFAULT_MEASUREMENTS), help="Comma separated measurement keys.")
+    parser.add_argument("--error-rate", type=float, default=0.05)
+    parser.add_argument("--best-models", type=int, default=4)
+    parser.add_argument("--mutation-rate", type=int, default=20)
+    parser.add_argument("--search-space", help="Path of a search_space.json, default is the one of the example run.")
+    parser.add_argument("--seed", type=int, default=0)
+    options = parser.parse_args(argv)
+
+    write_synthetic_run(
+        options.path,
+        generations=options.generations,
+        population=options.population,
+        chromosome_length=options.chromosome_length,
+        measurements=[measurement for measurement in options.measurements.split(",") if measurement],
+        error_rate=options.error_rate,
+        best_models=options.best_models,
+        mutation_rate=options.mutation_rate,
+        search_space=options.search_space,
+        seed=options.seed,
+    )
+    print(f"Wrote {options.generations} generations of {options.population} individuals to {options.path}")
+
+if __name__ == "__main__":
+    main()
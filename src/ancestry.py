@@ -0,0 +1,281 @@
+import sys
+from runstore import get_run_store
+from lineage import get_lineage_index
+
+##########################################################################################
+
+# MODULE ANCESTRY
+
+# The Ancestry Module answers ancestor and descendant queries of individuals of a run.
+# The individuals of each generation are numbered, so a set of individuals of a generation
+# is one bitset block. One topological pass over the lineage computes, per individual, a
+# tuple with an ancestor block per earlier generation and a descendant block per later
+# generation, after which queries are bit operations. Equal blocks and tuples are shared,
+# e.g. between siblings, and the index counts into the memory budget of the run store.
+# Parameters: run (str) The directory of the run results.
+
+###########################################################################################
+
+
+### ANCESTRY INDEX ###
+
+def _merge(blocks, other, start):
+    """Bitwise or of the blocks of other into blocks from position start, blocks is extended as needed."""
+    if len(blocks) < start + len(other):
+        blocks.extend([0] * (start + len(other) - len(blocks)))
+
+    for idx, bits in enumerate(other, start):
+        blocks[idx] |= bits
+
+def _set_bit(blocks, idx, bit):
+    """Set a bit in the block at position idx, blocks is extended as needed."""
+    if len(blocks) <= idx:
+        blocks.extend([0] * (idx + 1 - len(blocks)))
+
+    blocks[idx] |= 1 << bit
+
+class AncestryIndex:
+    """
+    Precomputed per-generation ancestor and descendant bitsets of all individuals of a run.
+
+    Parents are expected in earlier generations than their children, other lineage records are ignored.
+
+    Attributes:
+        generations (list): Sorted generation numbers.
+        names (dict): Generation number to the individual names of its block, the bit position is the list position.
+        position (dict): Individual name to (index in generations, bit position in its block).
+        ancestors (dict): Individual name to tuple of ancestor blocks, one per generation before its own.
+        descendants (dict): Individual name to tuple of descendant blocks, one per generation after its own.
+        nbytes (int): Estimated memory of the index in bytes.
+    """
+
+    def __init__(self, generations, lineage):
+        """
+        Args:
+            generations (dict): Generation number to list of individual names.
+            lineage (LineageIndex): Lineage index of the run.
+        """
+        self.generations = sorted(generations)
+        self.names = {generation: list(generations[generation]) for generation in self.generations}
+        self.position = {
+            name: (generation_idx, bit)
+            for generation_idx, generation in enumerate(self.generations)
+            for bit, name in enumerate(self.names[generation])
+        }
+        self._generation_idx = {generation: idx for idx, generation in enumerate(self.generations)}
+
+        # Equal blocks and tuples are stored once
+        shared = {}
+        share = lambda value: shared.setdefault(value, value)
+
+        self.ancestors = {}
+
+        # Siblings have the same ancestors, they are merged once per set of parents
+        by_parents = {}
+
+        for generation_idx, generation in enumerate(self.generations):
+            for name in self.names[generation]:
+                parents = tuple(sorted({
+                    parent for parent, _ in lineage.get_parents(name)
+                    if self.position.get(parent, (generation_idx,))[0] < generation_idx
+                }))
+
+                if parents not in by_parents:
+                    blocks = []
+
+                    for parent in parents:
+                        parent_idx, bit = self.position[parent]
+                        _merge(blocks, self.ancestors[parent], 0)
+                        _set_bit(blocks, parent_idx, bit)
+
+                    by_parents[parents] = share(tuple(share(bits) for bits in blocks))
+
+                self.ancestors[name] = by_parents[parents]
+
+        # Block k of a descendant tuple belongs to the generation k + 1 after the one of the individual
+        self.descendants = {}
+
+        for generation_idx in range(len(self.generations) - 1, -1, -1):
+            for name in self.names[self.generations[generation_idx]]:
+                blocks = []
+                merged = set()
+
+                for child, _ in lineage.get_children(name):
+                    child_idx, bit = self.position.get(child, (generation_idx, 0))
+
+                    if child_idx > generation_idx:
+                        offset = child_idx - generation_idx - 1
+                        _set_bit(blocks, offset, bit)
+
+                        # Children often share their descendant tuple, e.g. the empty one
+                        if (offset, id(self.descendants[child])) not in merged:
+                            merged.add((offset, id(self.descendants[child])))
+                            _merge(blocks, self.descendants[child], offset + 1)
+
+                self.descendants[name] = share(tuple(share(bits) for bits in blocks))
+
+        self.nbytes = (
+            sum(sys.getsizeof(value) for value in shared.values())
+            + sum(sys.getsizeof(table) for table in (self.position, self.ancestors, self.descendants))
+            + sum(sys.getsizeof(names) for names in self.names.values())
+            + len(self.position) * sys.getsizeof((0, 0))
+        )
+
+    def generation(self, individual):
+        """Generation number of an individual, None if unknown."""
+        position = self.position.get(individual)
+        return None if position is None else self.generations[position[0]]
+
+    def block(self, individual, direction, generation):
+        """
+        Ancestor or descendant bitset of an individual within the block of a generation.
+
+        Args:
+            individual (str): The individual's identifier.
+            direction (str): "ancestors" or "descendants".
+            generation (int): The generation number.
+
+        Returns:
+            int: Bitset over the individuals of the generation, 0 if the individual or the generation is unknown.
+        """
+        position = self.position.get(individual)
+        target = self._generation_idx.get(generation)
+
+        if position is None or target is None:
+            return 0
+
+        if direction == "ancestors":
+            blocks, idx = self.ancestors[individual], target
+        else:
+            blocks, idx = self.descendants[individual], target - position[0] - 1
+
+        return blocks[idx] if 0 <= idx < len(blocks) else 0
+
+    def members(self, individual, direction, generation=None):
+        """Individual names of an ancestor or descendant bitset, optionally only of one generation."""
+        generations = self.generations if generation is None else [generation]
+        names = []
+
+        for gen in generations:
+            block = self.block(individual, direction, gen)
+
+            while block:
+                low = block & -block
+                names.append(self.names[gen][low.bit_length() - 1])
+                block ^= low
+
+        return names
+
+
+def get_ancestry_index(run):
+    """
+    Get the ancestry index of a run, built again when the run data or the lineage changes.
+
+    Args:
+        run (str): The directory of the run results.
+
+    Returns:
+        AncestryIndex: The ancestry index of the run.
+    """
+    store = get_run_store(run)
+    lineage = get_lineage_index(run)
+    store.refresh()
+
+    def build():
+        generations = {generation: store.individuals(generation) for generation in store.generations()}
+        return AncestryIndex(generations, lineage)
+
+    return store.cached("ancestry", (store.version, lineage.version), build, lambda index: index.nbytes)
+
+
+### QUERIES ###
+
+def get_ancestors(run, individual, generation=None):
+    """
+    Get the ancestors of an individual.
+
+    Args:
+        run (str): The directory of the run results.
+        individual (str): The individual's identifier.
+        generation (int, optional): Only return ancestors of this generation.
+
+    Returns:
+        list: Names of the ancestors ordered by generation and name.
+
+    Example:
+        >>> get_ancestors('my_run', 'notorious_wren', generation=1)
+        ['celadon_caterpillar', 'spectral_jackrabbit']
+    """
+    return get_ancestry_index(run).members(individual, "ancestors", generation)
+
+def get_descendants(run, individual, generation=None):
+    """
+    Get the descendants of an individual.
+
+    Args:
+        run (str): The directory of the run results.
+        individual (str): The individual's identifier.
+        generation (int, optional): Only return descendants of this generation.
+
+    Returns:
+        list: Names of the descendants ordered by generation and name.
+    """
+    return get_ancestry_index(run).members(individual, "descendants", generation)
+
+def descendant_count_in_generation(run, individual, generation):
+    """
+    Count the descendants of an individual in a generation.
+
+    Args:
+        run (str): The directory of the run results.
+        individual (str): The individual's identifier.
+        generation (int): The generation in which descendants are counted.
+
+    Returns:
+        int: Number of descendants.
+
+    Example:
+        >>> descendant_count_in_generation('my_run', 'spectral_jackrabbit', 5)
+        12
+    """
+    return get_ancestry_index(run).block(individual, "descendants", generation).bit_count()
+
+def founder_contributions(run, individual=None, generation=None):
+    """
+    Count the descendants of the founders (individuals of the first generation) in a generation.
+
+    Args:
+        run (str): The directory of the run results.
+        individual (str, optional): Only include founders that are ancestors of this individual.
+        generation (int, optional): The generation in which descendants are counted. Default is the
+            generation of the individual or the last generation.
+
+    Returns:
+        dict: Founder name to number of descendants in the generation, founders without descendants are left out.
+
+    Example:
+        >>> founder_contributions('my_run', 'satisfied_cow')
+        {'giga_galago': 14, 'spectral_jackrabbit': 17}
+    """
+    index = get_ancestry_index(run)
+
+    if not index.generations:
+        return {}
+
+    first_generation = index.generations[0]
+
+    if individual is None:
+        founders = index.names[first_generation]
+        generation = index.generations[-1] if generation is None else generation
+    else:
+        founders = index.members(individual, "ancestors", first_generation)
+        generation = index.generation(individual) if generation is None else generation
+
+    contributions = {}
+
+    for founder in founders:
+        count = index.block(founder, "descendants", generation).bit_count()
+        if count:
+            contributions[founder] = count
+
+    return contributions
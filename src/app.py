@@ -1,6 +1,26 @@
 import dash
-from dash import html
+from dash import html, dcc, callback, Input, Output, State
+from dash.exceptions import PreventUpdate
 from dash_iconify import DashIconify
+import dash_mantine_components as dmc
+from dotenv import load_dotenv
+from runstore import get_run_version
+from livewatch import is_live, get_live_interval
+from runs import list_runs, resolve_run, run_name, run_search
+from metrics import instrument_app
+from profiler import install_request_profiler
+
+### LOAD PATH FROM ENVIRONMENT VARIABLES
+load_dotenv()
+
+### NAVIGATION LINKS TO PAGES
+NAV_LINKS = {
+    "nav-logo": "pages.hyperparameters_page",
+    "nav-hyperparameters": "pages.hyperparameters_page",
+    "nav-genepool": "pages.genepool_page",
+    "nav-family-tree": "pages.family_tree_page",
+    "nav-results": "pages.run_results_page",
+}
 
 ### LAYOUT COMPONENTS
 def navbar():
@@ -8,16 +28,18 @@ def navbar():
     [
         html.Div(
             [   
-                html.A(children=html.Img(src="assets/media/evonas-logo.png", height="50px"), href=dash.page_registry['pages.hyperparameters_page']['relative_path']),
+                html.A(children=html.Img(src="assets/media/evonas-logo.png", height="50px"), href=dash.page_registry['pages.hyperparameters_page']['relative_path'], id="nav-logo"),
+                run_select(),
             ],
             id="navrun"
         ),
         html.Div(
             [
-                html.A(html.Button(children=DashIconify(icon="streamline:input-box-solid", height=25, width=25, color="#000000"), className="circle-btn", id="hyperparameter-link"), href=dash.page_registry['pages.hyperparameters_page']['relative_path']),
-                html.A(html.Button(children=DashIconify(icon="jam:dna", height=25, width=25, color="#000000"), className="circle-btn", id="genepool-link"), href=dash.page_registry['pages.genepool_page']['relative_path']),
-                html.A(html.Button(children=DashIconify(icon="mdi:graph", height=25, width=25, color="#000000"), className="circle-btn", id="family-tree-link"), href=dash.page_registry['pages.family_tree_page']['relative_path']),
-                html.A(html.Button(children=DashIconify(icon="entypo:bar-graph", height=25, width=25,color="#000000"), className="circle-btn", id="results-link"), href=dash.page_registry['pages.run_results_page']['relative_path']), 
+                html.A(html.Button(children=DashIconify(icon="streamline:input-box-solid", height=25, width=25, color="#000000"), className="circle-btn", id="hyperparameter-link"), href=dash.page_registry['pages.hyperparameters_page']['relative_path'], id="nav-hyperparameters"),
+                html.A(html.Button(children=DashIconify(icon="jam:dna", height=25, width=25, color="#000000"), className="circle-btn", id="genepool-link"), href=dash.page_registry['pages.genepool_page']['relative_path'], id="nav-genepool"),
+                html.A(html.Button(children=DashIconify(icon="mdi:graph", height=25, width=25, color="#000000"), className="circle-btn", id="family-tree-link"), href=dash.page_registry['pages.family_tree_page']['relative_path'], id="nav-family-tree"),
+                html.A(html.Button(children=DashIconify(icon="entypo:bar-graph", height=25, width=25,color="#000000"), className="circle-btn", id="results-link"), href=dash.page_registry['pages.run_results_page']['relative_path'], id="nav-results"), 
+                html.A(html.Button(children=DashIconify(icon="mdi:compare-horizontal", height=25, width=25,color="#000000"), className="circle-btn", id="comparison-link"), href=dash.page_registry['pages.comparison_page']['relative_path']), 
             ],
             id="navlinks",
         )    
@@ -25,19 +47,80 @@ def navbar():
     id="navbar",
 )
 
+def run_select():
+    """
+    Picker of the runs the dashboard serves, hidden if it serves a single run.
+    """
+    runs = list_runs()
+    
+    return dmc.Select(
+        data=[{"value": name, "label": name} for name in runs],
+        placeholder="Select Run",
+        searchable=True,
+        id="run-select",
+        style={"display": "none"} if len(runs) < 2 else {"min-width": "260px", "margin-left": "20px"},
+    )
+
 def page():
     return html.Div([ dash.page_container], id="page-content")
 
+def run_version():
+    """
+    Components polling the version of the run data in live mode and navigating to a selected
+    run. Pages hold the 'run-name' and 'run-version' stores of the run they show.
+    """
+    return html.Div([
+        dcc.Interval(id="run-version-interval", interval=get_live_interval(), disabled=not is_live()),
+        dcc.Location(id="run-location", refresh=True),
+    ])
+
 def app_layout():
     
     return html.Div([
+        run_version(),
         navbar(), 
         page()
     ])
 
+
+### RUN SELECTION CALLBACKS
+@callback([Output(link, "href") for link in NAV_LINKS] + [Output("run-select", "value")], Input("run-name", "data"))
+def update_run_links(name):
+    """Keep the selected run in the navigation links and the run picker."""
+    run = resolve_run(name)
+    search = run_search(run)
+    
+    return [dash.page_registry[page]['relative_path'] + search for page in NAV_LINKS.values()] + [run_name(run)]
+
+@callback(Output("run-location", "href"), Input("run-select", "value"), State("run-location", "pathname"), State("run-location", "search"), prevent_initial_call=True)
+def select_run(name, pathname, search):
+    """Open the current page with the run chosen in the run picker."""
+    if not name:
+        raise PreventUpdate
+    
+    selected_search = run_search(resolve_run(name))
+    
+    if selected_search == (search or ""):
+        raise PreventUpdate
+    
+    return f"{pathname}{selected_search}"
+
+### LIVE MODE CALLBACK
+@callback(Output("run-version", "data"), Input("run-version-interval", "n_intervals"), State("run-version", "data"), State("run-name", "data"), prevent_initial_call=True)
+def update_run_version(n_intervals, version, name):
+    current = get_run_version(resolve_run(name))
+    
+    if current == version:
+        raise PreventUpdate
+    
+    return current
+
 ### DASH APP & LAYOUT 
-app = dash.Dash(__name__, use_pages=True)
+# Pages are laid out per run from the URL, so Dash doesn't build a validation layout of every page on the first request
+app = dash.Dash(__name__, use_pages=True, suppress_callback_exceptions=True)
 app.layout = app_layout
+instrument_app(app)
+install_request_profiler(app)
 
 if __name__ == "__main__":
     app.run(debug=True)
\ No newline at end of file
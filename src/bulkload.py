@@ -0,0 +1,249 @@
+import os
+import re
+import json
+from concurrent.futures import ThreadPoolExecutor
+from metrics import record_file_read
+
+##########################################################################################
+
+# MODULE BULK LOAD
+
+# The Bulk Load Module reads the individuals of a run from disk. Generation and individual
+# directories are discovered with os.scandir and the results.json/chromosome.json files are
+# read by a bounded thread pool, so on network file systems the load time scales with the
+# number of workers instead of serially with the number of files.
+# Parameters: run (str) The directory of the run results.
+
+###########################################################################################
+
+GENERATION_PATTERN = re.compile(r"^Generation_(\d+)$")
+
+# Default number of threads reading individual files (EVOVIS_LOAD_WORKERS overrides it)
+LOAD_WORKERS = 8
+
+
+### READ HELPER ###
+
+def json_to_dict(filepath):
+    """
+    Convert JSON data from a file to a Python dictionary.
+
+    Parameters:
+        filepath (str): The path to the JSON file.
+
+    Returns:
+        dict: A Python dictionary representing the JSON data.
+    """
+    with open(filepath, 'rb') as file:
+        data = file.read()
+
+    record_file_read("json", len(data))
+    return json.loads(data)
+
+def file_stamp(path):
+    """Tuple of modification time and size of a file or None if the file doesn't exist."""
+    try:
+        stat = os.stat(path)
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+def _process_results(results):
+    """Replace nested result dictionaries by the average of their numeric values."""
+    for key, val in results.items():
+        if isinstance(val, dict):
+            numeric_values = [value for value in val.values() if isinstance(value, (int, float))]
+
+            if numeric_values:
+                results[key] = sum(numeric_values) / len(numeric_values)
+
+    return results
+
+def read_individual_result(path):
+    """
+    Read and process the results.json file of an individual.
+
+    Args:
+        path (str): Path of the results.json file.
+
+    Returns:
+        dict or None: Objective measurements, {"error": message} if the file can't be decoded or None if the file doesn't exist.
+    """
+    if not os.path.isfile(path):
+        return None
+    try:
+        return _process_results(json_to_dict(path))
+    except Exception as e:
+        return {"error": str(e)}
+
+def read_individual_chromosome(path):
+    """
+    Read the chromosome.json file of an individual.
+
+    Args:
+        path (str): Path of the chromosome.json file.
+
+    Returns:
+        list or None: Genes of the individual, {"error": message} if the file can't be decoded or None if the file doesn't exist.
+    """
+    if not os.path.isfile(path):
+        return None
+    try:
+        return json_to_dict(path)
+    except Exception as e:
+        return {"error": str(e)}
+
+
+### DISCOVERY ###
+
+def get_load_workers(workers=None):
+    """Number of reader threads: the given value, EVOVIS_LOAD_WORKERS or LOAD_WORKERS."""
+    if workers is None:
+        workers = int(os.getenv("EVOVIS_LOAD_WORKERS", LOAD_WORKERS))
+    return max(1, workers)
+
+def scan_generations(run):
+    """Dictionary of generation number to generation directory path of a run."""
+    generations = {}
+
+    with os.scandir(run) as entries:
+        for entry in entries:
+            match = GENERATION_PATTERN.match(entry.name)
+            if match and entry.is_dir():
+                generations[int(match.group(1))] = entry.path
+
+    return generations
+
+def scan_generation_stamps(run):
+    """Dictionary of generation number to (generation directory path, modification time in ns) of a run."""
+    generations = {}
+
+    with os.scandir(run) as entries:
+        for entry in entries:
+            match = GENERATION_PATTERN.match(entry.name)
+            if match and entry.is_dir():
+                generations[int(match.group(1))] = (entry.path, entry.stat().st_mtime_ns)
+
+    return generations
+
+def scan_individuals(generation_path):
+    """Dictionary of individual name to individual directory path of a generation."""
+    with os.scandir(generation_path) as entries:
+        return {entry.name: entry.path for entry in entries if entry.is_dir()}
+
+
+### PARALLEL READS ###
+
+def _map(function, items, workers):
+    """Apply a function to all items, in a thread pool if more than one worker is requested."""
+    workers = get_load_workers(workers)
+
+    if workers == 1 or len(items) <= 1:
+        return list(map(function, items))
+
+    with ThreadPoolExecutor(max_workers=min(workers, len(items))) as pool:
+        return list(pool.map(function, items))
+
+def _individual_stamp(individual_path):
+    return (
+        file_stamp(os.path.join(individual_path, "results.json")),
+        file_stamp(os.path.join(individual_path, "chromosome.json")),
+    )
+
+def _individual_entry(individual_path, value=None):
+    entry = {}
+
+    if value in (None, "results"):
+        entry["results"] = read_individual_result(os.path.join(individual_path, "results.json"))
+    if value in (None, "chromosome"):
+        entry["chromosome"] = read_individual_chromosome(os.path.join(individual_path, "chromosome.json"))
+
+    return entry
+
+def stamp_individuals(individual_paths, workers=None):
+    """
+    Stat the results and chromosome files of many individuals in parallel.
+
+    Args:
+        individual_paths (list): Directories of the individuals.
+        workers (int, optional): Number of reader threads.
+
+    Returns:
+        list: (results stamp, chromosome stamp) per individual in the order of individual_paths.
+    """
+    return _map(_individual_stamp, individual_paths, workers)
+
+def read_individuals(individual_paths, value=None, workers=None):
+    """
+    Read the results and/or chromosome files of many individuals in parallel.
+
+    Args:
+        individual_paths (list): Directories of the individuals.
+        value (str, optional): "results" or "chromosome" to read only one of the files. Default reads both.
+        workers (int, optional): Number of reader threads.
+
+    Returns:
+        list: Dictionaries with the keys "results" and/or "chromosome" in the order of individual_paths.
+    """
+    return _map(lambda path: _individual_entry(path, value), individual_paths, workers)
+
+
+### BULK LOADING ###
+
+def load_generation(run, generation, value="names", workers=None):
+    """
+    Load the data of all individuals of a generation directly from disk.
+
+    Args:
+        run (str): The directory of the run results.
+        generation (int): The generation number.
+        value (str): "names", "results" or "chromosome".
+        workers (int, optional): Number of reader threads.
+
+    Returns:
+        individuals_names (list) or individual_dict (dict): Sorted names if value is "names", otherwise a dictionary
+        with sorted individual names as keys.
+
+    Raises:
+        ValueError: If value is not one of the allowed values ("names", "results", "chromosome").
+    """
+    return load_generations(run, [generation], value, workers)[generation]
+
+def load_generations(run, generations=None, value="names", workers=None):
+    """
+    Load the data of all individuals of several generations with one shared thread pool.
+
+    Args:
+        run (str): The directory of the run results.
+        generations (iterable, optional): Generation numbers. Default are all generations of the run.
+        value (str): "names", "results" or "chromosome".
+        workers (int, optional): Number of reader threads.
+
+    Returns:
+        dict: Generation number to the value load_generation returns for that generation.
+
+    Raises:
+        ValueError: If value is not one of the allowed values ("names", "results", "chromosome").
+    """
+    available_values = ["names", "results", "chromosome"]
+
+    if value not in available_values:
+        raise ValueError(f"Invalid value. Allowed values are {available_values}.")
+
+    generations = sorted(scan_generations(run)) if generations is None else list(generations)
+
+    individuals = {
+        generation: sorted(scan_individuals(os.path.join(run, f"Generation_{generation}")).items())
+        for generation in generations
+    }
+
+    if value == "names":
+        return {generation: [name for name, _ in items] for generation, items in individuals.items()}
+
+    paths = [path for items in individuals.values() for _, path in items]
+    entries = iter(read_individuals(paths, value, workers))
+
+    return {
+        generation: {name: next(entries)[value] for name, _ in items}
+        for generation, items in individuals.items()
+    }
@@ -1,7 +1,10 @@
-from dash import html
+from dash import html, dcc
 from dash_iconify import DashIconify
 import plotly.graph_objects as go
 import dash_mantine_components as dmc
+from runs import run_name
+from runstore import get_run_version
+from livewatch import is_live, start_run_watcher
 
 ### HEADING ###
 
@@ -336,6 +339,29 @@ def chromosome_sequence(chromosome, justify="flex-start", align="flex-start", co
     return dmc.Stack(chromosome_sequence, justify=justify, align=align, spacing="0px")
 
 
+### RUN DATA ###
+def run_data_stores(run):
+    """
+    Stores of the run shown by a page. Callbacks of the page read the run from 'run-name' and
+    listen to 'run-version', which is updated in live mode whenever the run changes.
+
+    Args:
+        run (str): The directory of the run results.
+
+    Returns:
+        dash_html_components.Div: Div with the 'run-name' and 'run-version' stores.
+    """
+    live = is_live()
+    
+    if live:
+        start_run_watcher(run)
+    
+    return html.Div([
+        dcc.Store(id="run-name", data=run_name(run)),
+        dcc.Store(id="run-version", data=get_run_version(run) if live else None),
+    ])
+
+
 ### NOT IN USE ###
 
 def fitness_function():
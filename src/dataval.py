@@ -1,8 +1,13 @@
 
 import os
-import re
 import json
-import pandas as pd
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from runstore import get_run_store, get_run_version, OBJECT_OVERHEAD
+from genepool import get_search_space
+from bulkload import GENERATION_PATTERN, get_load_workers
+from lineage import CrossoverReader
+from metrics import record_file_read
 
 ##########################################################################################
 
@@ -11,9 +16,23 @@ import pandas as pd
 # The Enas Data Check Module provides functionalities to the data structure of configurations and results of a given run.
 # Parameters: run (str) The identifier for the run. This is used to construct the path to the search_space.json file.
 # Returns: (str) A message suggesting improvements to the data structure if validation fails or an empty string if the data structure is valid.
+# The validation report runs the checks in parallel and caches each category until the files it checks change.
 
 ###########################################################################################
 
+# Files of the run directory that are validated
+RUN_FILES = ["config.json", "search_space.json", "crossover_parents.csv"]
+
+# Files every individual directory has to contain
+INDIVIDUAL_FILES = ["chromosome.json", "results.json"]
+
+# Categories of the validation report in the order they are checked and reported
+VALIDATION_CATEGORIES = ["hyperparameters", "search_space", "crossover_parents", "generations", "chromosomes"]
+
+# Categories that check the individual directories and depend on the run version, the others only read a run file
+RUN_DATA_CATEGORIES = {"generations", "chromosomes"}
+
+
 def json_to_dict(filepath):
     """
     Convert JSON data from a file to a Python dictionary.
@@ -33,9 +52,10 @@ def json_to_dict(filepath):
     """
     
     try:
-        with open(filepath, 'r') as file:
-            data = json.load(file)
-        return data
+        with open(filepath, 'rb') as file:
+            data = file.read()
+        record_file_read("json", len(data))
+        return json.loads(data)
     except FileNotFoundError:
         raise FileNotFoundError(f"File not found: {filepath}")
     except json.JSONDecodeError as e:
@@ -173,100 +193,364 @@ def validate_crossover_parents(run):
         return "Error crossover_parents.csv file: Config file 'crossover_parents.csv' not found."
     
     # Check if the file is a CSV file
-    try:
-        df = pd.read_csv(filepath, header=None)
-    except pd.errors.EmptyDataError:
+    if os.path.getsize(filepath) == 0:
         return "Error crossover_parents.csv file: Invalid CSV format in crossover_parents.csv."
     
+    problems = []
+    
+    # Stream the file, the parser reports the problems of each row
+    for _ in CrossoverReader(filepath, on_problem=lambda row, problem: problems.append(f"Error crossover_parents.csv file row {row}: {problem}\n")):
+        pass
+    
+    return "".join(problems)
+
+def validate_generations_of_individuals(run, scan=None):
+    """
+    Check that the run has generation directories and every individual has its chromosome.json and results.json file.
+
+    Args:
+        run (str): The directory of the run results.
+        scan (dict, optional): Result of scan_run, the run directory is scanned if not given.
+
+    Returns:
+        str: One error line per missing file, empty if the structure is complete.
+    """
+    if scan is None:
+        scan = scan_run(run)
+    
+    # Check for the presence of generation directories
+    if not scan["generations"]:
+        return "No generation directories found."
+    
+    message = ""
+    
+    # Check for the required files of every individual
+    for generation, individuals in sorted(scan["generations"].items()):
+        for individual, files in sorted(individuals.items()):
+            for file_name in INDIVIDUAL_FILES:
+                if file_name not in files:
+                    message += f"Missing file in individual {individual} of Generation_{generation}: {file_name}\n"
+
+    return message
+
+# TODO
+def validate_meas_info(run):
+    return ""
+
+def validate_individual_results(run):
+    return ""
+
+def validate_individual_chromosomes(run):
+    """
+    Check that the layer sequence of every chromosome follows the rule set of the search space.
+
+    Args:
+        run (str): The directory of the run results.
+
+    Returns:
+        str: One error line per individual with a chromosome that can't be read or contains transitions the rule set
+        doesn't allow, empty if all chromosomes conform. Problems of search_space.json itself are reported by
+        validate_search_space.
+    """
+    try:
+        report = get_chromosome_report(run)
+    except (FileNotFoundError, json.JSONDecodeError, KeyError, TypeError, ValueError):
+        return ""
+    
     message = ""
     
-    for idx, row in df.iterrows():
+    for generation, individuals in report.items():
+        for individual, problems in individuals.items():
+            reasons = " ".join(problem["reason"] for problem in problems)
+            message += f"Error chromosome.json file of individual {individual} in Generation_{generation}: {reasons}\n"
+    
+    return message
+
+
+### CHROMOSOME CONFORMANCE ###
+
+def _check_chromosomes(chromosomes, layers, matrix):
+    """
+    Check the layer transitions of chromosomes in one vectorized pass.
+
+    Every chromosome is encoded as integer tokens of its layers preceded by the 'Start' token, all chromosomes are
+    concatenated and each pair of consecutive tokens is looked up in the transition matrix.
+
+    Args:
+        chromosomes (dict): Individual name to chromosome (list of genes).
+        layers (pandas.Index): Layers of the search space in token order.
+        matrix (numpy.ndarray): Transition matrix of the search space, the last token stands for unknown layers.
+
+    Returns:
+        dict: Individual name to list of problems, individuals without problems are left out.
+    """
+    unknown = len(layers)
+    report = {}
+    names = []
+    lengths = []
+    sequence = []
+    
+    for individual, chromosome in chromosomes.items():
+        try:
+            genes = [gene["layer"] for gene in chromosome] if isinstance(chromosome, list) else None
+        except (TypeError, KeyError):
+            genes = None
         
-        # Check if all columns are present
-        if len(row) < 4:
-            message += f"Error crossover_parents.csv file row {idx+1}: Not all columns are present.\n"
+        if genes is None:
+            report[individual] = [{"position": None, "previous": None, "layer": None, "reason": "Chromosome is missing or not a list of genes with a 'layer'."}]
             continue
-
-        # Extracting values from each row
-        if "Generation: " in row[0]:
-            generation = row[0].split(",")[0].replace("Generation: ", "")
-                
-            if not generation.isdigit():
-                message += f"Error crossover_parents.csv file row {idx+1}: Generation should be a number.\n"
-        else:
-            message += f"Error crossover_parents.csv file row {idx+1}: 'Generation' label not found.\n"
         
-        if "Parent_1: " in row[1]:
-            parent1 = row[1].split(",")[0].replace("Parent_1: (", "").strip()
-            parent1_value = row[1].split(",")[1].replace(")", "").strip()
-                
-            if not parent1:
-                message += f"Error crossover_parents.csv file row {idx+1}: Parent 1 is missing.\n"
-                    
-            if not parent1_value.isdigit():
-                message += f"Error crossover_parents.csv file row {idx+1}: Parent 1 crossover value should be a number.\n"
-        else:
-            message += f"Error crossover_parents.csv file row {idx+1}: 'Parent_1' label not found.\n"
-
-        if "Parent_2: " in row[2]:
-            parent2 = row[2].split(",")[0].replace("Parent_2: (", "").strip()
-            parent2_value = row[2].split(",")[1].replace(")", "").strip()
-                
-            if not parent2:
-                message += f"Error crossover_parents.csv file row {idx+1}: Parent 2 is missing.\n"
-                    
-            if not parent2_value.isdigit():
-                message += f"Error crossover_parents.csv file row {idx+1}: Parent 2 crossover value should be a number.\n"    
+        names.append(individual)
+        lengths.append(len(genes) + 1)
+        sequence.append("Start")
+        sequence.extend(genes)
+    
+    if not names:
+        return report
+    
+    tokens = layers.get_indexer(sequence)
+    tokens[tokens < 0] = unknown
+    
+    lengths = np.array(lengths)
+    starts = np.cumsum(lengths) - lengths
+    
+    # Transitions from the last gene of a chromosome to the next 'Start' and from unknown layers are not checked
+    allowed = matrix[tokens[:-1], tokens[1:]].astype(bool)
+    allowed[starts[1:] - 1] = True
+    allowed |= tokens[:-1] == unknown
+    
+    offending = np.flatnonzero(~allowed)
+    owners = np.searchsorted(starts, offending, side="right") - 1
+    
+    for idx, owner in zip(offending.tolist(), owners.tolist()):
+        previous, layer = sequence[idx], sequence[idx + 1]
+        position = idx - starts[owner]
+        
+        if tokens[idx + 1] == unknown:
+            reason = f"Layer '{layer}' at position {position} is not part of the search space."
         else:
-            message += f"Error crossover_parents.csv file row {idx+1}: 'Parent_2' label not found.\n"
+            reason = f"Transition '{previous}' -> '{layer}' at position {position} is not allowed by the rule set."
+        
+        report.setdefault(names[owner], []).append({"position": int(position), "previous": previous, "layer": layer, "reason": reason})
+    
+    return report
 
-        if "New_Individual: " in row[3]:
-            new_individual = row[3].replace("New_Individual: ", "").strip()
-                
-            if not new_individual:
-                message += f"Error crossover_parents.csv file row {idx+1}: New Individual is missing.\n"
-        else:
-            message += f"Error crossover_parents.csv file row {idx+1}: 'New_Individual' label not found.\n"
+def get_chromosome_report(run, workers=None):
+    """
+    Check the chromosomes of all individuals of a run against the rule set, one generation per thread.
 
-    return message
+    Args:
+        run (str): The directory of the run results.
+        workers (int, optional): Number of threads, default is the number of reader threads of the bulk load.
+
+    Returns:
+        dict: Generation number to dictionary of individual name to list of problems. A problem is a dictionary with
+        the keys "position" (index of the offending gene), "previous" and "layer" (layers of the transition) and
+        "reason". Generations and individuals without problems are left out.
 
-def validate_generations_of_individuals(run):
+    Raises:
+        FileNotFoundError: If search_space.json is not found.
+
+    Example:
+        >>> get_chromosome_report('my_run')
+        {3: {'notorious_wren': [{'position': 4, 'previous': 'GAP_2D', 'layer': 'C_2D', 'reason': "Transition 'GAP_2D' -> 'C_2D' at position 4 is not allowed by the rule set."}]}}
+    """
+    store = get_run_store(run)
+    search_space = get_search_space(run)
     
-    # Check for the presence of generation directories
-    generation_directories = [d for d in os.listdir(run) if re.match(r"^Generation_\d+$", d)]
+    def build():
+        import pandas as pd
+        
+        layers = pd.Index(search_space.layers)
+        matrix = search_space.transition_matrix()
+        generations = store.generations()
+        
+        # The store is locked while building, so the chromosomes are taken out before the threads start
+        chromosomes = [store.generation_values(generation, "chromosome") for generation in generations]
+        
+        with ThreadPoolExecutor(max_workers=get_load_workers(workers)) as pool:
+            reports = pool.map(lambda generation_chromosomes: _check_chromosomes(generation_chromosomes, layers, matrix), chromosomes)
+            
+            return {generation: report for generation, report in zip(generations, reports) if report}
     
-    if not generation_directories:
-        return "No generation directories found."
+    return store.derived("chromosome_report", build, key=search_space.stamp)
 
-    # Check for individual directories and their required files
-    for generation_directory in generation_directories:
-        generation_dir_path = os.path.join(run, generation_directory)
-        generation_contents = os.listdir(generation_dir_path)
+
+### VALIDATION REPORT ###
+
+def scan_run(run, workers=None):
+    """
+    Walk the run directory once with os.scandir, the generation directories in parallel.
+
+    Args:
+        run (str): The directory of the run results.
+        workers (int, optional): Number of threads, default is the number of reader threads of the bulk load.
+
+    Returns:
+        dict: "files" (set of file names in the run directory) and "generations" (generation number to dictionary of
+        individual name to set of file names in the individual directory).
+    """
+    files = set()
+    generation_paths = {}
+    
+    with os.scandir(run) as entries:
+        for entry in entries:
+            match = GENERATION_PATTERN.match(entry.name)
+            if match and entry.is_dir():
+                generation_paths[int(match.group(1))] = entry.path
+            elif entry.is_file():
+                files.add(entry.name)
+    
+    def scan_generation(generation_path):
+        individuals = {}
         
-        for item in generation_contents:
-            individual_directory = os.path.join(generation_dir_path, item)
-            
-            # Skip non-directory items
-            if not os.path.isdir(individual_directory):
-                continue 
+        with os.scandir(generation_path) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    with os.scandir(entry.path) as individual_entries:
+                        individuals[entry.name] = {individual_entry.name for individual_entry in individual_entries}
+        
+        return individuals
+    
+    with ThreadPoolExecutor(max_workers=get_load_workers(workers)) as pool:
+        scans = pool.map(scan_generation, generation_paths.values())
+        generations = dict(zip(generation_paths, scans))
+    
+    return {"files": files, "generations": generations}
+
+def run_fingerprint(run):
+    """
+    Cheap fingerprint of the run directory from the stamps of its validated files and generation directories.
+
+    Adding or removing individuals changes the modification time of their generation directory. Changes of the files
+    within individual directories are covered by the run version of the run store.
+
+    Args:
+        run (str): The directory of the run results.
+
+    Returns:
+        tuple: Sorted tuples of name, modification time and size, None if the run directory doesn't exist.
+    """
+    try:
+        with os.scandir(run) as entries:
+            stamps = []
             
-            # Check for required files for individuals
-            individual_files = ["chromosome.json", "results.json"]
+            for entry in entries:
+                if entry.name in RUN_FILES or GENERATION_PATTERN.match(entry.name):
+                    stat = entry.stat()
+                    stamps.append((entry.name, stat.st_mtime_ns, stat.st_size))
             
-            for file_name in individual_files:
-                file_path = os.path.join(individual_directory, file_name)
-                
-                if not os.path.exists(file_path):
-                    return f"Missing file in individual {item}: {file_name}"
+            return tuple(sorted(stamps))
+    except (FileNotFoundError, NotADirectoryError):
+        return None
 
-    return ""
+def _split_message(message):
+    return [line for line in message.split("\n") if line.strip()]
 
-# TODO
-def validate_meas_info(run):
-    return ""
+def _check_category(run, category, workers=None):
+    if not os.path.isdir(run):
+        return [f"Run directory not found: {run}"] if category == "generations" else []
+    
+    validators = {
+        "hyperparameters": validate_hyperparameters,
+        "search_space": validate_search_space,
+        "crossover_parents": validate_crossover_parents,
+        "generations": lambda run: validate_generations_of_individuals(run, scan_run(run, workers)),
+        "chromosomes": validate_individual_chromosomes,
+    }
+    
+    return _split_message(validators[category](run))
 
-def validate_individual_results(run):
-    return ""
+def _problems_bytes(problems):
+    """Estimated memory of the problems of a category."""
+    return sum(len(line) for line in problems) * OBJECT_OVERHEAD
 
-def validate_individual_chromosomes(run):
-    return ""
\ No newline at end of file
+def get_validation_problems(run, category, workers=None, fingerprint=None, version=None):
+    """
+    Validate one category of a run, the problems are reused until the files the category checks change.
+
+    The problems are cached per category and keyed by the fingerprint of the run directory. The categories in
+    RUN_DATA_CATEGORIES check the files of the individuals and are also keyed by the run version, the other
+    categories only read their run file and don't load the run.
+
+    Args:
+        run (str): The directory of the run results.
+        category (str): Category of VALIDATION_CATEGORIES.
+        workers (int, optional): Number of threads of the directory walk.
+        fingerprint (tuple, optional): Result of run_fingerprint, computed if not given.
+        version (int, optional): Run version of the categories in RUN_DATA_CATEGORIES, looked up if not given.
+
+    Returns:
+        list: The error lines of the category.
+    """
+    if fingerprint is None:
+        fingerprint = run_fingerprint(run)
+    
+    key = fingerprint
+    if category in RUN_DATA_CATEGORIES:
+        if version is None:
+            try:
+                version = get_run_version(run)
+            except FileNotFoundError:
+                version = None
+        key = (fingerprint, version)
+    
+    return get_run_store(run).cached(
+        f"validation/{category}",
+        key,
+        lambda: _check_category(run, category, workers),
+        _problems_bytes,
+    )
+
+def get_validation_report(run, workers=None):
+    """
+    Validate all data of a run, the report is reused until the run changes.
+
+    The categories are checked in parallel and each of them is cached on its own by get_validation_problems, so
+    repeated page visits don't read the files of the run again. The report is kept with the run store and dropped
+    along with it.
+
+    Args:
+        run (str): The directory of the run results.
+        workers (int, optional): Number of threads of the directory walk.
+
+    Returns:
+        dict: "problems" (category to list of error lines), "counts" (category to number of problems) and "total".
+        The categories are listed in VALIDATION_CATEGORIES.
+
+    Example:
+        >>> report = get_validation_report('my_run')
+        >>> report["counts"]
+        {'hyperparameters': 0, 'search_space': 0, 'crossover_parents': 0, 'generations': 2, 'chromosomes': 20}
+    """
+    fingerprint = run_fingerprint(run)
+    
+    try:
+        version = get_run_version(run)
+    except FileNotFoundError:
+        version = None
+    
+    with ThreadPoolExecutor(max_workers=len(VALIDATION_CATEGORIES)) as pool:
+        problems = pool.map(lambda category: get_validation_problems(run, category, workers, fingerprint, version), VALIDATION_CATEGORIES)
+        problems = dict(zip(VALIDATION_CATEGORIES, problems))
+    
+    counts = {category: len(lines) for category, lines in problems.items()}
+    return {"problems": problems, "counts": counts, "total": sum(counts.values())}
+
+def validation_message(run, categories):
+    """
+    Error lines of a run in the given categories of the validation report.
+
+    Args:
+        run (str): The directory of the run results.
+        categories (list): Categories of VALIDATION_CATEGORIES.
+
+    Returns:
+        str: The error lines separated by newlines, empty if there are no problems in these categories.
+
+    Example:
+        >>> validation_message('my_run', ["generations", "crossover_parents"])
+        ''
+    """
+    fingerprint = run_fingerprint(run)
+    return "\n".join(line for category in categories for line in get_validation_problems(run, category, fingerprint=fingerprint))
@@ -1,46 +1,22 @@
-import pandas as pd
 import numpy as np
 import os
 import random
-from matplotlib.colors import hex2color, rgb2hex
-import json
-
-### READ HELPER ###
-
-def _json_to_dict(filepath):
-    """
-    Convert JSON data from a file to a Python dictionary.
-
-    Parameters:
-        filepath (str): The path to the JSON file.
-
-    Returns:
-        dict: A Python dictionary representing the JSON data.
-
-    Raises:
-        FileNotFoundError: If the specified file is not found.
-        json.JSONDecodeError: If there is an issue decoding the JSON data.
-
-    Example:
-    >>> data = _json_to_dict('example.json')
-    """
-    try:
-        with open(filepath, 'r') as file:
-            data = json.load(file)
-        return data
-    except FileNotFoundError:
-        raise FileNotFoundError(f"File not found: {filepath}")
-    except json.JSONDecodeError as e:
-        raise json.JSONDecodeError(f"Error decoding JSON data in file {filepath}: {e}")
+from collections import deque
+from runstore import get_run_store
+from lineage import get_lineage_index
+from metrics import timed
 
+# Default maximum number of individuals in a family tree
+FAMILY_TREE_MAX_NODES = 2000
 
 ### RUN INFORMATION ###
 
 def _get_configurations(run):
     """dict of configuration of EvoNAS run"""
-    return _json_to_dict(f'{run}/config.json')
+    return get_run_store(run).config()
 
 # TODO Include default values
+@timed
 def get_hyperparameters(run):
     """Dict of hyperparameters of EvoNAS run"""
     
@@ -48,6 +24,7 @@ def get_hyperparameters(run):
     return configs["hyperparameters"]
 
 # TODO Include default values!!!
+@timed
 def get_meas_info(run):
     """Dict of meas info of EvoNAS run"""
     
@@ -57,6 +34,7 @@ def get_meas_info(run):
 
 ### NAMES OF DIRECTORIES ###
 
+@timed
 def get_generations(run, as_int=False):
     """
     Get a list of all generation names (directories) in the specified run.
@@ -88,20 +66,16 @@ def get_generations(run, as_int=False):
     if not isinstance(as_int, bool):
         raise ValueError("'as_int' must be a boolean.")
 
-    # Retrieve generation names and numbers
-    generation_path = run
-    items = os.listdir(generation_path)
-    generations = [item for item in items if os.path.isdir(os.path.join(generation_path, item))]
-    generations_int = [int(gen.split("_")[1]) for gen in generations]
-
-    generations_int.sort()
+    # Retrieve generation numbers
+    store = get_run_store(run)
+    generations_int = store.generations()
     
     # Check last generation finished processed
     take_last_gen = True
-    results_last_gen = _get_individuals_of_generation(run, generations_int[-1], "results")
+    results_last_gen = store.generation_values(generations_int[-1], "results") if generations_int else {}
     
     for result in results_last_gen.values():
-        if result.get("fitness", None) is None:
+        if result is None or result.get("fitness", None) is None:
             take_last_gen = False
             
     if not take_last_gen:
@@ -115,6 +89,7 @@ def get_generations(run, as_int=False):
 
 ### SINGLE INDIVIDUAL INFORMATION ###
 
+@timed
 def get_individual_result(run, generation, individual):
     """
     Retrieve individual's objective measurements from a JSON file.
@@ -132,35 +107,9 @@ def get_individual_result(run, generation, individual):
         Exception: If an error occurs during the processing of the JSON file.
 
     """
-    # Construct the file path
-    path = f'{run}/Generation_{generation}/{individual}/results.json'
-
-    # Check if the file exists
-    if os.path.isfile(path):
-        try:
-            # Load JSON data from file
-            results = _json_to_dict(path)
-
-            # Process nested dictionaries
-            for key, val in results.items():
-                if isinstance(val, dict):
-                    numeric_values = [value for value in val.values() if isinstance(value, (int, float))]
-
-                    if numeric_values:
-                        # Calculate the average of numeric values
-                        val = sum(numeric_values) / len(numeric_values)
-                        results[key] = val
-
-            return results
-
-        except Exception as e:
-            
-            return {"error": str(e)}
-
-    else:
-        # File not found, return None
-        return None
+    return get_run_store(run).individual(generation, individual, "results")
     
+@timed
 def get_individual_chromosome(run, generation, individual):
     """
     Retrieve individual's genes/layers from a JSON file representing the chromosome.
@@ -178,23 +127,7 @@ def get_individual_chromosome(run, generation, individual):
         Exception: If an error occurs during the processing of the JSON file.
 
     """
-    # Construct the file path
-    path = f'{run}/Generation_{generation}/{individual}/chromosome.json'
-
-    # Check if the file exists
-    if os.path.isfile(path):
-        try:
-            # Load JSON data from file
-            chromosome = _json_to_dict(path)
-            return chromosome
-
-        except Exception as e:
-            return {"error": str(e)}
-
-    else:
-        # File not found, return None
-        return None
-
+    return get_run_store(run).individual(generation, individual, "chromosome")
     
 ### INDIVIDUALS INFORMATION ###
 
@@ -224,27 +157,16 @@ def _get_individuals_of_generation(run, generation, value="names"):
     if value not in available_values:
         raise ValueError(f"Invalid value. Allowed values are {available_values}.")
 
-    # Access individuals names
-    items = os.listdir(f"{run}/Generation_{generation}")
-    individuals_names = [item for item in items if os.path.isdir(os.path.join(f"{run}/Generation_{generation}", item))]
+    store = get_run_store(run)
 
+    # Access individuals names
     if value == "names":
-        individuals_names.sort()
-        return individuals_names
+        return store.individuals(generation)
     
     # Access individuals data
-    individual_dict = {}
-
-    for individual in individuals_names:
-
-        if value == "results":
-            individual_dict[individual] = get_individual_result(run, generation, individual)
-        
-        elif value == "chromosome":
-            individual_dict[individual] = get_individual_chromosome(run, generation, individual)
-    
-    return individual_dict
+    return store.generation_values(generation, value)
 
+@timed
 def get_individuals(run, generation_range=None, value="names", as_generation_dict=False):
     """
     Get data from the individuals of a generation range or all the generations. 
@@ -344,6 +266,7 @@ def _get_minmax_result_by_key(results, key, min_boundary=None, max_boundary=None
             
     return min_val, max_val
 
+@timed
 def get_individuals_min_max(run, generation_range=None):
     """
     Get the minimum and maximum values for various measurements across generations and individuals.
@@ -389,6 +312,7 @@ def get_individuals_min_max(run, generation_range=None):
 
     return measurements
   
+@timed
 def get_healthy_individuals_results(run, generation_range=None, as_generation_dict=False): 
     
     gen_results = get_individuals(run, generation_range, value="results", as_generation_dict=True)   
@@ -427,6 +351,7 @@ def get_healthy_individuals_results(run, generation_range=None, as_generation_di
             
         return healthy_list, unhealthy_list
    
+@timed
 def get_best_individuals(run):
     """Get the individuals with the highest fitness value per generation.
 
@@ -472,6 +397,81 @@ def get_best_individuals(run):
 
 ### GENES ###
 
+def _build_gene_usage_matrix(run):
+    """Count the genes of every layer identifier per generation in one scan of all chromosomes."""
+    generations = get_generations(run, as_int=True)
+    store = get_run_store(run)
+
+    layer_index = {}
+    rows = []
+
+    for generation in generations:
+        row = {}
+        for chromosome in store.generation_values(generation, "chromosome").values():
+            if isinstance(chromosome, list):
+                for gene in chromosome:
+                    layer = gene["layer"]
+                    row[layer] = row.get(layer, 0) + 1
+                    layer_index.setdefault(layer, len(layer_index))
+        rows.append(row)
+
+    matrix = np.zeros((len(generations), len(layer_index)), dtype=np.int64)
+
+    for gen_idx, row in enumerate(rows):
+        for layer, count in row.items():
+            matrix[gen_idx, layer_index[layer]] = count
+
+    return {
+        "matrix": matrix,
+        "generations": generations,
+        "generation_index": {generation: idx for idx, generation in enumerate(generations)},
+        "layers": list(layer_index),
+        "layer_index": layer_index,
+    }
+
+@timed
+def get_gene_usage_matrix(run):
+    """
+    Get the number of genes per generation and layer identifier, computed once per run version.
+    
+    Args:
+        run (str): The directory name of the run data.
+        
+    Returns:
+        matrix (numpy.ndarray): Integer array of shape (generations, layers) with the gene counts.
+        generations (list): Generation number of each row.
+        layers (list): Layer identifier of each column.
+        
+    Example:
+        >>> matrix, generations, layers = get_gene_usage_matrix('my_run')
+        >>> matrix[generations.index(2), layers.index('C_2D')]
+        31
+    """
+    usage = get_run_store(run).derived("gene_usage", lambda: _build_gene_usage_matrix(run))
+    return usage["matrix"], usage["generations"], usage["layers"]
+
+@timed
+def get_gene_usage(run, genename):
+    """
+    Get the number of genes of a layer identifier in every generation.
+    
+    Args:
+        run (str): The directory name of the run data.
+        genename (str): The "layer" identifier of the a gene. 
+        
+    Returns:
+        generations (list): Generation numbers.
+        counts (numpy.ndarray): Number of genes per generation.
+    """
+    usage = get_run_store(run).derived("gene_usage", lambda: _build_gene_usage_matrix(run))
+    layer_idx = usage["layer_index"].get(genename)
+    
+    if layer_idx is None:
+        return usage["generations"], np.zeros(len(usage["generations"]), dtype=np.int64)
+    
+    return usage["generations"], usage["matrix"][:, layer_idx]
+
+@timed
 def get_number_of_genes(run, generation, genename):
     """
     Get the number of genes in a certain generation.
@@ -483,48 +483,34 @@ def get_number_of_genes(run, generation, genename):
         
     Returns:
         count (int): Number of genes
+        
+    Raises:
+        ValueError: If the generation isn't a processed generation of the run.
     """
-    chromosomes = get_individuals(run, range(generation, generation+1), value="chromosome", as_generation_dict=False)
-
-    count = 0
-    for chromosome in chromosomes:
-        if chromosome is not None:
-            for gene in chromosome:
-
-                if gene["layer"] == genename:
-                    count += 1
+    usage = get_run_store(run).derived("gene_usage", lambda: _build_gene_usage_matrix(run))
+    
+    gen_idx = usage["generation_index"].get(generation)
+    layer_idx = usage["layer_index"].get(genename)
+    
+    if gen_idx is None:
+        raise ValueError(f"Invalid generation. Available generations are {usage['generations']}.")
+    
+    if layer_idx is None:
+        return 0
 
-    return count
+    return int(usage["matrix"][gen_idx, layer_idx])
 
 
 ### FAMILY TREE 
 
 def _get_crossover_parents(run):
-    """Dicitionnairy with key individual and values of parents of individuals with values=["Generation", "New Individual", "Parent 1", "Crossover 1", "Parent 2", "Crossover 2"]"""
-
-    df = pd.read_csv(f'{run}/crossover_parents.csv', header=None)
-    df = df.rename(columns={0:"Generation", 1:"Parent 1", 2:"Parent 2", 3:"New Individual"})
-    df = df.reindex(columns=["Generation", "New Individual", "Parent 1", "Crossover 1", "Parent 2", "Crossover 2"])
+    """Dicitionnairy with key individual and values of parents of individuals with values=["generation", "parent1", "crossover1", "parent2", "crossover2"]"""
 
     crossover_dict = {}
 
-    for idx, row in df.iterrows():
-        individual = row["New Individual"].replace("New_Individual: ", "")
-
-        generation = int(row["Generation"].replace("Generation: ", ""))
-        parent1 = row["Parent 1"].replace("Parent_1: ", "").replace("(", "").replace(")", "")
-        parent2 = row["Parent 2"].replace("Parent_2: ", "").replace("(", "").replace(")", "")
-
-        parent1, crossover1 = parent1.split(",")[0], parent1.split(",")[1]
-        parent2, crossover2 = parent2.split(",")[0], parent2.split(",")[1]
-
-        crossover_dict[individual] = {
-            "generation": generation,
-            "parent1": parent1,
-            "crossover1": crossover1, 
-            "parent2": parent2,
-            "crossover2": crossover2, 
-        }
+    for record in get_lineage_index(run).records():
+        individual = record.pop("individual")
+        crossover_dict[individual] = record
 
     return crossover_dict
 
@@ -538,153 +524,107 @@ def _get_crossover_parents_df(run):
     Returns:
         df (pandas.DataFrame): Dataframe with columns ["generation", "individual", "parent1", "crossover1", "parent2", "crossover2"]
     """
+    import pandas as pd
+    
+    columns = ["generation", "individual", "parent1", "crossover1", "parent2", "crossover2"]
+    return pd.DataFrame(get_lineage_index(run).records(), columns=columns)
 
-    df = pd.read_csv(f'{run}/crossover_parents.csv', header=None)
-    df = df.rename(columns={0:"generation", 1:"parent1", 2:"parent2", 3:"individual"})
-    df = df.reindex(columns=["generation", "individual", "parent1", "crossover1", "parent2", "crossover2"])
-
-    df["generation"] = df["generation"].str.replace("Generation: ", "")
-    df["parent1"] = df["parent1"].str.replace("Parent_1: ", "")
-    df["parent2"] = df["parent2"].str.replace("Parent_2: ", "")
-    df["individual"] = df["individual"].str.replace("New_Individual: ", "")
-
-    df["generation"] = df["generation"].astype('int64')
-
-    for idx, row in df.iterrows():
-       
-        p1 = row["parent1"].replace("(", "").replace(")", "")
-        p2 = row["parent2"].replace("(", "").replace(")", "")
-
-        df.loc[idx, "parent1"] = p1.split(",")[0]
-        df.loc[idx, "crossover1"] = p1.split(",")[1]
-        df.loc[idx, "parent2"] = p2.split(",")[0]
-        df.loc[idx, "crossover2"] = p2.split(",")[1]
+def _family_tree_node(individual, generation, extinct):
+    """Cytoscape node element of an individual in the family tree."""
+    return {'data': {'id': individual, 'label': individual[0:3], 'generation': generation, 'extinct': extinct}}
 
-    return df 
+def _family_tree_edge(parent, child, crossover):
+    """Cytoscape edge element from a parent to a child in the family tree."""
+    return {'data': {'source': parent, 'target': child, 'edgelabel': crossover}}
 
-def _get_upstream_tree(run, generation, individual, generation_range):
+@timed
+def get_family_tree(run, generation, individual, generation_range=None, max_nodes=None):
     """
-    Helper funnction for family tree: Create upstream famliy tree with nodes, edges and root elements starting from selected individual.
+    Create famliy tree with nodes, edges and roots elements starting from selected individual.
+    
+    The tree is built by one breadth-first search upwards to the ancestors and downwards to the
+    descendants of the individual, ordered by their distance to the individual. Every
+    individual and every edge is visited once, so the time is linear in the size of the tree
+    within the generation range.
     
     Args:
         run (str): The directory name of the run data.
         generation (int): Generation of individual
         individual (str): Individual from where family tree evolves from. 
         generation_range (range): A python range of generations from which the individuals will be extracted. 
+        max_nodes (int, optional): Maximum number of nodes, the ancestors and descendants nearest to the selected individual are kept, ancestors first at equal distance. Default is EVOVIS_FAMILY_TREE_MAX_NODES or FAMILY_TREE_MAX_NODES.
         
     Returns:
-        elements (list): List of nodes and edges for element param in cytoscape.
+        elements (list): list of nodes and edges for element param in cytoscape.
         root (list): List of roots nodes to create right tree structure.
+        truncated (bool): True if individuals were left out because of max_nodes.
     """
-    
-    min_generation = generation_range[0]
-
-    # End condition with only one individual
-    if min_generation == generation:
-        return ([{'data': {'id': individual, 'label': individual[0:3], 'generation': generation, 'extinct': False}}], [individual])
-
-    # Nodes and edges for individual
-    crossovers = _get_crossover_parents(run)
-    
-    parent1 = crossovers[individual]["parent1"]
-    crossover1 = crossovers[individual]["crossover1"]
-    
-    parent2 = crossovers[individual]["parent2"]
-    crossover2 = crossovers[individual]["crossover2"]
-
-    individual_el = [
-        {'data': {'id': individual, 'label': individual[0:3], 'generation': generation, 'extinct': False}},
-        {'data': {'source': parent1, 'target': individual, 'edgelabel': crossover1}},
-        {'data': {'source': parent2, 'target': individual, 'edgelabel': crossover2}}
-    ]
 
-    # Recursion for moving up the tree
-    parent1_tree, roots1 = _get_upstream_tree(run, generation-1, parent1, generation_range)
-    parent2_tree, roots2 = _get_upstream_tree(run, generation-1, parent2, generation_range)
-
-    return (parent1_tree + individual_el + parent2_tree, roots1 + roots2)
-
-def _get_downstream_tree(run, generation, individual, generation_range):
-    """
-    Helper funnction for family tree: Create upstream famliy tree with nodes and edges starting from selected individual.
-    
-    Args:
-        run (str): The directory name of the run data.
-        generation (int): Generation of individual
-        individual (str): Individual from where family tree evolves from. 
-        generation_range (range): A python range of generations from which the individuals will be extracted. 
+    # Set default value
+    if generation_range is None:
+        generation_range = range(generation-2, generation+1)
         
-    Returns:
-        elements (list): list of nodes and edges for element param in cytoscape.
-    """
+    if max_nodes is None:
+        max_nodes = int(os.getenv("EVOVIS_FAMILY_TREE_MAX_NODES", FAMILY_TREE_MAX_NODES))
 
+    lineage = get_lineage_index(run)
+    min_generation = generation_range[0]
     max_generation = generation_range[-1]
-    
-    # Get children of individual
-    crossovers = _get_crossover_parents_df(run)
-    children = list(crossovers[crossovers['parent1'].str.contains(individual)]["individual"].values)
-    crossover = list(crossovers[crossovers['parent1'].str.contains(individual)]["crossover1"].values)
-    
-    children += list(crossovers[crossovers['parent2'].str.contains(individual)]["individual"].values)
-    crossover += list(crossovers[crossovers['parent2'].str.contains(individual)]["crossover2"].values)
-    
-    extinct = False if children else True
 
-    # End condition with only one individual
-    if max_generation == generation:
-        return [{'data': {'id': individual, 'label': individual[0:3], 'generation': generation, 'extinct': extinct}}]
+    # Ordered node, edge and root sets
+    nodes = {individual: _family_tree_node(individual, generation, not lineage.get_children(individual))}
+    edges = {}
+    roots = {}
+    truncated = False
 
-    # Nodes and edges for individual
-    individual_el = [{'data': {'id': individual, 'label': individual[0:3], 'generation': generation, 'extinct': extinct}}]
+    # Ancestors are followed upwards (step -1) and descendants downwards (step 1) in one queue, so
+    # nodes are added in the order of their distance to the individual, ancestors first at equal distance
+    queue = deque([(individual, generation, -1), (individual, generation, 1)])
+    upstream = {individual}
 
-    for idx, child in enumerate(children):
-        individual_el.append({'data': {'source': individual, 'target': child, 'edgelabel': crossover[idx]}})
+    while queue:
+        ind, gen, step = queue.popleft()
 
-    # Recursion for moving down the tree
-    children_tree = []
+        if step > 0:
+            if gen >= max_generation:
+                continue
 
-    for child in children: 
-        children_tree += _get_downstream_tree(run, generation+1, child, generation_range)
+            for child, crossover in lineage.get_children(ind):
+                if child not in nodes:
+                    if len(nodes) >= max_nodes:
+                        truncated = True
+                        continue
+                    nodes[child] = _family_tree_node(child, gen+1, not lineage.get_children(child))
+                    queue.append((child, gen+1, 1))
 
-    return children_tree + individual_el
+                edges[(ind, child, crossover)] = _family_tree_edge(ind, child, crossover)
 
-def get_family_tree(run, generation, individual, generation_range=None):
-    """
-    Create famliy tree with nodes, edges and roots elements starting from selected individual.
-    
-    Args:
-        run (str): The directory name of the run data.
-        generation (int): Generation of individual
-        individual (str): Individual from where family tree evolves from. 
-        generation_range (range): A python range of generations from which the individuals will be extracted. 
-        
-    Returns:
-        elements (list): list of nodes and edges for element param in cytoscape.
-        root (list): List of roots nodes to create right tree structure.
-    """
+            continue
 
-    # Set default value
-    if generation_range is None:
-        generation_range = range(generation-2, generation+1)
+        has_parent = False
 
-    # Get the entire tree without duplicates
-    upstream_tree, roots = _get_upstream_tree(run, generation, individual, generation_range)
-    downstream_tree = _get_downstream_tree(run, generation, individual, generation_range)
+        if gen > min_generation:
+            for parent, crossover in lineage.get_parents(ind):
+                if parent not in upstream:
+                    if parent not in nodes and len(nodes) >= max_nodes:
+                        truncated = True
+                        continue
+                    upstream.add(parent)
+                    nodes.setdefault(parent, _family_tree_node(parent, gen-1, False))
+                    queue.append((parent, gen-1, -1))
 
-    family_tree = []
-    unique_roots = []
+                edges[(parent, ind, crossover)] = _family_tree_edge(parent, ind, crossover)
+                has_parent = True
 
-    for el in downstream_tree + upstream_tree:
-        if el not in family_tree: family_tree.append(el)
+        if not has_parent:
+            roots[ind] = None
 
-    for el in roots:
-        if el not in unique_roots: unique_roots.append(el)
-    
-    return (family_tree, unique_roots)
+    return (list(nodes.values()) + list(edges.values()), list(roots), truncated)
 
 
 ### OTHER HELPER FUNCTIONS 
 
+@timed
 def get_random_individual(run, generation=None):
     """Get the first sorted individual from a random generation of specified run."""
     if generation is None:
@@ -0,0 +1,177 @@
+import os
+import json
+import threading
+import functools
+from collections import OrderedDict
+from plotly.io.json import to_json_plotly
+from runstore import get_run_version
+from metrics import Gauge, register, record_cache
+
+try:
+    # Optional, plotly serializes with orjson too when it is installed
+    from orjson import loads as json_loads
+except ImportError:
+    json_loads = json.loads
+
+##########################################################################################
+
+# MODULE FIGURE CACHE
+
+# The Figure Cache Module memoizes Plotly figures and Dash components built from run data.
+# Entries are keyed by the building function, its arguments and the version of the run, so
+# they are reused until files of the run change. A value is serialized to JSON once when it
+# is built and the JSON is cached, every caller gets its own decoded copy of plain lists and
+# dictionaries, which Dash serializes without walking component objects again. The least
+# recently used entries are evicted when the size of all entries exceeds the memory budget.
+# Parameters: run (str) The directory of the run results.
+
+###########################################################################################
+
+# Default memory budget in megabytes (EVOVIS_FIGURE_CACHE_MB overrides it, 0 disables caching)
+FIGURE_CACHE_MB = 64
+
+
+### FIGURE CACHE ###
+
+class FigureCache:
+    """
+    Least recently used cache of serialized values with a budget on their total size.
+
+    Attributes:
+        budget (int): Maximum total size of the cached values in bytes.
+        size (int): Current total size of the cached values in bytes.
+        hits (int): Number of lookups that found a value.
+        misses (int): Number of lookups that didn't find a value.
+    """
+
+    def __init__(self, budget=None):
+        """
+        Args:
+            budget (int, optional): Memory budget in bytes. Default is EVOVIS_FIGURE_CACHE_MB or FIGURE_CACHE_MB megabytes.
+        """
+        if budget is None:
+            budget = int(float(os.getenv("EVOVIS_FIGURE_CACHE_MB", FIGURE_CACHE_MB)) * 1024 * 1024)
+
+        self.budget = budget
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """Tuple of (found, value), a found entry becomes the most recently used."""
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                record_cache("figure", False)
+                return False, None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            record_cache("figure", True)
+            return True, self._entries[key][0]
+
+    def put(self, key, value):
+        """
+        Store a value and evict the least recently used entries exceeding the budget.
+
+        Args:
+            key (hashable): Key of the value.
+            value (str): JSON serialization of the value, e.g. of a figure dictionary or a Dash component.
+
+        Returns:
+            bool: True if the value was stored, values larger than the budget are not.
+        """
+        size = len(value)
+
+        with self._lock:
+            if key in self._entries:
+                self.size -= self._entries.pop(key)[1]
+
+            if size > self.budget:
+                return False
+
+            self._entries[key] = (value, size)
+            self.size += size
+
+            while self.size > self.budget:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.size -= evicted_size
+
+            return True
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+
+_figure_cache = None
+_figure_cache_lock = threading.Lock()
+
+def get_figure_cache():
+    """
+    Get the figure cache of the process.
+
+    Returns:
+        FigureCache: The shared figure cache.
+    """
+    global _figure_cache
+
+    with _figure_cache_lock:
+        if _figure_cache is None:
+            _figure_cache = FigureCache()
+        return _figure_cache
+
+register(Gauge("evovis_figure_cache_bytes", "Serialized size of the cached figures.", lambda: {(): get_figure_cache().size}))
+register(Gauge("evovis_figure_cache_entries", "Number of cached figures.", lambda: {(): len(get_figure_cache())}))
+
+
+### DECORATOR ###
+
+def cached_figure(function):
+    """
+    Memoize a function whose first argument is the run directory per run version.
+
+    The value is cached as its JSON serialization. Every caller gets its own decoded copy,
+    components as dictionaries like {'type': 'Div', 'namespace': 'dash_html_components',
+    'props': {...}}, which Dash accepts as callback outputs and component properties. The
+    original function is available as the 'uncached' attribute of the decorated function.
+
+    Args:
+        function (callable): Function building a figure or component from run data.
+
+    Returns:
+        callable: The memoized function returning plain lists and dictionaries.
+
+    Example:
+        >>> @cached_figure
+        ... def fitness_figure(run, generation_range=None):
+        ...     return go.Figure(...).to_dict()
+    """
+    @functools.wraps(function)
+    def wrapper(run, *args, **kwargs):
+        key = (
+            function.__module__,
+            function.__qualname__,
+            os.path.abspath(run),
+            get_run_version(run),
+            repr(args),
+            repr(sorted(kwargs.items())),
+        )
+
+        cache = get_figure_cache()
+        found, value = cache.get(key)
+
+        if not found:
+            value = to_json_plotly(function(run, *args, **kwargs))
+            cache.put(key, value)
+
+        return json_loads(value)
+
+    wrapper.uncached = function
+    return wrapper
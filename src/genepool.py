@@ -1,6 +1,9 @@
+import os
 import json
-from matplotlib.colors import hex2color, rgb2hex
 import numpy as np
+from bulkload import json_to_dict, file_stamp
+from runstore import get_run_store, OBJECT_OVERHEAD
+from metrics import timed
 
 ##########################################################################################
 
@@ -9,287 +12,234 @@ import numpy as np
 # The Search Space Module provides functionalities for defining, managing, and exploring 
 # search spaces in the context of evolutionary neural network architectures.
 # It offers tools to represent the possible configurations, constraints, and relationships 
-# between components within a predefined solution space.
+# between components within a predefined solution space. The search_space.json file of a
+# run is parsed once per modification into a SearchSpace holding the group and rule maps.
 
 ###########################################################################################
 
 # Changes: rule_set_group, grouping of genepool
 
 
-### READ DATA FROM SEARCH SPACE JSON ###
+### SEARCH SPACE ###
 
-def _json_to_dict(filepath):
+class SearchSpace:
+    """
+    Search space of a run parsed once from its search_space.json file.
+
+    Attributes:
+        path (str): Path of the search_space.json file.
+        stamp (tuple): Modification time and size of the file when it was parsed.
+        genes (list): Genes of the gene pool with their group added as 'group'.
+        groups (dict): Group to list of its layers.
+        layer_groups (dict): Layer to list of the groups containing it.
+        layer_rules (dict): Layer to list of target layers of the non-excluded layer rules.
+        group_rules (dict): Group to list of target groups of the non-excluded group rules.
+        layer_graph (dict): Layer to list of target layers including the layers of connected groups.
+        successors (dict): Layer to set of target layers of the layer graph.
+        layers (list): Layers of the gene pool and the rules, starting with 'Start'.
+        layer_index (dict): Layer to its integer token, the position in layers.
     """
-    Convert JSON data from a file to a Python dictionary.
 
-    Parameters:
-        filepath (str): The path to the JSON file.
+    def __init__(self, search_space, path=None, stamp=None):
+        """
+        Args:
+            search_space (dict): Content of a search_space.json file.
+            path (str, optional): Path of the file.
+            stamp (tuple, optional): Modification time and size of the file.
+
+        Raises:
+            KeyError: If the expected keys ('gene_pool', 'rule_set', 'rule', 'layer', 'group') are not present in the search space data.
+            TypeError: If the data structure of the search space is not as expected.
+        """
+        self.path = path
+        self.stamp = stamp
+        self._reachable = {}
+        self._genepool = None
+        self._gene_colors = None
+        self._transition_matrix = None
+
+        try:
+            self._parse(search_space)
+
+        except KeyError as key_error:
+            raise KeyError(f"Expected key not found in search space data: {key_error}")
+
+        except TypeError as type_error:
+            raise TypeError(f"Unexpected data structure in search space data: {type_error}")
+
+    def _parse(self, search_space):
+        self.genes = []
+        self.groups = {}
+        self.layer_groups = {}
+
+        for group, group_layers in search_space.get("gene_pool", {}).items():
+            self.groups[group] = [layer['layer'] for layer in group_layers]
+
+            for layer in group_layers:
+                self.genes.append({**layer, 'group': group})
+                self.layer_groups.setdefault(layer['layer'], []).append(group)
+
+        self.layer_rules = {
+            layer_rule["layer"]: list(layer_rule["rule"])
+            for layer_rule in search_space.get("rule_set", [])
+            if not layer_rule.get("exclude", False)
+        }
+
+        self.group_rules = {
+            group_rule["group"]: list(group_rule.get("rule", []))
+            for group_rule in search_space.get("rule_set_group", [])
+            if not group_rule.get("exclude", False)
+        }
+
+        # Every layer of a group connects to all layers of the groups the group rules name
+        self.layer_graph = {layer: list(targets) for layer, targets in self.layer_rules.items()}
 
-    Returns:
-        dict: A Python dictionary representing the JSON data.
+        for group_rule in search_space.get("rule_set_group", []):
+            source_layers = self.groups.get(group_rule.get("group", []), [])
 
-    Raises:
-        FileNotFoundError: If the specified file is not found.
-        json.JSONDecodeError: If there is an issue decoding the JSON data.
+            for target_group in group_rule.get("rule", []):
+                target_layers = self.groups.get(target_group, [])
 
-    Example:
-    >>> data = _json_to_dict('example.json')
-    """
-    try:
-        with open(filepath, 'r') as file:
-            data = json.load(file)
-        return data
-    except FileNotFoundError:
-        raise FileNotFoundError(f"File not found: {filepath}")
-    except json.JSONDecodeError as e:
-        raise json.JSONDecodeError(f"Error decoding JSON data in file {filepath}: {e}")
-
-def _get_search_space(run):
-    """
-    Retrieve the search space configuration from a JSON file for a specific run.
+                for src_layer in source_layers:
+                    self.layer_graph.setdefault(src_layer, []).extend(target_layers)
 
-    Parameters:
-        run (str): The identifier for the run. This is used to construct the path to the search_space.json file.
+        self.successors = {layer: set(targets) for layer, targets in self.layer_graph.items()}
 
-    Returns:
-        dict: A Python dictionary representing the search space configuration for the specified run.
+        # Integer token per layer, used to encode chromosomes
+        self.layers = list(dict.fromkeys(
+            ["Start"]
+            + [gene['layer'] for gene in self.genes]
+            + [name for layer, targets in self.layer_rules.items() for name in [layer, *targets]]
+        ))
+        self.layer_index = {layer: idx for idx, layer in enumerate(self.layers)}
 
-    Raises:
-        FileNotFoundError: If the search_space.json file for the given run is not found.
-        json.JSONDecodeError: If there is an issue decoding the JSON data in the search_space.json file.
+    @classmethod
+    def from_file(cls, path):
+        """
+        Parse a search_space.json file.
 
-    Example:
-    >>> search_space = _get_search_space('evonas_run')
-    """
-    return _json_to_dict(f"{run}/search_space.json")
+        Args:
+            path (str): Path of the file.
 
-def _get_groups(run):
-    """
-    Extract layer identifiers from the 'gene_pool' section of the search space.
+        Returns:
+            SearchSpace: The parsed search space.
 
-    Args:
-        run (str): The identifier for the run. This is used to construct the path to the search_space.json file.
+        Raises:
+            FileNotFoundError: If the file is not found.
+            json.JSONDecodeError: If there is an issue decoding the JSON data.
+        """
+        stamp = file_stamp(path)
 
-    Returns:
-        dict: A dictionary mapping group types to lists of layer identifiers.
-    """
-    search_space = _get_search_space(run)
-    
-    layer_dict = {}
-    
-    for key, values in search_space.get("gene_pool", []).items():
-        
-        layer_identifiers = [val['layer'] for val in values]
-        layer_dict[key] = layer_identifiers
-        
-    return layer_dict
-
-def _get_genes_flattened(run):
-    """
-    Flatten the genes in the search space by adding the group information to each gene.
+        if stamp is None:
+            raise FileNotFoundError(f"File not found: {path}")
 
-    Args:
-        run (str): The identifier for the run. This is used to construct the path to the search_space.json file.
+        return cls(json_to_dict(path), path, stamp)
 
-    Returns:
-        list: A list of dictionaries representing flattened genes with group information.
-    """
-    
-    search_space = _get_search_space(run)
-    groups = search_space.get("gene_pool", [])
-    
-    layers = []
-    
-    for group, group_layers in groups.items():
-        
-        for layer in group_layers:
-            layer_with_group = layer.copy()
-            layer_with_group['group'] = group
-            layers.append(layer_with_group)
-            
-    return layers
-  
-    
-### GRAPH CREATED FROM RULESETS ### 
-            
-def _get_layer_graph(run, group_connections=True):
-    """
-    Retrieves the layer graph based on the search space defined for a given run.
+    def reachable(self, start_layer="Start"):
+        """
+        Layers reachable from a layer in the layer graph in depth-first order.
 
-    Args:
-        run (str): The identifier for the run. This is used to construct the path to the search_space.json file.
-        group_connections (bool, optional): If True, includes group connections in the graph. 
-            Defaults to True.
+        Args:
+            start_layer (str): The layer from which to start exploring connected layers.
 
-    Returns:
-        dict: A dictionary representing the layer graph. Keys are source layers, 
-              and values are lists of target layers connected to the source layer.
+        Returns:
+            list: A list of layers connected to the starting layer, including the starting layer.
 
-    Raises:
-        KeyError: If the expected keys ('rule_set', 'rule', 'layer', 'rule_set_groups', 'group') are not present in the search space data.
-        TypeError: If the data structure of the search space is not as expected.
+        Raises:
+            ValueError: If the specified start_layer is not found in the layer graph.
 
-    Example:
-        >>> _get_layer_graph("run_123")
-        {'STFT_2D': ['MAG_2D'], 'MAG_2D': ['FB_2D'], 'FB_2D': ['C_2D', 'DC_2D', 'MAG2DEC_2D'], ...}
-    """
-    try:
-        # Read search space from JSON
-        search_space = _get_search_space(run)
-
-        # Store layer connections in dictionary
-        graph = {}
-
-        # Process layers connections
-        for layer_rule in search_space.get("rule_set", []):
-            if not (layer_rule.get("exclude", False)):
-                
-                # Identify source and target layers
-                src_layer = layer_rule["layer"]
-                target_layers = layer_rule["rule"]
-                graph[src_layer] = target_layers
-        
-        # Return graph without group connections
-        if not group_connections:
-            return graph       
-
-        # Process group connections
-        for group_rule in search_space.get("rule_set_group", []):
-            
-            # Identify source and target group
-            for target_group in group_rule.get("rule", []):
-                source_groups = group_rule.get("group", [])
+        Example:
+            >>> search_space.reachable('STFT_2D')
+            ['STFT_2D', 'MAG_2D', 'FB_2D', 'C_2D', 'DC_2D', 'MAG2DEC_2D', ...]
+        """
+        if start_layer not in self.layer_graph:
+            raise ValueError(f"The specified start_layer '{start_layer}' is not found in the layer graph.")
 
-                # Identify source and target layers in source and target groups
-                groups = _get_groups(run)
-                source_layers = groups.get(source_groups, [])
-                target_layers = groups.get(target_group, [])
+        if start_layer not in self._reachable:
+            visited = set()
+            result = []
+            stack = [start_layer]
 
-                for src_layer in source_layers:
-                    if src_layer in graph:
-                        graph[src_layer] += target_layers
-                    else:
-                        graph[src_layer] = target_layers
-        
-        return graph
+            while stack:
+                layer = stack.pop()
 
-    except KeyError as key_error:
-        raise KeyError(f"Expected key not found in search space data: {key_error}")
+                if layer in visited:
+                    continue
 
-    except TypeError as type_error:
-        raise TypeError(f"Unexpected data structure in search space data: {type_error}")
+                visited.add(layer)
+                result.append(layer)
+                stack.extend(reversed(self.layer_graph.get(layer, [])))
 
-def _get_group_graph(run):
-    """
-    Builds the group graph based on the search space defined for a given run.
+            self._reachable[start_layer] = result
 
-    Args:
-        run (str): The identifier for the run. This is used to construct the path to the search_space.json file.
+        return self._reachable[start_layer]
 
-    Returns:
-        dict: A dictionary representing the group graph. Keys are source groups, 
-              and values are lists of target groups connected to the source group.
+    def transition_matrix(self):
+        """
+        Allowed transitions between consecutive layers of a chromosome as integer adjacency matrix.
 
-    Raises:
-        KeyError: If the expected keys ('rule_set_groups', 'rule', 'group') are not present in the search space data.
-        TypeError: If the data structure of the search space is not as expected.
+        A transition is allowed by a non-excluded layer rule or by a non-excluded group rule connecting the
+        groups of both layers. Rows and columns are the tokens of layer_index, the additional last row and column
+        stand for layers that are not part of the search space and allow no transition.
 
-    Example:
-        >>> _get_group_graph("run_123")
-        {'Feature Extraction 1D': ['Global Pooling 1D'], 'Feature Extraction 2D': ['Global Pooling 2D']}
-    """
-    try:
-        # Read search space from JSON
-        search_space = _get_search_space(run)
+        Returns:
+            numpy.ndarray: uint8 matrix of shape (len(layers) + 1, len(layers) + 1), 1 where a transition is allowed.
 
-        # Store groups connections in dictionary
-        group_graph = {}
+        Example:
+            >>> matrix = search_space.transition_matrix()
+            >>> matrix[search_space.layer_index['Start'], search_space.layer_index['Rescaling']]
+            1
+        """
+        if self._transition_matrix is None:
+            size = len(self.layers) + 1
+            matrix = np.zeros((size, size), dtype=np.uint8)
+            tokens = self.layer_index
 
-        # Process group connections
-        for group_rule in search_space.get("rule_set_group", []):
-            excluded = group_rule.get("exclude", False)
+            for layer, targets in self.layer_rules.items():
+                matrix[tokens[layer], [tokens[target] for target in targets]] = 1
 
-            if not excluded:
-                # Identify source and target group
-                source_group = group_rule["group"]
-                tar_get_groups = group_rule.get("rule", [])
-                group_graph[source_group] = tar_get_groups
+            for group, target_groups in self.group_rules.items():
+                sources = [tokens[layer] for layer in self.groups.get(group, [])]
+                targets = [tokens[layer] for target_group in target_groups for layer in self.groups.get(target_group, [])]
 
-        return group_graph
+                if sources and targets:
+                    matrix[np.ix_(sources, targets)] = 1
 
-    except KeyError as key_error:
-        raise KeyError(f"Expected key not found in search space data: {key_error}")
+            self._transition_matrix = matrix
 
-    except TypeError as type_error:
-        raise TypeError(f"Unexpected data structure in search space data: {type_error}")
- 
- 
-### CONNECTED LAYERS ### 
-  
-def _dfs(graph, layer, visited, result):
-    """
-    Perform depth-first search (_DFS) on the given graph starting from the specified layer.
+        return self._transition_matrix
 
-    Args:
-        graph (dict): A dictionary representing the layer graph.
-        layer (str): The starting layer for DFS.
-        visited (set): A set to keep track of visited layers.
-        result (list): A list to store the layers visited in DFS order.
-
-    Returns:
-        None
 
-    Example:
-        >>> graph = {'A': ['B', 'C'], 'B': ['D'], 'C': ['E'], 'D': [], 'E': []}
-        >>> visited = set()
-        >>> result = []
-        >>> _dfs(graph, 'A', visited, result)
-        >>> print(result)
-        ['A', 'B', 'D', 'C', 'E']
+@timed
+def get_search_space(run):
     """
-    if layer not in visited:
-        visited.add(layer)
-        result.append(layer)
-
-        for neighbor in graph.get(layer, []):
-            _dfs(graph, neighbor, visited, result)
+    Get the parsed search space of a run, parsed again when search_space.json changes.
 
-def _get_connected_layers(run, start_layer="Start"):
-    """
-    Retrieve layers connected to the specified starting layer in the layer graph for a given run.
+    The search space is kept with the run store and dropped along with it.
 
     Args:
-        run (str): The identifier for the run. This is used to construct the path to the search_space.json file.
-        start_layer (str): The layer from which to start exploring connected layers.
+        run (str): The directory of the run results.
 
     Returns:
-        list: A list of layers connected to the starting layer.
+        SearchSpace: The search space of the run.
 
     Raises:
-        ValueError: If the specified start_layer is not found in the layer graph.
+        FileNotFoundError: If the search_space.json file for the given run is not found.
+        json.JSONDecodeError: If there is an issue decoding the JSON data in the search_space.json file.
 
     Example:
-        >>> _get_connected_layers('run_123', 'STFT_2D')
-        ['STFT_2D', 'MAG_2D', 'FB_2D', 'C_2D', 'DC_2D', 'MAG2DEC_2D', ...]
+        >>> get_search_space('evonas_run').groups['Feature Extraction 2D']
+        ['STFT_2D', 'MAG_2D', ...]
     """
-    try:
-        graph = _get_layer_graph(run, group_connections=True)
-        if start_layer not in graph:
-            raise ValueError(f"The specified start_layer '{start_layer}' is not found in the layer graph.")
-
-        visited = set()
-        result = []
-
-        _dfs(graph, start_layer, visited, result)
-        
-        return result
-
-    except KeyError as key_error:
-        raise KeyError(f"Expected key not found in layer graph data: {key_error}")
-
-    except TypeError as type_error:
-        raise TypeError(f"Unexpected data structure in layer graph data: {type_error}")
-
+    path = os.path.abspath(os.path.join(run, "search_space.json"))
+
+    return get_run_store(run).cached(
+        "search_space",
+        file_stamp(path),
+        lambda: SearchSpace.from_file(path),
+        lambda search_space: search_space.stamp[1] * OBJECT_OVERHEAD,
+    )
+  
 
 ### DASH CYTOSCAPE FORMAT ###
 
@@ -323,6 +273,7 @@ def _get_node_element(gene):
 
     return node
 
+@timed
 def get_genepool(run):
     """
     Create Cytoscape elements representing layers and group connections in the search space for a given run.
@@ -331,7 +282,8 @@ def get_genepool(run):
         run (str): The identifier for the run. This is used to construct the path to the search_space.json file.
 
     Returns:
-        tuple: A tuple containing a list of Cytoscape elements and a list of unique group names.
+        tuple: A tuple containing a list of Cytoscape elements and a list of unique group names. Both are built
+        once per search space and shared, they must not be modified.
 
     Raises:
         KeyError: If the expected keys ('gene_pool') are not present in the search space data.
@@ -345,101 +297,112 @@ def get_genepool(run):
          ],
          ['Feature Extraction 2D', ...])
     """
-    try:
-        # Initialize elements with a start node
-        elements = [{'data': {'id': 'Start', 'label': 'Start', 'f_name': 'Start', 'layer': 'Start'}}]
-        group_elements = []
-        groups = []
+    search_space = get_search_space(run)
+
+    if search_space._genepool is None:
+        search_space._genepool = _build_genepool(search_space)
 
-        # Use connected layers to create nodes of layers and groups
-        start_layer = "Start"
-        connected_layers = _get_connected_layers(run, start_layer)
-        genes = _get_genes_flattened(run)
+    return search_space._genepool
 
-        for gene in genes:
-            layer = gene.get("layer")
-            excluded = gene.get("exclude", False)
+def _build_genepool(search_space):
+    # Initialize elements with a start node
+    layer_elements = [{'data': {'id': 'Start', 'label': 'Start', 'f_name': 'Start', 'layer': 'Start'}}]
+    group_elements = []
+    groups = []
+    seen = set()
 
-            if not excluded and layer in connected_layers:
-                
-                # Add layer node
-                layer_data = _get_node_element(gene)
-                element = {"data": layer_data}
+    # Use connected layers to create nodes of layers and groups
+    connected_layers = set(search_space.reachable("Start"))
 
-                if element not in elements:
-                    elements.append(element)
+    for gene in search_space.genes:
+        layer = gene.get("layer")
+        excluded = gene.get("exclude", False)
 
-                # Add group node
-                group = gene.get("group")
-                if group:
-                    group_data = {'id': group, 'label': group}
-                    element = {"data": group_data}
+        if not excluded and layer in connected_layers:
 
-                    if element not in elements:
-                        group_elements.append(element)
-                        groups.append(group)
+            # Add layer node
+            layer_data = _get_node_element(gene)
+            key = json.dumps(layer_data, sort_keys=True)
 
-        # Combine group elements with layer elements
-        elements = group_elements + elements
+            if key not in seen:
+                seen.add(key)
+                layer_elements.append({"data": layer_data})
 
-        # Build layer connections
-        layer_graph = _get_layer_graph(run, group_connections=False)
+            # Add group node
+            group = gene.get("group")
+            if group and group not in groups:
+                group_elements.append({"data": {'id': group, 'label': group}})
+                groups.append(group)
 
-        for layer, edges in layer_graph.items():
-            for edge in edges:
-                element = {'data': {'source': layer, 'target': edge}, 'classes': f'{layer} {edge}'}
+    # Combine group elements with layer elements
+    elements = group_elements + layer_elements
+    group_set = set(groups)
 
-                if element not in elements and layer in connected_layers:
-                    elements.append(element)
+    # Build layer connections
+    layer_edges = set()
 
-        # Build group connections
-        group_graph = _get_group_graph(run)
+    for layer, edges in search_space.layer_rules.items():
+        if layer not in connected_layers:
+            continue
 
-        for group_source, group_targets in group_graph.items():
-            for group_target in group_targets:
-                element = {'data': {'source': group_source, 'target': group_target}, 'classes': 'class-connect'}
+        for edge in edges:
+            if (layer, edge) not in layer_edges:
+                layer_edges.add((layer, edge))
+                elements.append({'data': {'source': layer, 'target': edge}, 'classes': f'{layer} {edge}'})
 
-                if element not in elements and group_source in groups:
-                    elements.append(element)
+    # Build group connections
+    group_edges = set()
 
-        return elements, groups
+    for group_source, group_targets in search_space.group_rules.items():
+        if group_source not in group_set:
+            continue
 
-    except KeyError as key_error:
-        raise KeyError(f"Expected key not found in search space data: {key_error}")
+        for group_target in group_targets:
+            if (group_source, group_target) not in group_edges:
+                group_edges.add((group_source, group_target))
+                elements.append({'data': {'source': group_source, 'target': group_target}, 'classes': 'class-connect'})
 
-    except TypeError as type_error:
-        raise TypeError(f"Unexpected data structure in search space data: {type_error}")
+    return elements, groups
     
 
 ### UNIQUE GENES WITH COLORS ###
 
+def _hex_to_rgb(color):
+    """RGB values between 0 and 1 of a hex color."""
+    color = color.lstrip("#")
+    return tuple(int(color[i:i+2], 16) / 255 for i in (0, 2, 4))
+
+def _rgb_to_hex(rgb):
+    """Hex color of RGB values between 0 and 1."""
+    return "#" + "".join(f"{round(float(value) * 255):02x}" for value in rgb)
+
 def _generate_color_scale(start_color, end_color, num_colors):
-    start_rgb = hex2color(start_color)
-    end_rgb = hex2color(end_color)
+    start_rgb = _hex_to_rgb(start_color)
+    end_rgb = _hex_to_rgb(end_color)
 
     r = np.linspace(start_rgb[0], end_rgb[0], num_colors)
     g = np.linspace(start_rgb[1], end_rgb[1], num_colors)
     b = np.linspace(start_rgb[2], end_rgb[2], num_colors)
 
-    color_scale = [rgb2hex((r[i], g[i], b[i])) for i in range(num_colors)]
+    color_scale = [_rgb_to_hex((r[i], g[i], b[i])) for i in range(num_colors)]
     return color_scale
 
+@timed
 def get_unique_gene_colors(run):
-    
-    connected_genes = _get_connected_layers(run)
-    unique_genes = {connected_gene: "" for connected_gene in connected_genes}
-    
-    opacity_step = 1 / len(unique_genes)
-    
-    start_color = '#6173E9'
-    end_color = '#B70202'
-    
-    num_colors = len(unique_genes)
-    color_scale = _generate_color_scale(start_color, end_color, num_colors)
+    """
+    Assign a color of a blue to red scale to every layer connected to the start layer.
+
+    Args:
+        run (str): The directory of the run results.
+
+    Returns:
+        dict: Layer to hex color, in depth-first order of the layer graph.
+    """
+    search_space = get_search_space(run)
 
-    for idx, gene in enumerate(unique_genes):
-        
-        opacity = 1 - idx * opacity_step
-        unique_genes[gene] = color_scale[idx]
+    if search_space._gene_colors is None:
+        connected_genes = search_space.reachable()
+        color_scale = _generate_color_scale('#6173E9', '#B70202', len(connected_genes))
+        search_space._gene_colors = dict(zip(connected_genes, color_scale))
 
-    return unique_genes
+    return dict(search_space._gene_colors)
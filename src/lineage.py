@@ -0,0 +1,336 @@
+import os
+import re
+import csv
+import threading
+from collections import namedtuple
+from metrics import record_file_read
+from runstore import get_run_store
+
+##########################################################################################
+
+# MODULE LINEAGE
+
+# The Lineage Module indexes the crossover_parents.csv file of a run. The file is streamed
+# line by line into typed crossover records, which the index adds to hash maps from each
+# child to its parents and from each parent to its children, including the crossover
+# points. Lines are matched by one compiled regular expression, lines that don't match
+# are split with the csv module and checked column by column, so the same parser reports
+# the problems of the file to the data validation. When the file grows, only the appended
+# lines are parsed.
+# Parameters: run (str) The directory of the run results.
+
+###########################################################################################
+
+# Crossover of two parents creating an individual, the crossover points are integers
+CrossoverRecord = namedtuple("CrossoverRecord", ["generation", "individual", "parent1", "crossover1", "parent2", "crossover2"])
+
+# Line in the format 'Generation: 1,"Parent_1: (name, 6)","Parent_2: (name, 5)",New_Individual: name'
+CROSSOVER_LINE = re.compile(
+    r'\s*Generation:\s*(\d+)\s*,'
+    r'\s*"Parent_1:\s*\(\s*([^,()"]+?)\s*,\s*(\d+)\s*\)"\s*,'
+    r'\s*"Parent_2:\s*\(\s*([^,()"]+?)\s*,\s*(\d+)\s*\)"\s*,'
+    r'\s*New_Individual:\s*([^\s,"]+)\s*'
+)
+
+PARENT_FIELD = re.compile(r"\s*Parent_([12]):\s*\(?([^,]*),?([^)]*)\)?\s*")
+
+
+### PARSING ###
+
+def _parse_parent(field, number, problems):
+    """Name and crossover point of the parent column, problems of the column are appended to problems."""
+    match = PARENT_FIELD.fullmatch(field)
+
+    if match is None or match.group(1) != str(number):
+        problems.append(f"'Parent_{number}' label not found.")
+        return None, None
+
+    parent = match.group(2).strip()
+    crossover = match.group(3).strip()
+
+    if not parent:
+        problems.append(f"Parent {number} is missing.")
+
+    if not crossover.isdigit():
+        problems.append(f"Parent {number} crossover value should be a number.")
+        return parent, None
+
+    return parent, int(crossover)
+
+def parse_crossover_line(line):
+    """
+    Parse one line of crossover_parents.csv.
+
+    Args:
+        line (str): Line in the format 'Generation: 1,"Parent_1: (name, 6)","Parent_2: (name, 5)",New_Individual: name'.
+
+    Returns:
+        tuple: CrossoverRecord or None if the line is malformed, and the list of problems of the line.
+
+    Example:
+        >>> parse_crossover_line('Generation: 1,"Parent_1: (giga_galago, 2)","Parent_2: (celadon_caterpillar, 6)",New_Individual: mega_porcupine')
+        (CrossoverRecord(generation=1, individual='mega_porcupine', parent1='giga_galago', crossover1=2, parent2='celadon_caterpillar', crossover2=6), [])
+    """
+    match = CROSSOVER_LINE.fullmatch(line)
+
+    if match is not None:
+        generation, parent1, crossover1, parent2, crossover2, individual = match.groups()
+        return CrossoverRecord(int(generation), individual, parent1, int(crossover1), parent2, int(crossover2)), []
+
+    # Slow path reporting what is wrong with each column
+    fields = next(csv.reader([line]), [])
+    problems = []
+
+    if len(fields) < 4:
+        return None, ["Not all columns are present."]
+
+    generation = fields[0].strip()
+
+    if not generation.startswith("Generation:"):
+        problems.append("'Generation' label not found.")
+    elif not generation.replace("Generation:", "", 1).strip().isdigit():
+        problems.append("Generation should be a number.")
+
+    parent1, crossover1 = _parse_parent(fields[1], 1, problems)
+    parent2, crossover2 = _parse_parent(fields[2], 2, problems)
+
+    individual = fields[3].strip()
+
+    if not individual.startswith("New_Individual:"):
+        problems.append("'New_Individual' label not found.")
+    elif not individual.replace("New_Individual:", "", 1).strip():
+        problems.append("New Individual is missing.")
+
+    if problems:
+        return None, problems
+
+    generation = int(generation.replace("Generation:", "", 1))
+    individual = individual.replace("New_Individual:", "", 1).strip()
+
+    return CrossoverRecord(generation, individual, parent1, crossover1, parent2, crossover2), []
+
+
+class CrossoverReader:
+    """
+    Iterator over the crossover records of a crossover_parents.csv file in constant memory.
+
+    Malformed lines are skipped and their problems are passed to the on_problem callback.
+    An unterminated last line is parsed but not counted in the offset, so a reader resuming
+    from the offset reads it again in case it was still being written. Its record is kept
+    in tail, so an index can retract it before the line is read again.
+
+    Attributes:
+        path (str): Path of the crossover_parents.csv file.
+        offset (int): Byte offset after the last complete line that was read.
+        row (int): Number of the last complete line that was read, counted from 1.
+        tail (CrossoverRecord): Record of an unterminated last line, None if the last line read was complete.
+
+    Example:
+        >>> reader = CrossoverReader('my_run/crossover_parents.csv')
+        >>> records = list(reader)
+        >>> new_records = list(CrossoverReader('my_run/crossover_parents.csv', reader.offset, reader.row))
+    """
+
+    def __init__(self, path, offset=0, row=0, on_problem=None):
+        """
+        Args:
+            path (str): Path of the crossover_parents.csv file.
+            offset (int): Byte offset of a line start to resume from.
+            row (int): Number of lines before the offset, used for the row numbers of problems.
+            on_problem (callable, optional): Called with the row number and the message of each problem.
+        """
+        self.path = path
+        self.offset = offset
+        self.row = row
+        self.on_problem = on_problem
+        self.tail = None
+
+    def __iter__(self):
+        start = self.offset
+
+        with open(self.path, "rb") as file:
+            file.seek(self.offset)
+
+            try:
+                for raw in file:
+                    complete = raw.endswith(b"\n")
+                    line = raw.decode("utf-8", errors="replace").rstrip("\r\n")
+                    row = self.row + 1
+
+                    if complete:
+                        self.offset += len(raw)
+                        self.row = row
+
+                    if not line.strip():
+                        continue
+
+                    record, problems = parse_crossover_line(line)
+
+                    if self.on_problem is not None:
+                        for problem in problems:
+                            self.on_problem(row, problem)
+
+                    if record is not None:
+                        if not complete:
+                            self.tail = record
+                        yield record
+            finally:
+                record_file_read("csv", self.offset - start)
+
+
+### LINEAGE INDEX ###
+
+class LineageIndex:
+    """
+    Child to parents and parent to children maps of an EvoNAS run.
+
+    Attributes:
+        path (str): Path of the crossover_parents.csv file.
+        parents (dict): Individual to list of (parent, crossover) tuples.
+        children (dict): Individual to dict of child to crossover of the individual.
+        generation (dict): Individual to the generation number of the crossover that created it.
+        version (int): Counter incremented on every change of the maps.
+    """
+
+    def __init__(self, run):
+        self.path = os.path.join(run, "crossover_parents.csv")
+        self.parents = {}
+        self.children = {}
+        self.generation = {}
+        self.version = 0
+        self._lock = threading.Lock()
+        self._offset = 0
+        self._size = 0
+        self._identity = None
+        self._tail = None
+
+    def _reset(self):
+        self.parents = {}
+        self.children = {}
+        self.generation = {}
+        self._offset = 0
+        self._size = 0
+        self._tail = None
+
+    def refresh(self):
+        """
+        Parse the lines appended to crossover_parents.csv since the last refresh.
+
+        The whole file is parsed again if it shrank or was replaced. An unterminated last
+        line is parsed, and its record is retracted and the line read again on the next
+        refresh in case it was still being written.
+
+        Returns:
+            bool: True if the maps changed.
+        """
+        with self._lock:
+            try:
+                stat = os.stat(self.path)
+            except FileNotFoundError:
+                changed = bool(self.parents)
+                self._reset()
+                self._identity = None
+                self.version += changed
+                return changed
+
+            identity = (stat.st_ino, stat.st_dev)
+            if identity != self._identity or stat.st_size < self._offset:
+                self._reset()
+                self._identity = identity
+
+            if stat.st_size == self._size:
+                return False
+
+            if self._tail is not None:
+                self._retract_tail()
+
+            # Malformed lines are skipped, they are reported by the data validation
+            reader = CrossoverReader(self.path, self._offset)
+            self._add(reader)
+            self._offset = reader.offset
+            self._size = stat.st_size
+            self.version += 1
+
+            return True
+
+    def _add(self, reader):
+        for record in reader:
+            generation, individual, parent1, crossover1, parent2, crossover2 = record
+
+            # The record of an unterminated line is the last one, the values it replaces are kept to retract it
+            if record is reader.tail:
+                self._tail = (
+                    record,
+                    self.generation.get(individual),
+                    self.parents.get(individual),
+                    [self.children.get(parent, {}).get(individual) for parent in (parent1, parent2)],
+                )
+
+            self.generation[individual] = generation
+            self.parents[individual] = [(parent1, crossover1), (parent2, crossover2)]
+            self.children.setdefault(parent1, {})[individual] = crossover1
+            self.children.setdefault(parent2, {})[individual] = crossover2
+
+    def _retract_tail(self):
+        """Undo the record of the unterminated last line before the line is read again."""
+        record, generation, parents, crossovers = self._tail
+        self._tail = None
+
+        for parent, crossover in reversed(list(zip((record.parent1, record.parent2), crossovers))):
+            children = self.children.get(parent, {})
+
+            if crossover is None:
+                children.pop(record.individual, None)
+                if not children:
+                    self.children.pop(parent, None)
+            else:
+                children[record.individual] = crossover
+
+        if parents is None:
+            self.parents.pop(record.individual, None)
+            self.generation.pop(record.individual, None)
+        else:
+            self.parents[record.individual] = parents
+            self.generation[record.individual] = generation
+
+    def get_parents(self, individual):
+        """List of (parent, crossover) tuples of an individual, empty for individuals without crossover."""
+        return self.parents.get(individual, [])
+
+    def get_children(self, individual):
+        """List of (child, crossover) tuples of an individual."""
+        return list(self.children.get(individual, {}).items())
+
+    def records(self):
+        """List of crossover dictionaries with the keys "generation", "individual", "parent1", "crossover1", "parent2", "crossover2"."""
+        return [
+            {
+                "generation": self.generation[individual],
+                "individual": individual,
+                "parent1": parent1,
+                "crossover1": crossover1,
+                "parent2": parent2,
+                "crossover2": crossover2,
+            }
+            for individual, ((parent1, crossover1), (parent2, crossover2)) in self.parents.items()
+        ]
+
+
+def get_lineage_index(run):
+    """
+    Get the refreshed lineage index of a run, created once per run store.
+
+    Args:
+        run (str): The directory of the run results.
+
+    Returns:
+        LineageIndex: The lineage index of the run.
+    """
+    store = get_run_store(run)
+    index = store.component("lineage", lambda: LineageIndex(run))
+
+    # New crossovers change the data of the run as a whole
+    if index.refresh():
+        store.touch()
+
+    return index
@@ -0,0 +1,328 @@
+import os
+import math
+import time
+import errno
+import ctypes
+import ctypes.util
+import select
+import struct
+import threading
+from runstore import get_run_store
+from lineage import get_lineage_index
+from bulkload import GENERATION_PATTERN
+
+##########################################################################################
+
+# MODULE LIVE WATCH
+
+# The Live Watch Module follows a run while the evolution is still writing it. A watcher
+# thread receives inotify events for the run, generation and individual directories and
+# ingests only the changed individuals into the run store, so every change increments the
+# run version that the pages poll. Where inotify is unavailable (other platforms, watch
+# limits exhausted) the watcher falls back to polling the run directory.
+# Parameters: run (str) The directory of the run results.
+
+###########################################################################################
+
+# Interval in milliseconds in which pages poll the run version and the polling watcher
+# checks the run directory (EVOVIS_LIVE_INTERVAL overrides it)
+LIVE_INTERVAL = 5000
+
+# Seconds without new events before a burst of events is ingested
+DEBOUNCE = 0.5
+
+# Seconds after which pending changes are ingested even while events keep arriving
+MAX_DELAY = 2.0
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+EVENT_HEADER = struct.Struct("iIII")
+
+
+### CONFIGURATION ###
+
+def is_live():
+    """True if the dashboard was started in live mode (EVOVIS_LIVE=1)."""
+    return os.getenv("EVOVIS_LIVE", "0") == "1"
+
+def get_live_interval():
+    """Polling interval in milliseconds: EVOVIS_LIVE_INTERVAL or LIVE_INTERVAL."""
+    return max(100, int(os.getenv("EVOVIS_LIVE_INTERVAL", LIVE_INTERVAL)))
+
+
+### INOTIFY ###
+
+class _Inotify:
+    """Minimal ctypes binding of the Linux inotify API."""
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            code = ctypes.get_errno()
+            raise OSError(code, os.strerror(code))
+
+    def add_watch(self, path):
+        wd = self._add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            code = ctypes.get_errno()
+            raise OSError(code, os.strerror(code), path)
+        return wd
+
+    def read_events(self):
+        """List of (watch descriptor, mask, name) tuples of the pending events."""
+        try:
+            data = os.read(self.fd, 65536)
+        except BlockingIOError:
+            return []
+
+        events = []
+        offset = 0
+
+        while offset + EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+            events.append((wd, mask, name))
+
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+
+### RUN WATCHER ###
+
+class RunWatcher:
+    """
+    Background thread keeping the run store of a run in sync with the run directory.
+
+    Attributes:
+        run (str): The directory of the run results.
+        interval (float): Polling interval in seconds.
+        mode (str): "inotify" or "polling", None before the watcher is started.
+    """
+
+    def __init__(self, run, interval=None):
+        self.run = run
+        self.interval = (get_live_interval() if interval is None else interval) / 1000
+        self.store = get_run_store(run)
+        self.mode = None
+        self._inotify = None
+        self._watches = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name=f"RunWatcher({run})", daemon=True)
+
+    def start(self):
+        """Read the current state of the run and start following its changes."""
+        self.store.refresh(force=True)
+        get_lineage_index(self.run)
+
+        # Queries no longer check the directory themselves, the watcher reports every change
+        self.store.refresh_interval = math.inf
+        self.store.pinned = True
+        self.store.watched = True
+
+        try:
+            self._inotify = _Inotify()
+            self._watch_run()
+            self.mode = "inotify"
+        except (OSError, AttributeError) as e:
+            self._close_inotify()
+            print(f"Live mode polls {self.run} every {self.interval}s, inotify is unavailable: {e}")
+            self.mode = "polling"
+
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    ### WATCHES ###
+
+    def _watch(self, path, target):
+        self._watches[self._inotify.add_watch(path)] = target
+
+    def _watch_generation(self, generation, generation_path):
+        self._watch(generation_path, (generation, None))
+
+        with os.scandir(generation_path) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    self._watch(entry.path, (generation, entry.name))
+
+    def _watch_run(self):
+        self._watches = {}
+        self._watch(self.run, (None, None))
+
+        with os.scandir(self.run) as entries:
+            for entry in entries:
+                match = GENERATION_PATTERN.match(entry.name)
+                if match and entry.is_dir():
+                    self._watch_generation(int(match.group(1)), entry.path)
+
+    def _close_inotify(self):
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+
+    ### EVENTS ###
+
+    def _pending_targets(self, events, pending):
+        """
+        Add what has to be ingested for the events to pending, new directories are watched.
+
+        Returns:
+            bool: True if any event concerns run data, events of other files, e.g. training logs, are ignored.
+        """
+        relevant = False
+
+        for wd, mask, name in events:
+            if mask & IN_Q_OVERFLOW:
+                pending.add("run")
+                relevant = True
+                continue
+
+            target = self._watches.get(wd)
+
+            if mask & IN_IGNORED:
+                self._watches.pop(wd, None)
+                continue
+            if target is None:
+                continue
+
+            generation, individual = target
+            created = mask & (IN_CREATE | IN_MOVED_TO) and mask & IN_ISDIR
+            size = len(pending)
+
+            if generation is None:
+                if name == "crossover_parents.csv":
+                    pending.add("lineage")
+                elif name == "config.json":
+                    pending.add((None, None))
+                elif GENERATION_PATTERN.match(name) and mask & IN_ISDIR:
+                    new_generation = int(GENERATION_PATTERN.match(name).group(1))
+                    if created:
+                        self._watch_generation(new_generation, os.path.join(self.run, name))
+                    pending.add((new_generation, None))
+                else:
+                    continue
+
+            elif individual is None:
+                if not mask & IN_ISDIR:
+                    continue
+                if created:
+                    self._watch(os.path.join(self.run, f"Generation_{generation}", name), (generation, name))
+                pending.add((generation, None))
+
+            elif name in ("results.json", "chromosome.json"):
+                pending.add((generation, individual))
+
+            else:
+                continue
+
+            relevant = True
+
+        return relevant
+
+    def _ingest(self, pending):
+        if "run" in pending:
+            self.store.verify()
+            get_lineage_index(self.run)
+            self._watch_run()
+            return
+
+        if "lineage" in pending:
+            get_lineage_index(self.run)
+
+        # New and removed individuals first, then changed files of known individuals
+        targets = [target for target in pending if isinstance(target, tuple)]
+        for generation, individual in sorted(targets, key=lambda target: target[1] is not None):
+            self.store.ingest(generation, individual)
+
+    ### LOOP ###
+
+    def _poll(self):
+        self.store.verify()
+        get_lineage_index(self.run)
+
+    def _loop(self):
+        pending = set()
+
+        # Times of the first and the last event of the pending changes
+        first = last = None
+
+        while not self._stop.is_set():
+            try:
+                if self.mode == "polling":
+                    self._stop.wait(self.interval)
+                    self._poll()
+                    continue
+
+                now = time.monotonic()
+
+                if pending and first is None:
+                    first = last = now
+
+                # A burst is ingested once it is quiet or once its oldest change waited MAX_DELAY
+                due = min(last + DEBOUNCE, first + MAX_DELAY) if pending else now + DEBOUNCE
+                ready, _, _ = select.select([self._inotify.fd], [], [], max(0, due - now))
+
+                if ready and self._pending_targets(self._inotify.read_events(), pending):
+                    last = time.monotonic()
+                    first = last if first is None else first
+
+                if pending and time.monotonic() >= min(last + DEBOUNCE, first + MAX_DELAY):
+                    targets, pending, first, last = pending, set(), None, None
+                    self._ingest(targets)
+
+            except OSError as e:
+                # Watch limit reached or directory vanished while being watched
+                if self.mode == "inotify" and e.errno in (errno.ENOSPC, errno.ENOMEM):
+                    print(f"Live mode falls back to polling {self.run}: {e}")
+                    self._close_inotify()
+                    self.mode = "polling"
+                pending.add("run")
+            except Exception as e:
+                print(f"Live mode failed to ingest changes of {self.run}: {e}")
+
+        self._close_inotify()
+
+
+### WATCHER REGISTRY ###
+
+_watchers = {}
+_watchers_lock = threading.Lock()
+
+def start_run_watcher(run):
+    """
+    Start the watcher of a run once per process.
+
+    Args:
+        run (str): The directory of the run results.
+
+    Returns:
+        RunWatcher: The running watcher of the run.
+    """
+    key = os.path.abspath(run)
+
+    with _watchers_lock:
+        if key not in _watchers:
+            _watchers[key] = RunWatcher(run).start()
+        return _watchers[key]
@@ -0,0 +1,164 @@
+import numpy as np
+from runstore import get_run_store
+from evolution import get_generations, get_meas_info
+
+##########################################################################################
+
+# MODULE MEASUREMENTS
+
+# The Measurements Module holds the results of all individuals of a run as a columnar
+# table with one float column per measurement of the config.json 'results' block and
+# computes per generation aggregates (count, mean, std, min, max, median) of every
+# measurement with vectorized NumPy group-by reductions. Table and aggregates are cached
+# per run version.
+# Parameters: run (str) The directory of the run results.
+
+###########################################################################################
+
+AGGREGATES = ["count", "mean", "std", "min", "max", "median"]
+
+
+### RESULTS TABLE ###
+
+def _build_results_table(run):
+    generations = get_generations(run, as_int=True)
+    measurements = list(get_meas_info(run))
+    store = get_run_store(run)
+
+    generation_column = []
+    individual_column = []
+    error_column = []
+    healthy_column = []
+    values = {meas: [] for meas in measurements}
+
+    for generation in generations:
+        for individual, result in store.generation_values(generation, "results").items():
+            healthy_column.append(result is not None and result.get("error", False) in ("False", False))
+            result = result if result is not None else {}
+
+            generation_column.append(generation)
+            individual_column.append(individual)
+            error_column.append(result.get("error", False) in ("True", True))
+
+            for meas in measurements:
+                value = result.get(meas)
+                values[meas].append(value if type(value) in (int, float) else np.nan)
+
+    table = {
+        "generation": np.array(generation_column, dtype=np.int64),
+        "individual": np.array(individual_column, dtype=object),
+        "error": np.array(error_column, dtype=bool),
+        "healthy": np.array(healthy_column, dtype=bool),
+    }
+
+    for meas in measurements:
+        table[meas] = np.array(values[meas], dtype=np.float64)
+
+    return table
+
+def get_results_table(run):
+    """
+    Get the results of all individuals of the processed generations as columns.
+
+    Args:
+        run (str): The directory of the run results.
+
+    Returns:
+        dict: Column name to NumPy array. The columns are "generation", "individual", "error", "healthy" (results
+        without error as in get_healthy_individuals_results) and one float column per measurement in config.json
+        with NaN for missing or non numeric values.
+
+    Example:
+        >>> table = get_results_table('my_run')
+        >>> table["fitness"][table["generation"] == 2].max()
+        0.8925999999046326
+    """
+    return get_run_store(run).derived("results_table", lambda: _build_results_table(run))
+
+
+### AGGREGATES ###
+
+def _aggregate(generations, row_generations, values):
+    """Group-by reductions of values by generation, NaN values are ignored."""
+    n = len(generations)
+    group = np.searchsorted(generations, row_generations)
+    valid = ~np.isnan(values)
+    group, values = group[valid], values[valid]
+
+    count = np.bincount(group, minlength=n)
+    total = np.bincount(group, weights=values, minlength=n)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = total / count
+        deviation = values - mean[group]
+        std = np.sqrt(np.bincount(group, weights=deviation * deviation, minlength=n) / count)
+
+    minimum = np.full(n, np.inf)
+    maximum = np.full(n, -np.inf)
+    np.minimum.at(minimum, group, values)
+    np.maximum.at(maximum, group, values)
+
+    # Median from the values sorted within their generation
+    order = np.lexsort((values, group))
+    start = np.concatenate([[0], np.cumsum(count)[:-1]])
+    sorted_values = np.append(values[order], np.nan)
+    lower = np.where(count > 0, start + (count - 1) // 2, len(values))
+    upper = np.where(count > 0, start + count // 2, len(values))
+    median = (sorted_values[lower] + sorted_values[upper]) / 2
+
+    empty = count == 0
+    minimum[empty] = np.nan
+    maximum[empty] = np.nan
+
+    return {
+        "generation": generations,
+        "count": count,
+        "mean": mean,
+        "std": std,
+        "min": minimum,
+        "max": maximum,
+        "median": median,
+    }
+
+def get_meas_aggregates(run, meas, min=None, max=None):
+    """
+    Get count, mean, std, min, max and median of a measurement per generation.
+
+    Args:
+        run (str): The directory of the run results.
+        meas (str): Measurement key of the config.json 'results' block.
+        min (float, optional): Values below are ignored.
+        max (float, optional): Values above are ignored.
+
+    Returns:
+        dict: "generation" and each aggregate name to a NumPy array with one entry per processed generation.
+        Aggregates of generations without valid values are NaN.
+    """
+    def build():
+        table = get_results_table(run)
+        values = table[meas].copy() if meas in table else np.full(len(table["generation"]), np.nan)
+
+        if min is not None:
+            values[values < min] = np.nan
+        if max is not None:
+            values[values > max] = np.nan
+
+        generations = np.array(get_generations(run, as_int=True), dtype=np.int64)
+        return _aggregate(generations, table["generation"], values)
+
+    return get_run_store(run).derived(f"meas_aggregates/{meas}/{min}/{max}", build)
+
+def get_meas_aggregate_table(run):
+    """
+    Get the aggregates of every measurement in config.json within its min and max boundary.
+
+    Args:
+        run (str): The directory of the run results.
+
+    Returns:
+        dict: Measurement key to the aggregates returned by get_meas_aggregates.
+    """
+    return {
+        meas: get_meas_aggregates(run, meas, meas_info.get("min-boundary", None), meas_info.get("max-boundary", None))
+        for meas, meas_info in get_meas_info(run).items()
+    }
@@ -0,0 +1,292 @@
+import os
+import time
+import bisect
+import functools
+import threading
+
+##########################################################################################
+
+# MODULE METRICS
+
+# The Metrics Module counts what the dashboard spends its time on: the latency and response
+# size of every Dash callback, the latency of the data access functions, the files and
+# bytes read from runs and the hits and misses of the caches. The metrics are served in
+# the Prometheus text format on /metrics. Every process keeps its own metrics, so with
+# several production workers each scrape shows the worker that answered it.
+# Recording is a dictionary update under a lock; EVOVIS_METRICS=0 turns it off.
+
+###########################################################################################
+
+# Upper bounds of the latency histogram buckets in seconds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Upper bounds of the response size histogram buckets in bytes
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+# Path of the metrics endpoint
+METRICS_PATH = "/metrics"
+
+# Path of the Dash callback endpoint
+CALLBACK_PATH = "/_dash-update-component"
+
+
+### CONFIGURATION ###
+
+def metrics_enabled():
+    """True unless EVOVIS_METRICS is set to 0."""
+    return os.getenv("EVOVIS_METRICS", "1") != "0"
+
+_enabled = metrics_enabled()
+
+
+### METRIC TYPES ###
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels_text(names, values, extra=""):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class Counter:
+    """
+    Monotonic count per combination of label values.
+
+    Example:
+        >>> files_read = Counter("evovis_files_read_total", "Files read from runs.", ["kind"])
+        >>> files_read.inc("json")
+    """
+
+    type = "counter"
+
+    def __init__(self, name, description, labels=()):
+        self.name = name
+        self.description = description
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        """Add an amount to the count of the label values."""
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self):
+        """Lines of the metric in the Prometheus text format."""
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{_labels_text(self.labels, labels)} {value}" for labels, value in values]
+
+class Histogram:
+    """
+    Distribution of observed values in cumulative buckets per combination of label values.
+
+    Example:
+        >>> latency = Histogram("evovis_callback_duration_seconds", "Callback latency.", ["callback"], LATENCY_BUCKETS)
+        >>> latency.observe(0.012, "graph.figure")
+    """
+
+    type = "histogram"
+
+    def __init__(self, name, description, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.description = description
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        """Count a value in its bucket of the label values."""
+        idx = bisect.bisect_left(self.buckets, value)
+
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+
+            entry[0][idx] += 1
+            entry[1] += value
+
+    def samples(self):
+        """Lines of the metric in the Prometheus text format."""
+        with self._lock:
+            values = sorted((labels, (list(counts), total)) for labels, (counts, total) in self._values.items())
+
+        lines = []
+        for labels, (counts, total) in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                bucket = 'le="' + str(bound) + '"'
+                lines.append(f"{self.name}_bucket{_labels_text(self.labels, labels, bucket)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels_text(self.labels, labels)} {total}")
+            lines.append(f"{self.name}_count{_labels_text(self.labels, labels)} {cumulative}")
+        return lines
+
+class Gauge:
+    """
+    Value read from the process when the metrics are rendered.
+
+    Example:
+        >>> register(Gauge("evovis_run_stores", "Run stores in memory.", lambda: {(): len(_stores)}))
+    """
+
+    type = "gauge"
+
+    def __init__(self, name, description, collect, labels=()):
+        """
+        Args:
+            collect (callable): Function returning a dictionary of label values tuple to value.
+        """
+        self.name = name
+        self.description = description
+        self.collect = collect
+        self.labels = tuple(labels)
+
+    def samples(self):
+        """Lines of the metric in the Prometheus text format."""
+        return [f"{self.name}{_labels_text(self.labels, labels)} {value}" for labels, value in sorted(self.collect().items())]
+
+
+### REGISTRY ###
+
+_metrics = {}
+_metrics_lock = threading.Lock()
+
+def register(metric):
+    """Add a metric to the metrics endpoint, metrics of the same name are registered once."""
+    with _metrics_lock:
+        return _metrics.setdefault(metric.name, metric)
+
+def render_metrics():
+    """
+    All registered metrics in the Prometheus text format.
+
+    Returns:
+        str: The text served on the metrics endpoint.
+    """
+    with _metrics_lock:
+        metrics = list(_metrics.values())
+
+    lines = []
+    for metric in metrics:
+        lines.append(f"# HELP {metric.name} {metric.description}")
+        lines.append(f"# TYPE {metric.name} {metric.type}")
+        lines.extend(metric.samples())
+
+    return "\n".join(lines) + "\n"
+
+
+### DASHBOARD METRICS ###
+
+CALLBACK_DURATION = register(Histogram("evovis_callback_duration_seconds", "Latency of Dash callback requests.", ["callback"], LATENCY_BUCKETS))
+CALLBACK_RESPONSE_BYTES = register(Histogram("evovis_callback_response_bytes", "Size of serialized Dash callback responses.", ["callback"], SIZE_BUCKETS))
+CALLBACK_ERRORS = register(Counter("evovis_callback_errors_total", "Dash callback requests answered with an error status.", ["callback"]))
+FUNCTION_DURATION = register(Histogram("evovis_function_duration_seconds", "Latency of run data access functions.", ["function"], LATENCY_BUCKETS))
+FILES_READ = register(Counter("evovis_files_read_total", "Files read from run directories.", ["kind"]))
+BYTES_READ = register(Counter("evovis_read_bytes_total", "Bytes read from run directories.", ["kind"]))
+CACHE_REQUESTS = register(Counter("evovis_cache_requests_total", "Cache lookups by cache and result.", ["cache", "result"]))
+
+def record_file_read(kind, nbytes):
+    """
+    Count a file read from a run.
+
+    Args:
+        kind (str): Kind of the file, e.g. "json", "csv" or "index".
+        nbytes (int): Number of bytes read.
+    """
+    if _enabled:
+        FILES_READ.inc(kind)
+        BYTES_READ.inc(kind, amount=nbytes)
+
+def record_cache(cache, hit):
+    """
+    Count a cache lookup.
+
+    Args:
+        cache (str): Name of the cache.
+        hit (bool): True if the lookup found a value.
+    """
+    if _enabled:
+        CACHE_REQUESTS.inc(cache, "hit" if hit else "miss")
+
+def timed(function):
+    """
+    Record the latency of a data access function in evovis_function_duration_seconds.
+
+    Args:
+        function (callable): The function to time.
+
+    Returns:
+        callable: The timed function.
+
+    Example:
+        >>> @timed
+        ... def get_generations(run, as_int=False):
+        ...     ...
+    """
+    if not _enabled:
+        return function
+
+    name = f"{function.__module__}.{function.__qualname__}"
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            FUNCTION_DURATION.observe(time.perf_counter() - start, name)
+
+    return wrapper
+
+
+### ENDPOINT ###
+
+def instrument_app(app):
+    """
+    Time the callbacks of a Dash app and serve the metrics on /metrics of its server.
+
+    Callbacks are labeled by their outputs as registered in the app, e.g. "graph-fitness.figure".
+
+    Args:
+        app (dash.Dash): The dashboard app.
+    """
+    if not _enabled:
+        return
+
+    import flask
+
+    server = app.server
+    callback_path = app.config.requests_pathname_prefix.rstrip("/") + CALLBACK_PATH
+
+    @server.before_request
+    def start_callback_timer():
+        if flask.request.path == callback_path:
+            flask.g.metrics_start = time.perf_counter()
+
+    @server.after_request
+    def record_callback(response):
+        start = flask.g.pop("metrics_start", None)
+
+        if start is not None:
+            body = flask.request.get_json(silent=True) or {}
+            output = body.get("output")
+
+            # Only registered outputs are used as labels, so clients can't add label values
+            callback = output if output in app.callback_map else "unknown"
+
+            CALLBACK_DURATION.observe(time.perf_counter() - start, callback)
+            CALLBACK_RESPONSE_BYTES.observe(response.calculate_content_length() or 0, callback)
+
+            if response.status_code >= 400:
+                CALLBACK_ERRORS.inc(callback)
+
+        return response
+
+    @server.route(METRICS_PATH)
+    def metrics():
+        return flask.Response(render_metrics(), mimetype="text/plain; version=0.0.4")
@@ -0,0 +1,231 @@
+import dash
+from dash import html, dcc, callback, Input, Output
+import dash_mantine_components as dmc
+import plotly.graph_objects as go
+from plotly.colors import qualitative, hex_to_rgb
+from components import dot_heading, information
+from runs import list_runs
+from summary import get_run_summaries
+from scatter import scatter_trace
+
+
+### REGISTER DASH APP
+dash.register_page(__name__, path='/comparison')
+
+
+### STYLES
+RUN_COLORS = qualitative.Plotly
+comparison_height = 260
+
+
+### HELPER FUNCTIONS FOR PLOTS ###
+def run_color(idx, alpha=None):
+    """
+    Color of the run at a position of the comparison.
+
+    Args:
+        idx (int): Position of the run.
+        alpha (float, optional): Opacity, returns an rgba color if given.
+
+    Returns:
+        str: Hex or rgba color.
+    """
+    color = RUN_COLORS[idx % len(RUN_COLORS)]
+
+    if alpha is None:
+        return color
+
+    red, green, blue = hex_to_rgb(color)
+    return f"rgba({red},{green},{blue},{alpha})"
+
+def comparison_figure_layout(fig, xaxis_title=None, yaxis_title=None):
+    """Apply the layout of the run result plots to a comparison figure."""
+    fig.update_layout(
+        xaxis={'title': xaxis_title, 'tickfont':{'color': '#D0D0D0'}, 'showline':True},
+        yaxis={'title': yaxis_title, 'showgrid':True, 'gridcolor':'#D0D0D0', 'tickfont':{'color': '#D0D0D0'}},
+        margin={'l': 10, 'b': 10, 't': 10, 'r': 10},
+        plot_bgcolor='rgba(0,0,0,0)',
+        legend={'orientation': 'h', 'yanchor': 'bottom', 'y': 1.02},
+        height=comparison_height,
+    )
+
+def figure_meas_comparison(summaries, meas):
+    """
+    Overlay the per generation mean and standard deviation of a measurement of several runs.
+
+    Args:
+        summaries (dict): Run name to run summary.
+        meas (str): Measurement key of the config.json 'results' block.
+
+    Returns:
+        plotly.graph_objs.Figure: Figure with a standard deviation band and a mean line per run.
+    """
+    fig = go.Figure()
+
+    for idx, (name, summary) in enumerate(summaries.items()):
+        aggregates = summary["aggregates"].get(meas)
+
+        if aggregates is None:
+            continue
+
+        # Generations without valid values are left out
+        points = [
+            (generation, mean, std)
+            for generation, mean, std in zip(aggregates["generation"], aggregates["mean"], aggregates["std"])
+            if mean is not None
+        ]
+
+        if not points:
+            continue
+
+        generations = [point[0] for point in points]
+        std_top = [point[1] + point[2] for point in points]
+        std_bottom = [point[1] - point[2] for point in points]
+
+        fig.add_trace(go.Scatter(
+            x=generations + generations[::-1],
+            y=std_top + std_bottom[::-1],
+            fill='toself',
+            fillcolor=run_color(idx, 0.15),
+            line={'color': 'rgba(0,0,0,0)'},
+            name=f'{name} std',
+            legendgroup=name,
+            showlegend=False,
+            hoverinfo='skip'
+        ))
+
+        fig.add_trace(go.Scatter(
+            x=generations,
+            y=[point[1] for point in points],
+            mode='lines+markers',
+            name=name,
+            legendgroup=name,
+            line=go.scatter.Line(color=run_color(idx)),
+            hoverinfo='x+y+name'
+        ))
+
+    comparison_figure_layout(fig, xaxis_title="Generation")
+    return fig
+
+def figure_pareto_comparison(summaries, objectives):
+    """
+    Overlay the Pareto fronts of several runs in the first two common objectives.
+
+    Args:
+        summaries (dict): Run name to run summary.
+        objectives (list): Two measurement keys optimized by all runs.
+
+    Returns:
+        plotly.graph_objs.Figure: Figure with the Pareto front of every run.
+    """
+    fig = go.Figure()
+
+    for idx, (name, summary) in enumerate(summaries.items()):
+        pareto = summary["pareto"]
+        columns = [pareto["objectives"].index(meas) for meas in objectives]
+        points = sorted((values[columns[0]], values[columns[1]], individual) for values, individual in zip(pareto["values"], pareto["individual"]))
+
+        fig.add_trace(scatter_trace(
+            [point[0] for point in points],
+            [point[1] for point in points],
+            mode='lines+markers',
+            line={'color': run_color(idx), 'shape': 'hv'},
+            name=name,
+            text=[point[2] for point in points],
+            hoverinfo='x+y+text+name'
+        ))
+
+    measurements = next(iter(summaries.values()))["measurements"]
+    titles = [measurements.get(meas, {}).get("displayname") or meas for meas in objectives]
+
+    comparison_figure_layout(fig, xaxis_title=titles[0], yaxis_title=titles[1])
+    return fig
+
+def common_objectives(summaries):
+    """Objectives of the Pareto fronts of all runs in the order of the first run."""
+    objectives = None
+
+    for summary in summaries.values():
+        run_objectives = summary["pareto"]["objectives"]
+        objectives = run_objectives if objectives is None else [meas for meas in objectives if meas in run_objectives]
+
+    return objectives or []
+
+
+### COMPARISON CALLBACK ###
+@callback(Output("comparison-plots", "children"), Input("comparison-runs", "value"))
+def set_comparison_plots(names):
+    """
+    Render the comparison of the selected runs from their summaries.
+
+    Args:
+        names (list): Names of the selected runs.
+
+    Returns:
+        list: Headings and graphs of every measurement and of the Pareto fronts.
+    """
+    runs = list_runs()
+    selected = {name: runs[name] for name in names or [] if name in runs}
+
+    if not selected:
+        return [information("Select the runs to compare.")]
+
+    summaries = get_run_summaries(selected)
+    children = []
+
+    # Measurements in the order of their first appearance
+    measurements = {}
+    for summary in summaries.values():
+        for meas, meas_info in summary["measurements"].items():
+            measurements.setdefault(meas, meas_info)
+
+    for meas, meas_info in measurements.items():
+        heading = meas_info.get("displayname") or meas
+
+        if meas_info.get("unit", None):
+            heading += f" [{meas_info.get('unit')}]"
+
+        children.append(dot_heading(heading, style={"font-size": "14px"}, className='dot-heading-results-page'))
+        children.append(dcc.Graph(figure=figure_meas_comparison(summaries, meas), id=f"comparison-graph-{meas}", config={'displayModeBar': False}))
+
+    objectives = common_objectives(summaries)
+
+    if len(objectives) >= 2:
+        children.append(dot_heading("Pareto Fronts", style={"font-size": "14px"}, className='dot-heading-results-page'))
+        children.append(dcc.Graph(figure=figure_pareto_comparison(summaries, objectives[:2]), id="comparison-graph-pareto", config={'displayModeBar': False}))
+
+    return children
+
+
+### COMPARISON PAGE LAYOUT ###
+def comparison_layout(runs=None, **kwargs):
+    """
+    Generates the layout of the comparison page.
+
+    Args:
+        runs (str, optional): Comma separated names of the runs selected by the 'runs' URL parameter, default are the first two runs.
+
+    Returns:
+        dash_html_components.Div: Run selection and placeholder of the comparison plots.
+    """
+    available = list_runs()
+    selected = [name for name in (runs or "").split(",") if name in available] or list(available)[:2]
+
+    return html.Div(
+        [
+            html.H1("Run Comparison", style={'margin-bottom': '25px', 'margin-top': '25px'}),
+            dmc.MultiSelect(
+                label="Select Runs",
+                placeholder="Select Runs",
+                data=[{"value": name, "label": name} for name in available],
+                value=selected,
+                searchable=True,
+                clearable=True,
+                id="comparison-runs",
+                style={"max-width": "800px", "margin-bottom": "20px"},
+            ),
+            dcc.Loading(html.Div(id="comparison-plots"), type="dot", color="#6173E9"),
+        ]
+    )
+
+layout = comparison_layout
@@ -1,17 +1,13 @@
 import dash
-from dash import html, callback, Input, Output, dcc
+from dash import html, callback, Input, Output, State, dcc
 import dash_cytoscape as cyto
 import dash_mantine_components as dmc
 from dash_iconify import DashIconify
-from dotenv import load_dotenv
-import os
 from evolution import get_family_tree, get_generations, get_individuals, get_random_individual, get_individuals_min_max, get_individual_result, get_individual_chromosome, get_meas_info
-from components import dot_heading, bullet_chart_card, bullet_chart_card_basic, warning, information, chromosome_sequence
-from dataval import validate_generations_of_individuals, validate_crossover_parents
-
-### LOAD PATH FROM ENVIRONMENT VARIABLES
-load_dotenv()
-run = os.getenv("RUN_RESULTS_PATH")
+from components import dot_heading, bullet_chart_card, bullet_chart_card_basic, warning, information, chromosome_sequence, run_data_stores
+from dataval import validation_message
+from ancestry import descendant_count_in_generation, founder_contributions
+from runs import resolve_run
 
 
 ### REGISTER DASH APP
@@ -86,24 +82,40 @@ def family_tree_cytsocape():
         stylesheet=CYTOSCAPE_STYLE,
     )
 
-def generation_slider():
+def generation_marks(generations_int):
+    """
+    Generates the RangeSlider marks of the first and last generation.
+
+    Args:
+        generations_int (list): Generation numbers.
+
+    Returns:
+        dict: Marks of the minimum and maximum generation.
+    """
+    return {
+        min(generations_int): {"label": f"Generation_{min(generations_int)}", "style": MARKS_STYLE}, 
+        max(generations_int): {"label": f"Generation_{max(generations_int)}", "style": MARKS_STYLE}
+    }
+
+def generation_slider(run):
     """
     Generates a Dash RangeSlider component for selecting generations.
 
+    Args:
+        run (str): The directory of the run results.
+
     Returns:
         dash_core_components.RangeSlider: Dash RangeSlider component.
     """
+    # Only the generation directories are listed, the individuals are read by the callbacks
     generations_int = get_generations(run, as_int=True)
-    random_generation, _ = get_random_individual(run, generations_int[round(len(generations_int)/2)])
+    random_generation = generations_int[round(len(generations_int)/2)]
     
     return dcc.RangeSlider(
         min(generations_int), 
         max(generations_int), 
         1, 
-        marks={
-            min(generations_int): {"label": f"Generation_{min(generations_int)}", "style": MARKS_STYLE}, 
-            max(generations_int): {"label": f"Generation_{max(generations_int)}", "style": MARKS_STYLE}
-        }, 
+        marks=generation_marks(generations_int), 
         #pushable=1, 
         allowCross=False,
         id='gen-range-slider',
@@ -128,18 +140,20 @@ def individual_select():
 
 
 ### FAMILY TREE MODIFICATION CALLBACKS 
-@callback( Output("ind-select", "data"), Output("ind-select", "value"), Input("gen-range-slider", "value"))
-def set_individuals_select(gen_range):
+@callback( Output("ind-select", "data"), Output("ind-select", "value"), Input("gen-range-slider", "value"), State("run-name", "data"))
+def set_individuals_select(gen_range, run_name=None):
     """
     Sets the options and default value for the individual selection dropdown based on the selected generation range.
 
     Args:
         gen_range (list): List containing the selected generation (idx 1) and minimum (idx 0), maximum (idx 2) generation values selected on the RangeSlider.
+        run_name (str, optional): Name of the run shown by the page.
 
     Returns:
         list: Data options for the individual selection dropdown.
         str: Default value for the individual selection dropdown.
     """
+    run = resolve_run(run_name)
     gen = gen_range[1]
     
     data = [{"value": ind, "label": ind} for ind in get_individuals(run, generation_range=range(gen, gen+1), value="names", as_generation_dict=False)]
@@ -147,8 +161,8 @@ def set_individuals_select(gen_range):
     
     return data, value
 
-@callback( Output("cytoscape-family-tree", "elements"), Output("cytoscape-family-tree", "layout"), Output("cytoscape-family-tree", "stylesheet"), Input("gen-range-slider", "value"), Input("ind-select", "value"), Input("cytoscape-family-tree", "tapNodeData"), Input("cytoscape-family-tree", "tapEdgeData"))
-def set_cytoscape(gen_range, ind, ind_clicked, edge_clicked):
+@callback( Output("cytoscape-family-tree", "elements"), Output("cytoscape-family-tree", "layout"), Output("cytoscape-family-tree", "stylesheet"), Output("family-tree-truncated", "children"), Input("gen-range-slider", "value"), Input("ind-select", "value"), Input("cytoscape-family-tree", "tapNodeData"), Input("cytoscape-family-tree", "tapEdgeData"), Input("run-version", "data"), State("run-name", "data"))
+def set_cytoscape(gen_range, ind, ind_clicked, edge_clicked, version=None, run_name=None):
     """
     Sets the elements, layout, and stylesheet for the family tree visualization based on user interactions.
 
@@ -157,17 +171,26 @@ def set_cytoscape(gen_range, ind, ind_clicked, edge_clicked):
         ind (str): Selected individual from the dropdown.
         ind_clicked (dict): Data of the individual node clicked on the Cytoscape component.
         edge_clicked (dict): Data of the edge clicked on the Cytoscape component.
+        version (int): Version of the run data, redraws the tree in live mode.
+        run_name (str, optional): Name of the run shown by the page.
 
     Returns:
         list: Nodes and edges of Cytoscape component.
         dict: Layout configuration for the Cytoscape component.
         list: Stylesheet for the Cytoscape component.
+        list: Notice shown if the tree was cut off at its maximum number of nodes.
     """
+    run = resolve_run(run_name)
     
     # Get Family tree through individual selection
     generation_range = range(gen_range[0], gen_range[2]+1)
     gen = gen_range[1]
-    elements, roots = get_family_tree(run, gen, ind, generation_range)
+    elements, roots, truncated = get_family_tree(run, gen, ind, generation_range)
+    
+    truncated_notice = []
+    if truncated:
+        node_count = sum(1 for element in elements if "source" not in element["data"])
+        truncated_notice = information(f"The family tree is cut off at the {node_count} ancestors and descendants nearest to {ind}. Narrow the generation range to see all of them.")
     
     cytoscape_layout = {
         'name': 'breadthfirst', 
@@ -231,12 +254,31 @@ def set_cytoscape(gen_range, ind, ind_clicked, edge_clicked):
             }
         }) 
     
-    return elements, cytoscape_layout, new_cytoscape_style
+    return elements, cytoscape_layout, new_cytoscape_style, truncated_notice
+
+@callback( Output("gen-range-slider", "min"), Output("gen-range-slider", "max"), Output("gen-range-slider", "marks"), Input("run-version", "data"), State("run-name", "data"), prevent_initial_call=True)
+def set_generation_slider_range(version, run_name=None):
+    """
+    Extends the RangeSlider to the generations processed so far in live mode.
+
+    Args:
+        version (int): Version of the run data.
+        run_name (str, optional): Name of the run shown by the page.
+
+    Returns:
+        int: Minimum generation.
+        int: Maximum generation.
+        dict: Marks of the minimum and maximum generation.
+    """
+    run = resolve_run(run_name)
+    generations_int = get_generations(run, as_int=True)
+    
+    return min(generations_int), max(generations_int), generation_marks(generations_int)
 
 @callback( 
     Output("individual-heading", "children"),  Output("individual-exceptions", "children"), Output("individual-genes", "children"), Output("individual-results", "children"), 
-    Input("cytoscape-family-tree", "tapNodeData"), Input("ind-select", "value"), Input("gen-range-slider", "value"))
-def set_values(ind_clicked, ind_select, gen_range):
+    Input("cytoscape-family-tree", "tapNodeData"), Input("ind-select", "value"), Input("gen-range-slider", "value"), Input("run-version", "data"), State("run-name", "data"))
+def set_values(ind_clicked, ind_select, gen_range, version=None, run_name=None):
     """
     Sets the information to be displayed about the selected individual.
 
@@ -244,6 +286,8 @@ def set_values(ind_clicked, ind_select, gen_range):
         ind_clicked (dict): Data of the individual node clicked on the Cytoscape component.
         ind_select (str): Selected individual from the dropdown.
         gen_range (tuple): Tuple containing the minimum and maximum generation values selected on the RangeSlider.
+        version (int): Version of the run data, updates the values in live mode.
+        run_name (str, optional): Name of the run shown by the page.
 
     Returns:
         list: Name of the selected individual.
@@ -251,6 +295,7 @@ def set_values(ind_clicked, ind_select, gen_range):
         list: Genes of the selected individual.
         list: Metrics of the selected individual.
     """
+    run = resolve_run(run_name)
     
     # Individual selected in cytoscape
     ind = None
@@ -273,6 +318,15 @@ def set_values(ind_clicked, ind_select, gen_range):
         
     ### 1 HEADING ###
     ind_heading = [html.H2(ind, style = {'margin': '10px'})]
+
+    # Lineage of the individual from the precomputed ancestry of the run
+    generations = get_generations(run, as_int=True)
+    descendants = descendant_count_in_generation(run, ind, generations[-1])
+    founders = founder_contributions(run, ind)
+    ind_heading.append(html.P(
+        f"{descendants} descendants in generation {generations[-1]}, {len(founders)} founders of generation {generations[0]}",
+        style={"margin": "10px", "font-weight": "lighter", "font-size": "15px"},
+    ))
     
     ### 2 EXCEPTIONS ###
     ind_exceptions = []
@@ -327,10 +381,13 @@ def family_tree_header():
     """
     return html.H1('Family Tree', style = {"margin-bottom": "20px", "margin-top": "20px"})
 
-def family_tree():
+def family_tree(run):
     """
     Generates the layout for the family tree page.
 
+    Args:
+        run (str): The directory of the run results.
+
     Returns:
         dash_mantine_components.Col: Column layout for the family tree page.
     """
@@ -339,7 +396,8 @@ def family_tree():
             family_tree_header(), 
             individual_select(), 
             family_tree_cytsocape(),
-            generation_slider()
+            html.Div([], id='family-tree-truncated'),
+            generation_slider(run)
         ]), 
         span='auto',
         style={'max-width': '100%'} 
@@ -370,15 +428,19 @@ def individual_information():
         id='values-col'
     )
 
-def family_tree_layout():
+def family_tree_layout(run=None, **kwargs):
     """
     Generates the layout for the family tree page based on data validation.
     If data fails validation, it displays a warning message.
 
+    Args:
+        run (str, optional): Name of the run selected by the 'run' URL parameter, default is the run of RUN_RESULTS_PATH.
+
     Returns:
         dash_html_components.Div: Layout for the family tree page.
     """
-    validation_result = validate_generations_of_individuals(run) + validate_crossover_parents(run)
+    run = resolve_run(run)
+    validation_result = validation_message(run, ["generations", "crossover_parents"])
     layout = None
     
     if validation_result:
@@ -393,13 +455,13 @@ def family_tree_layout():
     else:
         layout = dmc.Grid(
             children=[
-                family_tree(),
+                family_tree(run),
                 individual_information()
             ],
             gutter="s",
             grow=True
         )
     
-    return layout
+    return html.Div([run_data_stores(run), layout])
 
 layout = family_tree_layout
\ No newline at end of file
@@ -1,18 +1,12 @@
 import dash
-from dash import html, Input, Output, callback, dcc
+from dash import html, Input, Output, State, callback, dcc
 import dash_mantine_components as dmc
 import dash_cytoscape as cyto
-import plotly.express as px
-from dotenv import load_dotenv
-import os
-from evolution import get_number_of_genes, get_generations
+from evolution import get_gene_usage
 from genepool import get_genepool
-from components import parameter_card, warning
-from dataval import validate_search_space
-
-### LOAD PATH FROM ENVIRONMENT VARIABLES
-load_dotenv()
-run = os.getenv("RUN_RESULTS_PATH")
+from components import parameter_card, warning, run_data_stores
+from dataval import validation_message
+from runs import resolve_run
 
 
 ### REGISTER DASH APP
@@ -121,10 +115,13 @@ def cytoscape_stylesheet(groups):
     
     return cytoscape_stylesheet
 
-def cytoscape_search_space():
+def cytoscape_search_space(run):
     """
     Generates the cytoscape component for the gene search space.
 
+    Args:
+        run (str): The directory of the run results.
+
     Returns:
         dash_cytoscape.Cytoscape: Cytoscape component for gene search space.
     """
@@ -224,17 +221,22 @@ def gene_insights():
     Output('number-of-genes-graph', 'children'),
     Output('cytoscape-genepool', 'stylesheet'),
     
-    Input('cytoscape-genepool', 'tapNodeData'))
-def display_node_data(data):
+    Input('cytoscape-genepool', 'tapNodeData'), 
+    Input('run-version', 'data'),
+    State('run-name', 'data'))
+def display_node_data(data, version=None, run_name=None):
     """
     Displays data for the clicked node in the cytoscape component.
 
     Args:
         data (dict): Data of the clicked node.
+        version (int): Version of the run data, updates the gene usage in live mode.
+        run_name (str, optional): Name of the run shown by the page.
 
     Returns:
         tuple: Tuple containing gene name, gene amount, gene type, parameter cards, graph, and cytoscape stylesheet.
     """
+    run = resolve_run(run_name)
     gene = data
     
     if data is None:
@@ -260,13 +262,12 @@ def display_node_data(data):
             parameter_cards.append(mc)   
             
     # Number of genes per generation
-    numb_of_genes = []
+    generations, numb_of_genes = get_gene_usage(run, gene["layer"])
     
-    for generation in range(1, len(get_generations(run))+1):
-        numb_of_genes.append(get_number_of_genes(run, generation, gene["layer"]))
+    import plotly.express as px
     
     fig = px.bar(
-        x = list(range(1, len(get_generations(run))+1)), 
+        x = generations, 
         y = numb_of_genes, 
         labels={"x": "Generation", "y": f"{gene['layer']} layers"}
     )
@@ -286,12 +287,7 @@ def display_node_data(data):
     )
     
     # Amount of genes
-    gene_amount = 0
-    
-    for numb_gen in numb_of_genes:
-        gene_amount += numb_gen
-        
-    gene_amount = f"{gene_amount} Count"
+    gene_amount = f"{int(numb_of_genes.sum())} Count"
             
     # New node style when node is clicked
     _, groups = get_genepool(run)
@@ -317,15 +313,19 @@ def display_node_data(data):
 
 
 ### GENE POOL PAGE LAYOUT
-def genepool_layout():
+def genepool_layout(run=None, **kwargs):
     """
     Generates the real-time layout for the gene pool page.
     If the search space data fails validation, it displays a warning message.
 
+    Args:
+        run (str, optional): Name of the run selected by the 'run' URL parameter, default is the run of RUN_RESULTS_PATH.
+
     Returns:
-        dash_mantine_components.Grid: Layout for the gene pool page.
+        dash_html_components.Div: Layout for the gene pool page.
     """
-    validation_result = validate_search_space(run)
+    run = resolve_run(run)
+    validation_result = validation_message(run, ["search_space"])
     layout = None
     
     if validation_result:
@@ -341,11 +341,11 @@ def genepool_layout():
         layout = dmc.Grid(
             children=[
                 dmc.Col(gene_insights(), span='auto', style={ 'min-width': '525px'}),
-                dmc.Col(cytoscape_search_space(), span='auto', style={ 'min-width': '525px'}),
+                dmc.Col(cytoscape_search_space(run), span='auto', style={ 'min-width': '525px'}),
             ],
             gutter="l",
         )
     
-    return layout
+    return html.Div([run_data_stores(run), layout])
 
 layout = genepool_layout
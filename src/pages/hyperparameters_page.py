@@ -1,15 +1,10 @@
 import dash
 from dash import html
 import dash_mantine_components as dmc
-from dotenv import load_dotenv
-import os
-from components import dot_heading, parameter_card, warning
+from components import dot_heading, parameter_card, warning, run_data_stores
 from evolution import get_hyperparameters
-from dataval import validate_hyperparameters
-
-### LOAD PATH FROM ENVIRONMENT VARIABLES
-load_dotenv()
-run = os.getenv("RUN_RESULTS_PATH")
+from dataval import validation_message
+from runs import resolve_run
 
 
 ### REGISTER DASH APP
@@ -17,12 +12,15 @@ dash.register_page(__name__, path='/')
 
 
 ### HYPERPARAMETER PAGE COMPONENTS
-def grouped_metriccards():
+def grouped_metriccards(run):
     """Generate hyperparameter metric card divs assigned to their specified group divs.
 
     This function retrieves hyperparameters for a specified EvoNAS run and organizes them into groups based on their 'group' attribute.
     Each group is displayed as a header along with the corresponding hyperparameter metric cards.
 
+    Args:
+        run (str): The directory of the run results.
+
     Returns:
         list: A list of HTML div elements representing the hyperparameter groups, 
               where each group includes the group name as the header and the associated hyperparameter metric cards.
@@ -92,16 +90,20 @@ def parameter_overview_header():
 
 
 ### HYPERPARAMETER PAGE LAYOUT 
-def hyperparameter_layout():
+def hyperparameter_layout(run=None, **kwargs):
     """
     Generates the layout for the hyperparameter page.
     If hyperparameters fail validation, it displays a warning message.
 
+    Args:
+        run (str, optional): Name of the run selected by the 'run' URL parameter, default is the run of RUN_RESULTS_PATH.
+
     Returns:
-        dash_mantine_components.Grid: A Mantine Grid component representing the layout of the hyperparameter page.
+        dash_html_components.Div: The run stores and a Mantine Grid component representing the layout of the hyperparameter page.
     """
+    run = resolve_run(run)
     
-    validation_result = validate_hyperparameters(run)
+    validation_result = validation_message(run, ["hyperparameters"])
     children = None
     
     if validation_result:
@@ -114,13 +116,15 @@ def hyperparameter_layout():
     else:
         children=[
             dmc.Col(parameter_overview_header(), span='auto', className='hyperparameters-header'),
-            dmc.Col(grouped_metriccards(), span=8)
+            dmc.Col(grouped_metriccards(run), span=8)
         ]
 
-    return dmc.Grid(
+    grid = dmc.Grid(
         children=children,
         justify="center",
         gutter="sm",
     )
     
+    return html.Div([run_data_stores(run), grid])
+    
 layout = hyperparameter_layout
@@ -1,17 +1,18 @@
 import dash
-from dash import html, dcc
+from dash import html, dcc, callback, Input, Output, State, MATCH
+from dash.exceptions import PreventUpdate
 import dash_mantine_components as dmc
 import plotly.graph_objects as go
 import numpy as np
-from dotenv import load_dotenv
-import os
-from components import dot_heading, bullet_chart_card_basic, parameter_card, chromosome_sequence
-from evolution import get_individuals, get_generations, get_meas_info, get_healthy_individuals_results, get_best_individuals, get_hyperparameters
+from components import dot_heading, bullet_chart_card_basic, parameter_card, chromosome_sequence, run_data_stores
+from evolution import get_generations, get_meas_info, get_healthy_individuals_results, get_best_individuals, get_hyperparameters
 from genepool import get_unique_gene_colors
-
-### LOAD PATH FROM ENVIRONMENT VARIABLES
-load_dotenv()
-run = os.getenv("RUN_RESULTS_PATH")
+from measurements import get_meas_aggregates
+from figcache import cached_figure
+from pareto import get_pareto_fronts
+from scatter import scatter_trace, downsample_indices
+from runs import resolve_run
+from runstore import get_run_version
 
 
 ### REGISTER DASH APP
@@ -42,39 +43,18 @@ def add_meas_trace(fig, run, meas, generation_range=None, min=None, max=None, sh
     """
     
     measurements = get_meas_info(run)
-    
-    # Defining borders to exclude and include invalid values
-    if min is None:
-        min = -100000000000
-    if max is None:
-        max = 100000000000
 
-    # Get the indivuals' information by sotring the valid values in arrays
-    gen_results = get_individuals(run, generation_range, value='results', as_generation_dict=True)
+    # Per generation aggregates of the valid values between the borders
+    aggregates = get_meas_aggregates(run, meas, min, max)
+    generations = aggregates["generation"]
+    avg_results = aggregates["mean"]
+    std_results = aggregates["std"]
     
-    generations = []
-    avg_results = []
-    std_results = []
-    
-    for gen, results in gen_results.items():
-        
-        values = []
+    if generation_range is not None:
+        in_range = np.isin(generations, list(generation_range))
+        generations, avg_results, std_results = generations[in_range], avg_results[in_range], std_results[in_range]
         
-        for ind, result in results.items():
-            
-            # TODO Why result None
-            if result is not None and meas in result:
-                value = result[meas]
-
-                if (type(value) == int or type(value) == float) and (value <= max) and (value >= min): 
-                    values.append(value)
-            
-        generations.append(gen)
-        avg_results.append(np.mean(np.array(values)))
-        std_results.append(np.std(np.array(values)))
-    
-    avg_results = np.array(avg_results)
-    std_results = np.array(std_results)
+    generations = generations.tolist()
     
     # Add standard deviation in background
     std_top = avg_results - std_results
@@ -106,12 +86,13 @@ def add_meas_trace(fig, run, meas, generation_range=None, min=None, max=None, sh
         xaxis={'tickvals': generations},
     )
 
-def add_constraint_trace(fig, constraint):
+def add_constraint_trace(fig, run, constraint):
     """
     Add a constraint trace to a Plotly figure.
 
     Args:
         fig (plotly.graph_objs.Figure): Plotly figure to which the constraint trace will be added.
+        run (str): The directory of the run results.
         constraint (float): Value of the constraint.
 
     Returns:
@@ -128,6 +109,7 @@ def add_constraint_trace(fig, constraint):
         )
     )
 
+@cached_figure
 def figure_meas_over_gen(run, measures, generation_range=None, min=None, max=None, show_std=True, show_constraint=True, title=None, xaxis_title=None, yaxis_title=None):
     """
     Generate a Plotly figure showing measurement trends over generations.
@@ -145,7 +127,7 @@ def figure_meas_over_gen(run, measures, generation_range=None, min=None, max=Non
         yaxis_title (str): Title of the y-axis.
 
     Returns:
-        plotly.graph_objs.Figure: Plotly figure showing measurement trends over generations.
+        dict: Plotly figure dictionary showing measurement trends over generations, cached per run version.
     """
     
     # Check if measures is a list or a string
@@ -184,7 +166,7 @@ def figure_meas_over_gen(run, measures, generation_range=None, min=None, max=Non
             #    constraint = get_meas_info(run)[meas][1]
                 
                 #if constraint != None:
-                #    add_constraint_trace(fig, constraint)
+                #    add_constraint_trace(fig, run, constraint)
     
     # Layout
     t = 10 if title is None else 50
@@ -202,7 +184,7 @@ def figure_meas_over_gen(run, measures, generation_range=None, min=None, max=Non
         hovermode="x",
     )
     
-    return fig
+    return fig.to_dict()
 
 def graph_meas_over_gen(run, measures, generation_range=None, min=None, max=None, show_std=True, max_width=600, height=200, width=None, show_constraint=True, title=None, xaxis_title=None, yaxis_title=None, id="graph-meas-over-gen"):
     """
@@ -238,6 +220,19 @@ def graph_meas_over_gen(run, measures, generation_range=None, min=None, max=None
     
     return graph_div
 
+def pareto_plot_objectives(run):
+    """
+    Get the objectives of the Pareto optimality plot.
+
+    Args:
+        run (str): Path to the run results.
+
+    Returns:
+        list: The first three measurements flagged 'pareto-optimlity-plot' in config.json.
+    """
+    return [measurement for measurement, rules in get_meas_info(run).items() if rules["pareto-optimlity-plot"]][:3]
+
+@cached_figure
 def get_pareto_optimality_fig(run, generation_range=None, max_width=600, height=200):
     """
     Generate a Dash Graph component showing multi-objective mappingto identify pareto optimal neural architectures.
@@ -249,7 +244,8 @@ def get_pareto_optimality_fig(run, generation_range=None, max_width=600, height=
         height (int): Height of the graph.
 
     Returns:
-        dash_core_components.Graph: Dash Graph component showing  multi-objective mapping of architectures.
+        dash_html_components.Div: Dash Graph component showing  multi-objective mapping of architectures and the details
+        of the hovered individual, cached per run version.
     """
     
     measurements = get_meas_info(run)
@@ -267,69 +263,73 @@ def get_pareto_optimality_fig(run, generation_range=None, max_width=600, height=
     }
         
     # Get all fitness objectives
-    fitness_objectives = []
-    
-    for measurement, rules in measurements.items():
-        if rules["pareto-optimlity-plot"]:
-            fitness_objectives.append(measurement)
-      
+    fitness_objectives = pareto_plot_objectives(run)
     numb_fo = len(fitness_objectives)
-    obj1, obj2, obj3 = None, None, None
-    marker = None
     
     # Special Cases
     if numb_fo == 0 or numb_fo == 1:
         return None
-    elif numb_fo > 3:
-        fitness_objectives = fitness_objectives[:3]
-    
-    # Objectives
-    results, _ = get_healthy_individuals_results(run, as_generation_dict=False)
     
-    if numb_fo == 2:
-        obj1 = [result[fitness_objectives[0]] for result in results]
-        obj2 = [result[fitness_objectives[1]] for result in results]
-        
-    elif numb_fo == 3:
-        obj1 = [result[fitness_objectives[0]] for result in results]
-        obj2 = [result[fitness_objectives[1]] for result in results]
-        obj3 = [result[fitness_objectives[2]] for result in results]
-        
-        custom_colorscale = [
-            [0.0, '#ACB5ED'], 
-            [0.2, '#7D8CEF'], 
-            [0.4, '#5666CD'], 
-            [0.6, '#293AAA'], 
-            [0.8, '#001075'], 
-            [1.0, '#000B51']  
-        ] 
-        
-        marker = dict(
-            size=3,
-            color=obj3,
-            colorscale=custom_colorscale,
-            reversescale=False,
-            symbol='x',
-            colorbar={
-                'title':f"{measurements[fitness_objectives[2]]['displayname']} [{measurements[fitness_objectives[2]]['unit']}]",
-                'thickness': 10,
-                'tickfont': tickfont,
-                'titlefont': titlefont,
-                #'title_standoff': 20,
-                #'title_textangle': -90,
-                'orientation': 'h',
-                'outlinecolor': '#D0D0D0'
-            }
-        )
+    # Non-dominated fronts of the healthy individuals, the version is read first so hovers of a changed run are ignored
+    version = get_run_version(run)
+    fronts = get_pareto_fronts(run, fitness_objectives)
+    values = fronts["values"]
+    ranks = fronts["rank"]
+    
+    # Downsample large runs, the Pareto front is always kept
+    shown = downsample_indices(values[:, 0], values[:, 1], keep=ranks == 1)
+    obj1, obj2 = values[shown, 0], values[shown, 1]
+    
+    custom_colorscale = [
+        [0.0, '#ACB5ED'], 
+        [0.2, '#7D8CEF'], 
+        [0.4, '#5666CD'], 
+        [0.6, '#293AAA'], 
+        [0.8, '#001075'], 
+        [1.0, '#000B51']  
+    ] 
+    
+    # Points coloured by front rank, the Pareto front darkest
+    marker = dict(
+        size=4,
+        color=ranks[shown],
+        colorscale=custom_colorscale,
+        reversescale=True,
+        symbol='x',
+        colorbar={
+            'title': "Front",
+            'thickness': 10,
+            'tickfont': tickfont,
+            'titlefont': titlefont,
+            'orientation': 'h',
+            'outlinecolor': '#D0D0D0'
+        }
+    )
     
-    # Add pareto optimality scatter plot
+    # Add pareto optimality scatter plot, individual details are fetched on hover by index
     fig = go.Figure()
     
-    fig.add_trace(go.Scatter(
-        x=obj1,
-        y=obj2,
+    fig.add_trace(scatter_trace(
+        obj1,
+        obj2,
         mode='markers',
-        marker=marker
+        marker=marker,
+        customdata=shown,
+        hovertemplate="%{x:.4g}, %{y:.4g}<extra></extra>",
+    ))
+    
+    # Highlight the Pareto front, connected in the order of the first objective if it's a curve
+    front = np.flatnonzero(ranks[shown] == 1)
+    front = front[np.argsort(obj1[front], kind="stable")]
+    
+    fig.add_trace(scatter_trace(
+        obj1[front],
+        obj2[front],
+        mode='lines+markers' if numb_fo == 2 else 'markers',
+        line={'color': '#6173E9', 'width': 1},
+        marker={'size': 8, 'color': '#6173E9', 'line': {'color': '#FFFFFF', 'width': 1}},
+        customdata=shown[front],
+        hovertemplate="%{x:.4g}, %{y:.4g}<extra>Pareto front</extra>",
     ))
     
     # Update layout of figure
@@ -350,25 +350,113 @@ def get_pareto_optimality_fig(run, generation_range=None, max_width=600, height=
         margin={'l': 10, 'b': 0, 't': 0, 'r': 10},
         showlegend=False,
         plot_bgcolor='rgba(0,0,0,0)',
-        hovermode="x",
+        hovermode="closest",
     )
     
     # Add plot to a dash component
-    graph_div = dcc.Graph(
-        figure=fig, 
-        style={'height': height, 'max-width': max_width},
+    graph_div = html.Div(
+        [
+            dcc.Graph(
+                figure=fig, 
+                style={'height': height, 'max-width': max_width},
+                id="pareto-optimality-graph",
+            ),
+            html.P(id="pareto-optimality-info", style={"margin": "5px", "font-size": "11px", "min-height": "15px"}),
+            dcc.Store(id="pareto-optimality-version", data=version),
+        ]
     )
     
     return graph_div
 
+@callback(Output("pareto-optimality-info", "children"), Input("pareto-optimality-graph", "hoverData"), State("pareto-optimality-version", "data"), State("run-name", "data"), prevent_initial_call=True)
+def show_pareto_individual(hover_data, version, run_name=None):
+    """
+    Show the details of the individual hovered in the Pareto optimality plot.
+
+    Args:
+        hover_data (dict): Hover data of the graph, the custom data of a point is its index in the Pareto fronts.
+        version (int): Run version the plot was rendered at.
+        run_name (str, optional): Name of the run shown by the page.
+
+    Returns:
+        str: Name, generation, front and objective values of the individual.
+
+    Raises:
+        PreventUpdate: If nothing is hovered or the run changed since the plot was rendered, the index could point to
+            another individual then.
+    """
+    if not hover_data or "customdata" not in hover_data["points"][0]:
+        raise PreventUpdate
+    
+    run = resolve_run(run_name)
+    idx = hover_data["points"][0]["customdata"]
+    fronts = get_pareto_fronts(run, pareto_plot_objectives(run))
+    
+    # Versions only grow, an unchanged version after the lookup means the fronts are the rendered ones
+    if get_run_version(run) != version or idx >= len(fronts["individual"]):
+        raise PreventUpdate
+    
+    measurements = get_meas_info(run)
+    values = ", ".join(f"{measurements[meas]['displayname']}: {value:.4g}" for meas, value in zip(fronts["objectives"], fronts["values"][idx]))
+    
+    return f"{fronts['individual'][idx]} (Generation {fronts['generation'][idx]}), Front {fronts['rank'][idx]} - {values}"
+
+
+### LAZY CONTENT ###
+def rendered_version_id(id):
+    """ID of the store holding the run version the content of a lazy Div was rendered at."""
+    if isinstance(id, dict):
+        return {**id, "type": f"{id['type']}-version"}
+    return f"{id}-version"
+
+def lazy_content(id, min_height=0):
+    """
+    Placeholder of page content that is rendered by a callback.
+
+    Args:
+        id (str or dict): ID of the Div the callback fills.
+        min_height (int): Height reserved for the content.
+
+    Returns:
+        dash_core_components.Loading: Loading indicator around the empty Div and the store of its rendered run version.
+    """
+    return dcc.Loading([html.Div(id=id, style={"min-height": min_height}), dcc.Store(id=rendered_version_id(id))], type="dot", color="#6173E9")
+
+def render_tab_content(tab, content_tab, version, rendered):
+    """
+    Check whether a callback has to render content of a tab.
+
+    Content is rendered when its tab is active and it wasn't rendered at the current run version yet, so content
+    of a tab hidden while the run data changed is rendered again when the tab is shown.
+
+    Args:
+        tab (str): Value of the active tab.
+        content_tab (str): Value of the tab holding the content.
+        version (int): Current run version of the 'run-version' store.
+        rendered (dict): Data of the rendered version store of the content, None before the first rendering.
+
+    Returns:
+        dict: New data of the rendered version store.
+
+    Raises:
+        PreventUpdate: If the content doesn't need to be rendered.
+    """
+    if tab != content_tab or rendered == {"version": version}:
+        raise PreventUpdate
+
+    return {"version": version}
+
 
 ### GENERAL RUN OVERVIEW ###
-def general_overview():
+def general_cards(run):
     """
-    Generate a Dash Grid component containing the general overview of run results.
+    Generate the cards of processed generations and healthy and unhealthy individuals.
+
+    Args:
+        run (str): The directory of the run results.
 
     Returns:
-        dash_mantine_components.Grid: Dash Grid component containing general overview.
+        dash_mantine_components.Stack: Stack of the cards.
     """
     
     tot_gen = get_hyperparameters(run)["generations"]["value"]
@@ -378,14 +466,22 @@ def general_overview():
     gen_processed = bullet_chart_card_basic(processed_gen, 1, tot_gen, unit='Generations processed', info='Generations', back_color='#6173E9', bar_color='#A4B0FE', load_color='#FFFFFF', margin='0px', min_width='260px', flex='1')
     ind_healthy = parameter_card("Healthy Individuals", len(healthy), icon='icon-park-outline:health', margin='0px', width='100%')
     ind_unhealthy = parameter_card("Unhealthy Individuals", len(unhealthy), icon='mdi:robot-dead-outline', margin='0px', width='100%')
-    fitness_plot = graph_meas_over_gen(run, 'fitness', generation_range=None, min=0, max=1, height=222.5, title="Fitness over generations", xaxis_title="", yaxis_title="")
-    pareto_optimality_plot = get_pareto_optimality_fig(run, height=222.5)
+    
+    return dmc.Stack([gen_processed, ind_healthy, ind_unhealthy])
+
+def general_overview():
+    """
+    Generate a Dash Grid component containing the general overview of run results.
 
+    Returns:
+        dash_mantine_components.Grid: Dash Grid component containing general overview.
+    """
+    
     general_overview = dmc.Grid(
         [
-            dmc.Col(dmc.Stack([gen_processed, ind_healthy, ind_unhealthy]), span="auto"),
-            dmc.Col(fitness_plot, span="auto", className="col-results-page"), 
-            dmc.Col(pareto_optimality_plot, span="auto", className="col-results-page"),
+            dmc.Col(lazy_content("results-general-cards", 222.5), span="auto"),
+            dmc.Col(lazy_content("results-fitness-plot", 222.5), span="auto", className="col-results-page"), 
+            dmc.Col(lazy_content("results-pareto-plot", 222.5), span="auto", className="col-results-page"),
         ],
         gutter=grid_gutter,
         grow=True,
@@ -395,9 +491,30 @@ def general_overview():
     
     return general_overview
 
+@callback(Output("results-general-cards", "children"), Output("results-general-cards-version", "data"), Input("run-results-tabs", "value"), Input("run-version", "data"), State("results-general-cards-version", "data"), State("run-name", "data"))
+def set_general_cards(tab, version, rendered, run_name=None):
+    """Render the general run cards when the plots tab is shown or the run data changed."""
+    rendered = render_tab_content(tab, "plots", version, rendered)
+    run = resolve_run(run_name)
+    return general_cards(run), rendered
+
+@callback(Output("results-fitness-plot", "children"), Output("results-fitness-plot-version", "data"), Input("run-results-tabs", "value"), Input("run-version", "data"), State("results-fitness-plot-version", "data"), State("run-name", "data"))
+def set_fitness_plot(tab, version, rendered, run_name=None):
+    """Render the fitness plot when the plots tab is shown or the run data changed."""
+    rendered = render_tab_content(tab, "plots", version, rendered)
+    run = resolve_run(run_name)
+    return graph_meas_over_gen(run, 'fitness', generation_range=None, min=0, max=1, height=222.5, title="Fitness over generations", xaxis_title="", yaxis_title=""), rendered
+
+@callback(Output("results-pareto-plot", "children"), Output("results-pareto-plot-version", "data"), Input("run-results-tabs", "value"), Input("run-version", "data"), State("results-pareto-plot-version", "data"), State("run-name", "data"))
+def set_pareto_plot(tab, version, rendered, run_name=None):
+    """Render the Pareto optimality plot when the plots tab is shown or the run data changed."""
+    rendered = render_tab_content(tab, "plots", version, rendered)
+    run = resolve_run(run_name)
+    return get_pareto_optimality_fig(run, height=222.5), rendered
+
 
 ### INDIVIDUAL RUN RESULTS PLOT ###
-def objectives_overview():
+def objectives_overview(run):
     
     measurements = get_meas_info(run)
     objective_trends = []
@@ -414,7 +531,7 @@ def objectives_overview():
                 dmc.Col(
                     [
                         dot_heading(heading, style={"font-size": "14px"}, className='dot-heading-results-page'), 
-                        graph_meas_over_gen(run, measurement, generation_range=None, min=meas_info.get("min-boundary", None), max=meas_info.get("max-boundary", None), height=fitn_obj_height, width=950)
+                        lazy_content({"type": "results-objective-plot", "index": measurement}, fitn_obj_height)
                     ], 
                     className="col-results-page"
                 )
@@ -429,10 +546,34 @@ def objectives_overview():
     
     return objectives_overview
 
+@callback(
+    Output({"type": "results-objective-plot", "index": MATCH}, "children"), Output({"type": "results-objective-plot-version", "index": MATCH}, "data"),
+    Input({"type": "results-objective-plot", "index": MATCH}, "id"), Input("run-results-tabs", "value"), Input("run-version", "data"), 
+    State({"type": "results-objective-plot-version", "index": MATCH}, "data"), State("run-name", "data"))
+def set_objective_plot(id, tab, version, rendered, run_name=None):
+    """Render the plot of the measurement in the ID when the plots tab is shown or the run data changed."""
+    rendered = render_tab_content(tab, "plots", version, rendered)
+    run = resolve_run(run_name)
+    
+    measurement = id["index"]
+    meas_info = get_meas_info(run)[measurement]
+    
+    return graph_meas_over_gen(run, measurement, generation_range=None, min=meas_info.get("min-boundary", None), max=meas_info.get("max-boundary", None), height=fitn_obj_height, width=950, id=f"graph-meas-over-gen-{measurement}"), rendered
+
 
 ### BEST INDIVIDUALS PLOT ###
 
-def best_individuals_overview():
+@cached_figure
+def best_individuals_overview(run):
+    """
+    Generate the chromosomes of the fittest individual of every generation.
+
+    Args:
+        run (str): Path to the run results.
+
+    Returns:
+        dash_mantine_components.Group: Avatars and chromosomes of the fittest individuals, cached per run version.
+    """
     
     genomes = []
     best_individuals = get_best_individuals(run)
@@ -487,12 +628,12 @@ def best_individuals_overview():
 
 ### PAGE LAYOUT ###
 
-def performance_plots_div():
+def performance_plots_div(run):
     return html.Div(
         children=[
             html.H1("Run Result Plots", style={'margin-bottom': '25px', 'margin-top': '25px'}),
             general_overview(),
-            objectives_overview(),
+            objectives_overview(run),
         ]
     )
 
@@ -500,26 +641,47 @@ def best_individuals_div():
     return html.Div(
         children=[
             html.H1("Fittest Individuals", style={'margin-bottom': '25px', 'margin-top': '25px'}),
-            best_individuals_overview()
+            lazy_content("results-best-individuals", 100)
         ]
     )
 
-def run_results_layout():
-    return dmc.Tabs(
-    [
-        dmc.TabsList(
-            [
-                dmc.Tab("Run results plots", value="plots"),
-                dmc.Tab("Fittest individuals", value="best-individuals"),
-            ]
-        ),
-        dmc.TabsPanel(performance_plots_div(), value="plots"),
-        dmc.TabsPanel(best_individuals_div(), value="best-individuals"),
-    ],
-    color="indigo",
-    orientation="horizontal",
-    variant="default",
-    value="plots"
-)
-
-layout = run_results_layout
\ No newline at end of file
+@callback(Output("results-best-individuals", "children"), Output("results-best-individuals-version", "data"), Input("run-results-tabs", "value"), Input("run-version", "data"), State("results-best-individuals-version", "data"), State("run-name", "data"))
+def set_best_individuals(tab, version, rendered, run_name=None):
+    """Render the fittest individuals when their tab is shown or the run data changed."""
+    rendered = render_tab_content(tab, "best-individuals", version, rendered)
+    run = resolve_run(run_name)
+    return best_individuals_overview(run), rendered
+
+def run_results_layout(run=None, **kwargs):
+    """
+    Skeleton of the run results page, the plots are rendered by callbacks once their tab is active.
+
+    Args:
+        run (str, optional): Name of the run selected by the 'run' URL parameter, default is the run of RUN_RESULTS_PATH.
+
+    Returns:
+        dash_html_components.Div: The run stores and tabs with placeholders of the plots and fittest individuals.
+    """
+    run = resolve_run(run)
+    
+    tabs = dmc.Tabs(
+        [
+            dmc.TabsList(
+                [
+                    dmc.Tab("Run results plots", value="plots"),
+                    dmc.Tab("Fittest individuals", value="best-individuals"),
+                ]
+            ),
+            dmc.TabsPanel(performance_plots_div(run), value="plots"),
+            dmc.TabsPanel(best_individuals_div(), value="best-individuals"),
+        ],
+        color="indigo",
+        orientation="horizontal",
+        variant="default",
+        value="plots",
+        id="run-results-tabs"
+    )
+    
+    return html.Div([run_data_stores(run), tabs])
+
+layout = run_results_layout
@@ -0,0 +1,274 @@
+import numpy as np
+from bisect import bisect_left, bisect_right
+from runstore import get_run_store
+from evolution import get_meas_info
+from measurements import get_results_table
+
+##########################################################################################
+
+# MODULE PARETO
+
+# The Pareto Module sorts the healthy individuals of a run into non-dominated fronts over
+# the objectives flagged 'pareto-optimlity-plot' in config.json. Each objective is
+# minimized unless its config entry sets "direction": "max". Up to three objectives are
+# ranked in one sweep over the points in lexicographic order with a binary search over the
+# fronts, more objectives by repeated vectorized dominance checks. Fronts and crowding
+# distances are cached per run version.
+# Parameters: run (str) The directory of the run results.
+
+###########################################################################################
+
+DIRECTIONS = ["min", "max"]
+
+
+### OBJECTIVES ###
+
+def get_pareto_objectives(run):
+    """
+    Get the objectives of the Pareto optimality plot and their optimization direction.
+
+    Args:
+        run (str): The directory of the run results.
+
+    Returns:
+        dict: Measurement key to "min" or "max" for each measurement flagged 'pareto-optimlity-plot'.
+
+    Raises:
+        ValueError: If a measurement has a direction other than "min" or "max".
+
+    Example:
+        >>> get_pareto_objectives('my_run')
+        {'memory_footprint_h5': 'min', 'inference_time': 'min', 'val_acc': 'max'}
+    """
+    objectives = {}
+
+    for meas, meas_info in get_meas_info(run).items():
+        if meas_info.get("pareto-optimlity-plot", False):
+            direction = meas_info.get("direction", "min")
+
+            if direction not in DIRECTIONS:
+                raise ValueError(f"Invalid direction of {meas}. Allowed values are {DIRECTIONS}.")
+
+            objectives[meas] = direction
+
+    return objectives
+
+
+### NON-DOMINATED SORTING ###
+
+def _sweep_ranks_2d(xs):
+    """Front index of lexicographically sorted unique points with two objectives, xs are the second objectives."""
+    # Smallest second objective per front, non-decreasing over the fronts
+    front_min = []
+    ranks = []
+
+    for x in xs:
+        rank = bisect_right(front_min, x)
+        ranks.append(rank)
+
+        if rank == len(front_min):
+            front_min.append(x)
+        else:
+            front_min[rank] = x
+
+    return np.array(ranks, dtype=np.int64)
+
+def _sweep_ranks_3d(xs, ys):
+    """
+    Front index of lexicographically sorted unique points with three objectives.
+
+    Only earlier points can dominate a point, so the front of a point is the first front
+    of which no earlier member is at most as large in the second and third objective. Each
+    front keeps the staircase of its members in these two objectives for this lookup.
+    """
+    fronts_x = []
+    fronts_y = []
+    ranks = []
+
+    for x, y in zip(xs, ys):
+        low, high = 0, len(fronts_x)
+
+        # Being dominated by a front implies being dominated by all previous fronts
+        while low < high:
+            mid = (low + high) >> 1
+            idx = bisect_right(fronts_x[mid], x) - 1
+
+            if idx >= 0 and fronts_y[mid][idx] <= y:
+                low = mid + 1
+            else:
+                high = mid
+
+        ranks.append(low)
+
+        if low == len(fronts_x):
+            fronts_x.append([x])
+            fronts_y.append([y])
+            continue
+
+        front_x, front_y = fronts_x[low], fronts_y[low]
+        start = bisect_left(front_x, x)
+        stop = start
+
+        # Remove the staircase points the new point dominates
+        while stop < len(front_y) and front_y[stop] >= y:
+            stop += 1
+
+        front_x[start:stop] = [x]
+        front_y[start:stop] = [y]
+
+    return np.array(ranks, dtype=np.int64)
+
+def _peel_ranks(points):
+    """Front index of unique points with any number of objectives by repeatedly removing the non-dominated points."""
+    ranks = np.full(len(points), -1, dtype=np.int64)
+    remaining = np.arange(len(points))
+    front = 0
+
+    while len(remaining):
+        candidates = points[remaining]
+        dominated = np.zeros(len(remaining), dtype=bool)
+
+        for start in range(0, len(remaining), 256):
+            block = candidates[start:start + 256]
+            weakly = np.all(candidates[:, None, :] <= block[None, :, :], axis=2)
+            strictly = np.any(candidates[:, None, :] < block[None, :, :], axis=2)
+            dominated[start:start + 256] = np.any(weakly & strictly, axis=0)
+
+        ranks[remaining[~dominated]] = front
+        remaining = remaining[dominated]
+        front += 1
+
+    return ranks
+
+def non_dominated_sort(objectives):
+    """
+    Sort points into non-dominated fronts, all objectives are minimized.
+
+    Args:
+        objectives (numpy.ndarray): Array of shape (points, objectives) without NaN values.
+
+    Returns:
+        numpy.ndarray: Front rank per point, 1 for the Pareto front.
+
+    Example:
+        >>> non_dominated_sort(np.array([[1, 2], [2, 1], [2, 2], [3, 3]]))
+        array([1, 1, 2, 3])
+    """
+    objectives = np.asarray(objectives, dtype=np.float64)
+
+    if len(objectives) == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    # Equal points share their rank, unique points are ranked in lexicographic order
+    order = np.lexsort(objectives.T[::-1])
+    ordered = objectives[order]
+    first = np.r_[True, np.any(ordered[1:] != ordered[:-1], axis=1)]
+    unique = ordered[first]
+    inverse = np.empty(len(objectives), dtype=np.int64)
+    inverse[order] = np.cumsum(first) - 1
+
+    if unique.shape[1] == 1:
+        ranks = np.arange(len(unique))
+    elif unique.shape[1] == 2:
+        ranks = _sweep_ranks_2d(unique[:, 1].tolist())
+    elif unique.shape[1] == 3:
+        ranks = _sweep_ranks_3d(unique[:, 1].tolist(), unique[:, 2].tolist())
+    else:
+        ranks = _peel_ranks(unique)
+
+    return ranks[inverse] + 1
+
+def crowding_distance(objectives, ranks):
+    """
+    Crowding distance of each point within its front.
+
+    Args:
+        objectives (numpy.ndarray): Array of shape (points, objectives).
+        ranks (numpy.ndarray): Front rank per point.
+
+    Returns:
+        numpy.ndarray: Sum of the normalized distances between the neighbours of a point in each objective,
+        infinite for the boundary points of a front.
+    """
+    objectives = np.asarray(objectives, dtype=np.float64)
+    n = len(objectives)
+    distance = np.zeros(n)
+
+    if n == 0:
+        return distance
+
+    for m in range(objectives.shape[1]):
+        order = np.lexsort((objectives[:, m], ranks))
+        values = objectives[order, m]
+        group = ranks[order]
+
+        first = np.r_[True, group[1:] != group[:-1]]
+        last = np.r_[group[1:] != group[:-1], True]
+        starts = np.flatnonzero(first)
+        stops = np.flatnonzero(last)
+        span = np.repeat(values[stops] - values[starts], stops - starts + 1)
+
+        gap = np.zeros(n)
+        gap[1:-1] = values[2:] - values[:-2]
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            contribution = np.where(span > 0, gap / span, 0.0)
+
+        contribution[first | last] = np.inf
+        distance[order] += contribution
+
+    return distance
+
+
+### PARETO FRONTS ###
+
+def get_pareto_fronts(run, objectives=None):
+    """
+    Get the non-dominated fronts of the healthy individuals of a run.
+
+    Individuals missing a value of one of the objectives are left out.
+
+    Args:
+        run (str): The directory of the run results.
+        objectives (list, optional): Measurement keys to optimize. Default are the objectives of get_pareto_objectives.
+
+    Returns:
+        dict: "objectives" (list of measurement keys), "directions" (list of "min"/"max"), and NumPy arrays with one
+        entry per individual: "generation", "individual", "values" (shape individuals x objectives, as measured),
+        "rank" (1 for the Pareto front) and "crowding".
+
+    Example:
+        >>> fronts = get_pareto_fronts('my_run')
+        >>> fronts["individual"][fronts["rank"] == 1]
+        array(['notorious_wren', ...], dtype=object)
+    """
+    directions = get_pareto_objectives(run)
+    objectives = list(directions) if objectives is None else list(objectives)
+
+    def build():
+        table = get_results_table(run)
+        rows = table["healthy"].copy()
+        columns = []
+
+        for meas in objectives:
+            values = table[meas] if meas in table else np.full(len(rows), np.nan)
+            rows &= ~np.isnan(values)
+            columns.append(values)
+
+        values = np.column_stack(columns)[rows] if columns else np.zeros((int(rows.sum()), 0))
+        signs = np.array([-1.0 if directions.get(meas, "min") == "max" else 1.0 for meas in objectives])
+        minimized = values * signs
+
+        ranks = non_dominated_sort(minimized) if objectives else np.ones(len(values), dtype=np.int64)
+
+        return {
+            "objectives": objectives,
+            "directions": [directions.get(meas, "min") for meas in objectives],
+            "generation": table["generation"][rows],
+            "individual": table["individual"][rows],
+            "values": values,
+            "rank": ranks,
+            "crowding": crowding_distance(minimized, ranks),
+        }
+
+    return get_run_store(run).derived(f"pareto/{','.join(objectives)}", build)
@@ -0,0 +1,234 @@
+import os
+import re
+import sys
+import time
+import cProfile
+import itertools
+import threading
+from collections import Counter
+
+##########################################################################################
+
+# MODULE REQUEST PROFILER
+
+# The Request Profiler Module captures profiles of slow Dash callback requests in a running
+# dashboard. While a callback request is answered, a sampler thread records the stack of
+# the thread answering it. If the request takes longer than a threshold, the samples are
+# written as collapsed stacks, the input of flamegraph.pl and speedscope. A request with
+# the 'profile' query parameter, e.g. a callback request replayed with curl, is profiled
+# with cProfile and written as a .pstats file. Files are named by the callback outputs,
+# e.g. 20240101-120000_1234_1_cytoscape-family-tree.elements_2310ms.pstats.
+# Profiling is off unless EVOVIS_PROFILE_DIR names the directory of the profiles.
+
+###########################################################################################
+
+# Duration in milliseconds from which callback requests are captured (EVOVIS_PROFILE_SLOW_MS overrides it)
+PROFILE_SLOW_MS = 1000
+
+# Milliseconds between two stack samples of a request (EVOVIS_PROFILE_SAMPLE_MS overrides it)
+PROFILE_SAMPLE_MS = 5
+
+# Query parameter forcing a cProfile capture of a request
+PROFILE_PARAMETER = "profile"
+
+# Maximum length of the callback outputs in file names
+TAG_LENGTH = 100
+
+
+### CONFIGURATION ###
+
+def get_profile_dir():
+    """Directory of the captured profiles: EVOVIS_PROFILE_DIR, None if profiling is off."""
+    return os.getenv("EVOVIS_PROFILE_DIR") or None
+
+def get_profile_slow_ms():
+    """Duration from which requests are captured: EVOVIS_PROFILE_SLOW_MS or PROFILE_SLOW_MS milliseconds."""
+    return float(os.getenv("EVOVIS_PROFILE_SLOW_MS", PROFILE_SLOW_MS))
+
+def get_profile_sample_ms():
+    """Interval of the stack samples: EVOVIS_PROFILE_SAMPLE_MS or PROFILE_SAMPLE_MS milliseconds."""
+    return float(os.getenv("EVOVIS_PROFILE_SAMPLE_MS", PROFILE_SAMPLE_MS))
+
+
+### STACK SAMPLER ###
+
+def _folded_stack(frame):
+    """Stack of a frame in the collapsed format, outermost call first."""
+    calls = []
+    while frame is not None:
+        code = frame.f_code
+        calls.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(calls))
+
+class StackSampler:
+    """
+    Thread sampling the stacks of registered threads at a fixed interval.
+
+    The sampler thread starts with the first registered thread and waits while no thread is
+    registered, so it costs nothing between requests.
+
+    Example:
+        >>> sampler = StackSampler(0.005)
+        >>> sampler.start(threading.get_ident())
+        >>> ...
+        >>> stacks = sampler.stop(threading.get_ident())
+    """
+
+    def __init__(self, interval):
+        """
+        Args:
+            interval (float): Seconds between two samples.
+        """
+        self.interval = interval
+        self._stacks = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def start(self, thread_id):
+        """Start sampling a thread."""
+        with self._lock:
+            self._stacks[thread_id] = Counter()
+
+            # Started on first use, threads of a process don't survive the fork of a production worker
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="evovis-stack-sampler", daemon=True)
+                self._thread.start()
+
+        self._wake.set()
+
+    def stop(self, thread_id):
+        """
+        Stop sampling a thread.
+
+        Returns:
+            collections.Counter: Number of samples per collapsed stack.
+        """
+        with self._lock:
+            stacks = self._stacks.pop(thread_id, Counter())
+            if not self._stacks:
+                self._wake.clear()
+        return stacks
+
+    def _run(self):
+        own_id = threading.get_ident()
+
+        while True:
+            self._wake.wait()
+            time.sleep(self.interval)
+
+            frames = sys._current_frames()
+
+            with self._lock:
+                for thread_id, stacks in self._stacks.items():
+                    frame = frames.get(thread_id)
+                    if frame is not None and thread_id != own_id:
+                        stacks[_folded_stack(frame)] += 1
+
+            del frames
+
+
+### CAPTURES ###
+
+_captures = itertools.count(1)
+
+def profile_tag(output):
+    """
+    File name part of the outputs of a callback.
+
+    Args:
+        output (str): Outputs of a callback request, e.g. "cytoscape-family-tree.elements" or "..a.children...b.data..".
+
+    Returns:
+        str: The outputs joined by '+' with characters other than letters, digits, '.', '-' and '_' replaced by '_'.
+    """
+    tag = "+".join(part for part in output.strip(".").split("...") if part) or "unknown"
+    return re.sub(r"[^A-Za-z0-9._+-]", "_", tag)[:TAG_LENGTH]
+
+def capture_path(directory, tag, seconds, extension):
+    """Unique path of a capture of a request of a callback."""
+    name = f"{time.strftime('%Y%m%d-%H%M%S')}_{os.getpid()}_{next(_captures)}_{tag}_{round(seconds * 1000)}ms{extension}"
+    return os.path.join(directory, name)
+
+def write_folded(path, stacks):
+    """Write stack samples in the collapsed format, one 'stack count' line per stack."""
+    with open(path, "w") as file:
+        for stack, count in stacks.most_common():
+            file.write(f"{stack} {count}\n")
+
+
+### FLASK HOOKS ###
+
+def install_request_profiler(app):
+    """
+    Capture profiles of slow or marked callback requests of a Dash app, if EVOVIS_PROFILE_DIR is set.
+
+    Args:
+        app (dash.Dash): The dashboard app.
+
+    Example:
+        >>> # EVOVIS_PROFILE_DIR=profiles EVOVIS_PROFILE_SLOW_MS=500
+        >>> install_request_profiler(app)
+        >>> # curl -X POST 'http://localhost:8050/_dash-update-component?profile=1' -H 'Content-Type: application/json' -d @request.json
+    """
+    directory = get_profile_dir()
+
+    if directory is None:
+        return
+
+    import flask
+
+    os.makedirs(directory, exist_ok=True)
+    slow = get_profile_slow_ms() / 1000
+    sampler = StackSampler(get_profile_sample_ms() / 1000)
+    callback_path = app.config.requests_pathname_prefix.rstrip("/") + "/_dash-update-component"
+
+    @app.server.before_request
+    def start_profile():
+        if flask.request.path != callback_path:
+            return
+
+        if PROFILE_PARAMETER in flask.request.args:
+            profile = cProfile.Profile()
+            flask.g.profile = profile
+            profile.enable()
+        else:
+            sampler.start(threading.get_ident())
+
+        flask.g.profile_start = time.perf_counter()
+
+    @app.server.teardown_request
+    def write_profile(exception=None):
+        start = flask.g.pop("profile_start", None)
+
+        if start is None:
+            return
+
+        seconds = time.perf_counter() - start
+        profile = flask.g.pop("profile", None)
+
+        if profile is not None:
+            profile.disable()
+        else:
+            stacks = sampler.stop(threading.get_ident())
+
+            if seconds < slow or not stacks:
+                return
+
+        body = flask.request.get_json(silent=True) or {}
+        output = body.get("output")
+        tag = profile_tag(output if output in app.callback_map else "unknown")
+
+        try:
+            if profile is not None:
+                path = capture_path(directory, tag, seconds, ".pstats")
+                profile.dump_stats(path)
+            else:
+                path = capture_path(directory, tag, seconds, ".folded")
+                write_folded(path, stacks)
+        except OSError as e:
+            print(f"Profile of {tag} not written: {e}")
+            return
+
+        print(f"Profile of {tag} ({seconds * 1000:.0f}ms) written to {path}")
@@ -0,0 +1,299 @@
+import os
+import json
+import numpy as np
+from metrics import record_file_read
+
+##########################################################################################
+
+# MODULE RUN INDEX
+
+# The Run Index Module persists the in-memory tables of a run store in a compact NumPy
+# archive next to crossover_parents.csv. Results are stored as a float matrix with a type
+# per cell and chromosomes as rows of ids into a table of the distinct genes, so a start
+# decodes arrays instead of parsing JSON. The archive holds the modification time and the
+# number of individuals of every generation directory: generations whose directory is
+# unchanged are taken from the archive without a stat of their files. It also holds the
+# modification time and size of every results.json/chromosome.json file, so in a changed
+# generation only individuals whose files changed are parsed again.
+# Parameters: run (str) The directory of the run results.
+
+###########################################################################################
+
+INDEX_FILENAME = "evovis_index.npz"
+
+# Incremented when the layout of the archive changes
+INDEX_FORMAT = 2
+
+# Type codes of the cells of the results matrix, 0 marks a measurement an individual doesn't have
+RESULT_TYPES = {1: float, 2: int, 3: bool}
+
+# Integers above this magnitude lose precision in the float matrix and are stored as JSON
+MAX_EXACT_INT = 2 ** 53
+
+
+### PATH ###
+
+def get_index_path(run):
+    """Path of the index archive of a run."""
+    return os.path.join(run, INDEX_FILENAME)
+
+
+### ENCODING ###
+
+def _stamp_to_arrays(stamps):
+    """Split a list of (mtime_ns, size) stamps into two arrays with -1 for missing files."""
+    mtimes = np.array([stamp[0] if stamp is not None else -1 for stamp in stamps], dtype=np.int64)
+    sizes = np.array([stamp[1] if stamp is not None else -1 for stamp in stamps], dtype=np.int64)
+    return mtimes, sizes
+
+def _arrays_to_stamp(mtime, size):
+    return None if mtime < 0 else (int(mtime), int(size))
+
+def _result_type(value):
+    """Type code of a measurement value, None if it can't be stored in the results matrix."""
+    if isinstance(value, bool):
+        return 3
+    if isinstance(value, int):
+        return 2 if abs(value) <= MAX_EXACT_INT else None
+    if isinstance(value, float):
+        return 1
+    return None
+
+def _json_array(value):
+    return np.frombuffer(json.dumps(value).encode("utf-8"), dtype=np.uint8)
+
+def _encode_results(rows, extras):
+    """
+    Results of individuals as arrays.
+
+    Args:
+        rows (list): Results dictionaries of the individuals.
+        extras (dict): Receives row number to results of rows that aren't dictionaries of numbers, e.g. None or errors.
+
+    Returns:
+        dict: "results_keys", "results_values" and "results_types" (rows x keys), "results_layout" (row to layout,
+        -1 for extras) and the measurement columns of the layouts in key order as flat "results_columns" with offsets.
+    """
+    keys = {}
+    layouts = {}
+    row_layouts = []
+    cells = []
+
+    for idx, results in enumerate(rows):
+        types = [_result_type(value) for value in results.values()] if isinstance(results, dict) else [None]
+
+        if None in types:
+            extras[idx] = results
+            row_layouts.append(-1)
+            continue
+
+        columns = tuple(keys.setdefault(key, len(keys)) for key in results)
+        row_layouts.append(layouts.setdefault(columns, len(layouts)))
+        cells.append((idx, columns, types, list(results.values())))
+
+    values = np.full((len(rows), len(keys)), np.nan, dtype=np.float64)
+    type_codes = np.zeros((len(rows), len(keys)), dtype=np.int8)
+
+    for idx, columns, types, row_values in cells:
+        values[idx, list(columns)] = row_values
+        type_codes[idx, list(columns)] = types
+
+    columns = [column for layout in layouts for column in layout]
+    offsets = np.cumsum([0] + [len(layout) for layout in layouts])
+
+    return {
+        "results_keys": np.array(list(keys), dtype=str),
+        "results_values": values,
+        "results_types": type_codes,
+        "results_layout": np.array(row_layouts, dtype=np.int32),
+        "results_columns": np.array(columns, dtype=np.int32),
+        "results_column_offsets": offsets.astype(np.int64),
+    }
+
+def _decode_results(archive, extras):
+    keys = archive["results_keys"].tolist()
+    columns = archive["results_columns"].tolist()
+    offsets = archive["results_column_offsets"].tolist()
+    layouts = [columns[offsets[idx]:offsets[idx + 1]] for idx in range(len(offsets) - 1)]
+    values = archive["results_values"].tolist()
+    type_codes = archive["results_types"].tolist()
+
+    rows = []
+    for idx, layout in enumerate(archive["results_layout"].tolist()):
+        if layout < 0:
+            rows.append(extras[str(idx)])
+            continue
+
+        row_values, row_types = values[idx], type_codes[idx]
+        rows.append({keys[column]: RESULT_TYPES[row_types[column]](row_values[column]) for column in layouts[layout]})
+
+    return rows
+
+def _encode_chromosomes(rows, extras):
+    """
+    Chromosomes of individuals as rows of gene ids.
+
+    Args:
+        rows (list): Chromosome lists of the individuals.
+        extras (dict): Receives row number to chromosome of rows that aren't lists, e.g. None or errors.
+
+    Returns:
+        dict: "genes" (JSON list of the distinct genes) and the gene ids of the rows as flat "chromosome_genes" with
+        offsets, rows in extras are empty.
+    """
+    genes = {}
+    gene_ids = []
+    offsets = [0]
+
+    # Genes decoded from an archive are shared between individuals, they are serialized once
+    ids_by_object = {}
+
+    for idx, chromosome in enumerate(rows):
+        if not isinstance(chromosome, list):
+            extras[idx] = chromosome
+            offsets.append(len(gene_ids))
+            continue
+
+        for gene in chromosome:
+            gene_id = ids_by_object.get(id(gene))
+
+            if gene_id is None:
+                gene_id = genes.setdefault(json.dumps(gene), len(genes))
+                ids_by_object[id(gene)] = gene_id
+
+            gene_ids.append(gene_id)
+
+        offsets.append(len(gene_ids))
+
+    return {
+        "genes": _json_array([json.loads(gene) for gene in genes]),
+        "chromosome_genes": np.array(gene_ids, dtype=np.int32),
+        "chromosome_offsets": np.array(offsets, dtype=np.int64),
+    }
+
+def _decode_chromosomes(archive, extras):
+    genes = json.loads(archive["genes"].tobytes().decode("utf-8"))
+    gene_ids = archive["chromosome_genes"].tolist()
+    offsets = archive["chromosome_offsets"].tolist()
+
+    rows = []
+    for idx in range(len(offsets) - 1):
+        if str(idx) in extras:
+            rows.append(extras[str(idx)])
+        else:
+            rows.append([genes[gene_id] for gene_id in gene_ids[offsets[idx]:offsets[idx + 1]]])
+
+    return rows
+
+
+### READ AND WRITE ###
+
+def write_index(run, generations, generation_stamps):
+    """
+    Write the tables of a run store to the index archive of the run.
+
+    Args:
+        run (str): The directory of the run results.
+        generations (dict): Generation number to individual name to {"results", "chromosome", "stamp"} entries.
+        generation_stamps (dict): Generation number to the modification time in ns of its directory when its
+            individuals were listed.
+
+    Returns:
+        str: Path of the written archive.
+
+    Raises:
+        OSError: If the archive can't be written to the run directory.
+    """
+    rows = [
+        (generation, individual, entry)
+        for generation, entries in sorted(generations.items())
+        for individual, entry in sorted(entries.items())
+    ]
+
+    results_mtime, results_size = _stamp_to_arrays([entry["stamp"][0] for _, _, entry in rows])
+    chromosome_mtime, chromosome_size = _stamp_to_arrays([entry["stamp"][1] for _, _, entry in rows])
+    results_extras, chromosome_extras = {}, {}
+    stamped = sorted(generation for generation in generations if generation in generation_stamps)
+
+    path = get_index_path(run)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+
+    # np.savez appends .npz to file names without it
+    with open(tmp_path, "wb") as file:
+        np.savez(
+            file,
+            format=np.array(INDEX_FORMAT),
+            generation_numbers=np.array(stamped, dtype=np.int32),
+            generation_mtimes=np.array([generation_stamps[generation] for generation in stamped], dtype=np.int64),
+            generation_counts=np.array([len(generations[generation]) for generation in stamped], dtype=np.int64),
+            generation=np.array([row[0] for row in rows], dtype=np.int32),
+            individual=np.array([row[1] for row in rows], dtype=str),
+            results_mtime=results_mtime,
+            results_size=results_size,
+            chromosome_mtime=chromosome_mtime,
+            chromosome_size=chromosome_size,
+            **_encode_results([entry["results"] for _, _, entry in rows], results_extras),
+            **_encode_chromosomes([entry["chromosome"] for _, _, entry in rows], chromosome_extras),
+            extras=_json_array({"results": results_extras, "chromosome": chromosome_extras}),
+        )
+
+    os.replace(tmp_path, path)
+    return path
+
+def read_index(run):
+    """
+    Read the index archive of a run.
+
+    Args:
+        run (str): The directory of the run results.
+
+    Returns:
+        tuple or None: Generation number to individual name to {"results", "chromosome", "stamp"} entries and
+        generation number to (directory modification time in ns, number of individuals), or None if there is no
+        readable archive in the current format.
+    """
+    path = get_index_path(run)
+
+    if not os.path.isfile(path):
+        return None
+
+    try:
+        with np.load(path, allow_pickle=False) as archive:
+            if int(archive["format"]) != INDEX_FORMAT:
+                return None
+
+            generation_stamps = {
+                generation: (mtime, count)
+                for generation, mtime, count in zip(
+                    archive["generation_numbers"].tolist(), archive["generation_mtimes"].tolist(), archive["generation_counts"].tolist()
+                )
+            }
+            generation = archive["generation"].tolist()
+            individual = archive["individual"].tolist()
+            results_mtime = archive["results_mtime"].tolist()
+            results_size = archive["results_size"].tolist()
+            chromosome_mtime = archive["chromosome_mtime"].tolist()
+            chromosome_size = archive["chromosome_size"].tolist()
+            extras = json.loads(archive["extras"].tobytes().decode("utf-8"))
+            results = _decode_results(archive, extras["results"])
+            chromosomes = _decode_chromosomes(archive, extras["chromosome"])
+
+        record_file_read("index", os.path.getsize(path))
+
+    except (OSError, ValueError, KeyError, IndexError):
+        return None
+
+    generations = {generation: {} for generation in generation_stamps}
+
+    for idx in range(len(generation)):
+        stamp = (
+            _arrays_to_stamp(results_mtime[idx], results_size[idx]),
+            _arrays_to_stamp(chromosome_mtime[idx], chromosome_size[idx]),
+        )
+        generations.setdefault(generation[idx], {})[individual[idx]] = {
+            "results": results[idx],
+            "chromosome": chromosomes[idx],
+            "stamp": stamp,
+        }
+
+    return generations, generation_stamps
@@ -0,0 +1,118 @@
+import os
+from urllib.parse import urlencode
+from bulkload import GENERATION_PATTERN
+
+##########################################################################################
+
+# MODULE RUNS
+
+# The Runs Module lets one dashboard process serve many run directories. Runs are the
+# directory given by RUN_RESULTS_PATH and the run directories inside EVOVIS_RUNS_ROOT.
+# Pages select a run by its name in the 'run' URL parameter, e.g. /results?run=my_run,
+# and resolve names only to these directories, so clients can't read other paths.
+# Parameters: name (str) The name of a run, the base name of its directory.
+
+###########################################################################################
+
+# URL parameter selecting the run of a page
+RUN_PARAMETER = "run"
+
+
+### CONFIGURATION ###
+
+def get_default_run():
+    """Directory of the run shown without a run parameter: RUN_RESULTS_PATH."""
+    return os.getenv("RUN_RESULTS_PATH")
+
+def get_runs_root():
+    """Directory containing run directories: EVOVIS_RUNS_ROOT, None if not set."""
+    return os.getenv("EVOVIS_RUNS_ROOT") or None
+
+
+### RUN DIRECTORIES ###
+
+def is_run_directory(path):
+    """True if the directory contains a config.json file or generation directories."""
+    if os.path.isfile(os.path.join(path, "config.json")):
+        return True
+    try:
+        with os.scandir(path) as entries:
+            return any(GENERATION_PATTERN.match(entry.name) and entry.is_dir() for entry in entries)
+    except (FileNotFoundError, NotADirectoryError, PermissionError):
+        return False
+
+def run_name(run):
+    """Name of a run directory, its base name."""
+    return os.path.basename(os.path.normpath(run))
+
+def list_runs():
+    """
+    Get the runs the dashboard serves.
+
+    Returns:
+        dict: Run name to run directory, the default run first and the runs of the runs root sorted by name.
+
+    Example:
+        >>> list_runs()
+        {'enas_example_run_results': 'enas_example_run_results', 'sweep_lr_0.01': '/data/runs/sweep_lr_0.01'}
+    """
+    runs = {}
+    default = get_default_run()
+
+    if default:
+        runs[run_name(default)] = default
+
+    root = get_runs_root()
+
+    if root and os.path.isdir(root):
+        with os.scandir(root) as entries:
+            for entry in sorted(entries, key=lambda entry: entry.name):
+                if entry.is_dir() and entry.name not in runs and is_run_directory(entry.path):
+                    runs[entry.name] = entry.path
+
+    return runs
+
+def resolve_run(name=None):
+    """
+    Get the directory of a run by its name.
+
+    Args:
+        name (str, optional): Name of the run, the default run if None or empty.
+
+    Returns:
+        str: Directory of the run. Unknown names resolve to the default run, or to the first run of the
+        runs root if RUN_RESULTS_PATH isn't set.
+
+    Example:
+        >>> resolve_run("sweep_lr_0.01")
+        '/data/runs/sweep_lr_0.01'
+    """
+    default = get_default_run()
+    root = get_runs_root()
+
+    if name:
+        if default and name == run_name(default):
+            return default
+
+        # Only direct children of the runs root can be selected
+        if root and name == os.path.basename(name) and name not in (".", ".."):
+            path = os.path.join(root, name)
+            if is_run_directory(path):
+                return path
+
+        print(f"Unknown run '{name}', showing the default run.")
+
+    if default:
+        return default
+
+    runs = list_runs()
+    return next(iter(runs.values()), None)
+
+def run_search(run):
+    """Query string selecting a run, empty for the default run."""
+    default = get_default_run()
+
+    if run is None or (default and os.path.abspath(run) == os.path.abspath(default)):
+        return ""
+
+    return "?" + urlencode({RUN_PARAMETER: run_name(run)})
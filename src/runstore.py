@@ -0,0 +1,720 @@
+import os
+import copy
+import time
+import itertools
+import threading
+from collections import OrderedDict
+from bulkload import file_stamp, scan_generation_stamps, scan_individuals, stamp_individuals, read_individuals, json_to_dict
+from runindex import read_index, write_index
+from metrics import Gauge, register, record_cache
+
+##########################################################################################
+
+# MODULE RUN STORE
+
+# The Run Store Module keeps the data of an EvoNAS run in memory. The run directory is read
+# once into indexed tables (generation -> individual -> results/chromosome). Afterwards
+# queries only compare the modification times of the generation directories and stat the
+# files of incomplete individuals, so new, removed and finished individuals show up without
+# a walk over every file. A background thread compares all files at a longer interval to
+# catch files rewritten in place. Files are read outside of the table lock, queries keep
+# answering from the current tables meanwhile. The tables are seeded from the run index
+# archive (see runindex.py) if one exists. One process keeps the stores of many runs, the
+# least recently used stores are dropped when a store grows above the memory budget, along
+# with the data other modules cached in them.
+# Parameters: run (str) The directory of the run results.
+
+###########################################################################################
+
+# Seconds between two checks of the generation directories of a run for changes
+REFRESH_INTERVAL = 2.0
+
+# Seconds between two background checks of every file of the loaded runs (EVOVIS_VERIFY_INTERVAL overrides it, 0 turns them off)
+VERIFY_INTERVAL = 300.0
+
+# Memory budget in megabytes of all run stores of the process (EVOVIS_RUN_CACHE_MB overrides it)
+RUN_CACHE_MB = 1024
+
+# Factor from the size of the individual files to the memory of their parsed objects
+OBJECT_OVERHEAD = 4
+
+# Versions are drawn from one counter shared by all stores, so a store created again after
+# its eviction never repeats a version its predecessor handed out to caches and pages
+_versions = itertools.count(1)
+
+
+### RUN STORE ###
+
+def _entry_bytes(entry):
+    """Estimated memory of the parsed files of an individual."""
+    return sum(stamp[1] for stamp in entry["stamp"] if stamp is not None) * OBJECT_OVERHEAD
+
+def _is_incomplete(entry):
+    """True if a file of an individual is missing or couldn't be decoded, e.g. while the evolution still writes it."""
+    return any(
+        stamp is None or (isinstance(value, dict) and isinstance(value.get("error"), str))
+        for stamp, value in zip(entry["stamp"], (entry["results"], entry["chromosome"]))
+    )
+
+class RunStore:
+    """
+    In-memory tables of the configuration and the individuals of an EvoNAS run.
+
+    The tables are filled on the first access and kept up to date by refresh(), which rescans generation directories
+    whose modification time changed and stats the files of incomplete individuals. verify() compares the modification
+    time and size of every results.json/chromosome.json file with the values seen at the last read. Only changed files
+    are read again. The returned objects are shared between callers and must be treated as read-only.
+
+    On the first refresh, generations whose directory has the modification time and number of individuals recorded in
+    the run index archive are taken from the archive without a stat of their files. The archive is rewritten if any
+    generation had to be read from its files.
+
+    Attributes:
+        run (str): The directory of the run results.
+        version (int): Number that increases on every change of the loaded data.
+        nbytes (int): Estimated memory of the loaded data in bytes.
+        pinned (bool): The store is never evicted from the registry, e.g. while a live watcher follows it.
+        watched (bool): A live watcher ingests the changes of the run, the background check skips the store.
+        use_index (bool): Read and write the run index archive.
+        workers (int): Number of reader threads, None for the bulk load default.
+    """
+
+    def __init__(self, run, refresh_interval=None, use_index=None, workers=None):
+        self.run = run
+        self.version = next(_versions)
+        self.nbytes = 0
+        self.pinned = False
+        self.watched = False
+        self.refresh_interval = refresh_interval
+        self.workers = workers
+        self.use_index = use_index if use_index is not None else os.getenv("EVOVIS_INDEX", "1") != "0"
+
+        # The table lock guards the tables, the refresh lock serializes the threads updating them
+        self._lock = threading.RLock()
+        self._refresh_lock = threading.Lock()
+        self._last_refresh = None
+
+        # generation (int) -> individual (str) -> {"results", "chromosome", "stamp"}
+        self._generations = {}
+        self._generation_mtimes = {}
+        self._incomplete = set()
+        self._config = None
+        self._config_stamp = None
+        self._components = {}
+        self._derived = {}
+        self._cached = {}
+        self._build_locks = {}
+
+    ### REFRESH ###
+
+    def _refresh_due(self):
+        if self._last_refresh is None:
+            return True
+
+        interval = self.refresh_interval
+        if interval is None:
+            interval = float(os.getenv("EVOVIS_REFRESH_INTERVAL", REFRESH_INTERVAL))
+
+        return time.monotonic() - self._last_refresh >= interval
+
+    def refresh(self, force=False):
+        """
+        Synchronize the in-memory tables with the run directory.
+
+        The first refresh loads the run, later ones are skipped while another thread updates the tables.
+
+        Args:
+            force (bool): Check the directory even if the refresh interval hasn't passed, after running updates.
+
+        Returns:
+            bool: True if any data changed.
+        """
+        if not force and not self._refresh_due():
+            return False
+
+        if not self._refresh_lock.acquire(blocking=force or self._last_refresh is None):
+            return False
+
+        try:
+            # Another thread may have refreshed while this one waited
+            if not force and not self._refresh_due():
+                return False
+
+            changed = self._load() if self._last_refresh is None else self._check()
+            self._last_refresh = time.monotonic()
+            return changed
+        finally:
+            self._refresh_lock.release()
+
+    def verify(self):
+        """
+        Compare every file of the run with the tables and read the changed ones, e.g. files rewritten in place.
+
+        Returns:
+            bool: True if any data changed.
+        """
+        with self._refresh_lock:
+            if self._last_refresh is None:
+                changed = self._load()
+                self._last_refresh = time.monotonic()
+                return changed
+
+            generations = self._scan_run()
+
+            with self._lock:
+                known = {
+                    generation: {individual: entry["stamp"] for individual, entry in entries.items()}
+                    for generation, entries in self._generations.items()
+                }
+
+            changes = {}
+            for generation, (generation_path, _) in generations.items():
+                individuals = scan_individuals(generation_path)
+                stamps = known.get(generation, {})
+                changes[generation] = (self._read_changed(individuals, stamps), stamps.keys() - individuals.keys())
+
+            removed = [generation for generation in known if generation not in generations]
+            mtimes = {generation: mtime for generation, (_, mtime) in generations.items()}
+            changed = self._apply(changes, removed, mtimes)
+
+            return self._sync_config() or changed
+
+    def _scan_run(self):
+        if not os.path.exists(self.run):
+            raise FileNotFoundError(f"Run directory not found: {self.run}")
+
+        return scan_generation_stamps(self.run)
+
+    def _load(self):
+        """Read the run into empty tables, generations whose directory matches the run index archive aren't read."""
+        cached = read_index(self.run) if self.use_index else None
+        cached_generations, cached_stamps = cached if cached is not None else ({}, {})
+        generations = self._scan_run()
+        changes = {}
+        stale = cached is None
+
+        for generation, (generation_path, mtime) in generations.items():
+            individuals = scan_individuals(generation_path)
+            known = cached_generations.get(generation, {})
+
+            # Individuals of an unchanged directory are taken from the archive, only incomplete ones are checked
+            if cached_stamps.get(generation) == (mtime, len(individuals)) and known.keys() == individuals.keys():
+                check = {individual: individuals[individual] for individual, entry in known.items() if _is_incomplete(entry)}
+            else:
+                check = individuals
+                stale = True
+
+            entries = self._read_changed(check, {individual: entry["stamp"] for individual, entry in known.items()})
+            stale = stale or bool(entries)
+
+            for individual in individuals:
+                if individual not in entries:
+                    entries[individual] = known[individual]
+
+            changes[generation] = (entries, ())
+
+        stale = stale or any(generation not in generations for generation in cached_generations)
+
+        self._apply(changes, mtimes={generation: mtime for generation, (_, mtime) in generations.items()})
+        self._sync_config()
+
+        if self.use_index and stale:
+            self.save_index()
+
+        return True
+
+    def _check(self):
+        """Rescan generation directories whose modification time changed and stat the files of incomplete individuals."""
+        generations = self._scan_run()
+
+        with self._lock:
+            mtimes = dict(self._generation_mtimes)
+            incomplete = sorted(self._incomplete)
+
+        changes = {}
+        for generation, (generation_path, mtime) in generations.items():
+            if mtimes.get(generation) != mtime:
+                changes[generation] = self._scan_generation(generation, generation_path)
+
+        # Missing files of known individuals, e.g. the results.json of an individual in training
+        for generation, individual in incomplete:
+            if generation not in generations or individual in changes.get(generation, ({}, ()))[1]:
+                continue
+
+            with self._lock:
+                entry = self._generations.get(generation, {}).get(individual)
+
+            if entry is not None:
+                path = os.path.join(generations[generation][0], individual)
+                entries, _ = changes.setdefault(generation, ({}, set()))
+                entries.update(self._read_changed({individual: path}, {individual: entry["stamp"]}))
+
+        removed = [generation for generation in mtimes if generation not in generations]
+        changed = self._apply(changes, removed, {generation: mtime for generation, (_, mtime) in generations.items()})
+
+        return self._sync_config() or changed
+
+    def _scan_generation(self, generation, generation_path):
+        """New individuals of a generation directory read from their files and the names of removed individuals."""
+        individuals = scan_individuals(generation_path)
+
+        with self._lock:
+            known = set(self._generations.get(generation, {}))
+
+        added = {individual: path for individual, path in individuals.items() if individual not in known}
+        return self._read_changed(added, {}), known - individuals.keys()
+
+    def _read_changed(self, individuals, known):
+        """
+        Read the individuals whose files differ from the stamps seen at the last read.
+
+        Args:
+            individuals (dict): Individual name to individual directory.
+            known (dict): Individual name to the (results stamp, chromosome stamp) of the last read.
+
+        Returns:
+            dict: Individual name to {"results", "chromosome", "stamp"} of the new and changed individuals.
+        """
+        items = list(individuals.items())
+        stamps = stamp_individuals([path for _, path in items], self.workers)
+        stale = [(individual, path, stamp) for (individual, path), stamp in zip(items, stamps) if known.get(individual) != stamp]
+        entries = read_individuals([path for _, path, _ in stale], workers=self.workers)
+
+        for (_, _, stamp), entry in zip(stale, entries):
+            entry["stamp"] = stamp
+
+        return {individual: entry for (individual, _, _), entry in zip(stale, entries)}
+
+    def _remove_entry(self, generation, individual, entry):
+        self.nbytes -= _entry_bytes(entry)
+        self._incomplete.discard((generation, individual))
+
+    def _add_entry(self, generation, individual, entry):
+        self.nbytes += _entry_bytes(entry)
+        if _is_incomplete(entry):
+            self._incomplete.add((generation, individual))
+
+    def _apply(self, changes, removed_generations=(), mtimes=None):
+        """
+        Apply read changes to the tables.
+
+        Args:
+            changes (dict): Generation number to (individual name to new entry, names of removed individuals).
+            removed_generations (list): Generation numbers whose directories were removed.
+            mtimes (dict, optional): Generation number to the modification time of its directory before it was scanned.
+
+        Returns:
+            bool: True if any data changed.
+        """
+        changed = False
+
+        with self._lock:
+            for generation in removed_generations:
+                self._generation_mtimes.pop(generation, None)
+                entries = self._generations.pop(generation, None)
+
+                if entries is not None:
+                    for individual, entry in entries.items():
+                        self._remove_entry(generation, individual, entry)
+                    changed = True
+
+            for generation, (entries, removed) in changes.items():
+                if generation not in self._generations:
+                    self._generations[generation] = {}
+                    changed = True
+
+                table = self._generations[generation]
+
+                for individual in removed:
+                    entry = table.pop(individual, None)
+                    if entry is not None:
+                        self._remove_entry(generation, individual, entry)
+                        changed = True
+
+                for individual, entry in entries.items():
+                    if individual in table:
+                        self._remove_entry(generation, individual, table[individual])
+                    table[individual] = entry
+                    self._add_entry(generation, individual, entry)
+                    changed = True
+
+            self._generation_mtimes.update(mtimes or {})
+
+            if changed:
+                self.version = next(_versions)
+
+        if changed:
+            _fit_budget(self)
+
+        return changed
+
+    ### INGEST ###
+
+    def _sync_config(self):
+        config_stamp = file_stamp(os.path.join(self.run, "config.json"))
+
+        with self._lock:
+            if config_stamp == self._config_stamp:
+                return False
+
+            self._config = None
+            self._config_stamp = config_stamp
+            self.version = next(_versions)
+            return True
+
+    def ingest(self, generation=None, individual=None):
+        """
+        Synchronize a part of the in-memory tables with the run directory, e.g. after a file system event.
+
+        Args:
+            generation (int, optional): Generation whose individuals are added or removed. Without a generation only config.json is checked.
+            individual (str, optional): Individual of the generation whose files are read again if they changed.
+
+        Returns:
+            bool: True if any data changed.
+        """
+        with self._refresh_lock:
+            if generation is None:
+                return self._sync_config()
+
+            generation_path = os.path.join(self.run, f"Generation_{generation}")
+
+            if not os.path.isdir(generation_path):
+                return self._apply({}, [generation])
+
+            if individual is None:
+                mtime = os.stat(generation_path).st_mtime_ns
+                return self._apply({generation: self._scan_generation(generation, generation_path)}, mtimes={generation: mtime})
+
+            individual_path = os.path.join(generation_path, individual)
+
+            if not os.path.isdir(individual_path):
+                return self._apply({generation: ({}, [individual])})
+
+            with self._lock:
+                entry = self._generations.get(generation, {}).get(individual)
+
+            known = {} if entry is None else {individual: entry["stamp"]}
+            return self._apply({generation: (self._read_changed({individual: individual_path}, known), ())})
+
+    def touch(self):
+        """Increment the version after a change of run data kept outside the tables, e.g. crossover_parents.csv."""
+        with self._lock:
+            self.version = next(_versions)
+
+    def save_index(self):
+        """
+        Write the loaded tables to the run index archive.
+
+        Returns:
+            bool: True if the archive was written, False if the run directory isn't writable.
+        """
+        # Entries are replaced and never modified, a shallow copy is a consistent snapshot
+        with self._lock:
+            generations = {generation: dict(entries) for generation, entries in self._generations.items()}
+            mtimes = dict(self._generation_mtimes)
+
+        try:
+            write_index(self.run, generations, mtimes)
+            return True
+        except OSError as e:
+            print(f"Run index of {self.run} not written: {e}")
+            return False
+
+    ### QUERIES ###
+
+    def config(self):
+        """Deep copy of the config.json dictionary of the run."""
+        self.refresh()
+        with self._lock:
+            if self._config is None:
+                self._config = json_to_dict(os.path.join(self.run, "config.json"))
+            return copy.deepcopy(self._config)
+
+    def generations(self):
+        """Sorted list of the generation numbers of the run."""
+        self.refresh()
+        with self._lock:
+            return sorted(self._generations)
+
+    def individuals(self, generation):
+        """Sorted list of the individual names of a generation."""
+        self.refresh()
+        with self._lock:
+            return sorted(self._generations.get(generation, {}))
+
+    def individual(self, generation, individual, value):
+        """
+        Get the results or chromosome of a single individual.
+
+        Args:
+            generation (int): The generation number.
+            individual (str): The individual's identifier.
+            value (str): "results" or "chromosome".
+
+        Returns:
+            dict, list or None: The stored value or None if the individual doesn't exist.
+        """
+        self.refresh()
+        with self._lock:
+            entry = self._generations.get(generation, {}).get(individual)
+            return None if entry is None else entry[value]
+
+    def generation_values(self, generation, value):
+        """Dictionary of sorted individual names to their results or chromosome in a generation."""
+        self.refresh()
+        with self._lock:
+            entries = self._generations.get(generation, {})
+            return {individual: entries[individual][value] for individual in sorted(entries)}
+
+    ### COMPONENTS ###
+
+    def component(self, name, factory):
+        """
+        Get a helper object that lives as long as the store, e.g. an index over other run files.
+
+        Args:
+            name (str): Name of the component.
+            factory (callable): Function without arguments creating the component on first access.
+
+        Returns:
+            object: The component.
+        """
+        with self._lock:
+            if name not in self._components:
+                self._components[name] = factory()
+            return self._components[name]
+
+    def _build_lock(self, kind, name):
+        """Lock held while data of a name is built, so concurrent callers wait for one build instead of repeating it."""
+        with self._lock:
+            return self._build_locks.setdefault((kind, name), threading.Lock())
+
+    def derived(self, name, builder, key=None):
+        """
+        Get data computed from the store, built again when the store version or the key changes.
+
+        The data is built outside of the table lock, so a slow build doesn't block the queries and updates of the
+        store. Data built while the store changed is tagged with the version before the build and built again on
+        the next call.
+
+        Args:
+            name (str): Name of the derived data.
+            builder (callable): Function without arguments computing the data.
+            key (hashable, optional): Additional state the data depends on, e.g. the version of another index.
+
+        Returns:
+            object: The derived data.
+        """
+        self.refresh()
+        with self._lock:
+            cached = self._derived.get(name)
+            if cached is not None and cached[0] == (self.version, key):
+                record_cache("derived", True)
+                return cached[1]
+
+        with self._build_lock("derived", name):
+            # Another thread may have built the data while this one waited
+            with self._lock:
+                stamp = (self.version, key)
+                cached = self._derived.get(name)
+                hit = cached is not None and cached[0] == stamp
+
+            record_cache("derived", hit)
+
+            if hit:
+                return cached[1]
+
+            value = builder()
+
+            with self._lock:
+                self._derived[name] = (stamp, value)
+
+            return value
+
+    def cached(self, name, key, builder, size=None):
+        """
+        Get data of the run other modules keep with the store, built again when the key changes.
+
+        The data is dropped with the store and its size counts into the memory budget of the stores. Like derived
+        data it is built outside of the table lock by one thread at a time.
+
+        Args:
+            name (str): Name of the data, also the name of its cache metric.
+            key (hashable): State the data depends on, e.g. the stamp of the file it is read from.
+            builder (callable): Function without arguments computing the data.
+            size (callable, optional): Function of the data returning its estimated memory in bytes.
+
+        Returns:
+            object: The cached data.
+        """
+        with self._lock:
+            cached = self._cached.get(name)
+            if cached is not None and cached[0] == key:
+                record_cache(name, True)
+                return cached[1]
+
+        with self._build_lock("cached", name):
+            with self._lock:
+                cached = self._cached.get(name)
+                hit = cached is not None and cached[0] == key
+
+            record_cache(name, hit)
+
+            if hit:
+                return cached[1]
+
+            value = builder()
+            nbytes = size(value) if size is not None else 0
+
+            with self._lock:
+                previous = self._cached.get(name)
+                self.nbytes += nbytes - (previous[2] if previous is not None else 0)
+                self._cached[name] = (key, value, nbytes)
+
+        _fit_budget(self)
+        return value
+
+
+def get_run_version(run):
+    """
+    Get the version of the data of a run, which changes whenever run files change.
+
+    Args:
+        run (str): The directory of the run results.
+
+    Returns:
+        int: The run version.
+    """
+    store = get_run_store(run)
+    store.refresh()
+    return store.version
+
+
+### RUN STORE REGISTRY ###
+
+_stores = OrderedDict()
+_stores_lock = threading.Lock()
+
+def get_run_cache_budget():
+    """Memory budget of all run stores in bytes: EVOVIS_RUN_CACHE_MB or RUN_CACHE_MB megabytes."""
+    return int(float(os.getenv("EVOVIS_RUN_CACHE_MB", RUN_CACHE_MB)) * 1024 * 1024)
+
+def _evict_stores(keep):
+    """Drop the least recently used stores until the stores fit into the budget, the store of key keep stays."""
+    budget = get_run_cache_budget()
+    total = sum(store.nbytes for store in _stores.values())
+
+    for key in list(_stores):
+        if total <= budget:
+            break
+
+        store = _stores[key]
+        if key == keep or store.pinned:
+            continue
+
+        del _stores[key]
+        total -= store.nbytes
+
+def _fit_budget(store):
+    """Drop the least recently used stores after a store grew, the grown store stays."""
+    key = os.path.abspath(store.run)
+
+    with _stores_lock:
+        if _stores.get(key) is store:
+            _evict_stores(keep=key)
+
+def get_run_store(run):
+    """
+    Get the run store of a run directory, kept while it is among the recently used runs.
+
+    A new store is empty, the stores exceeding the budget are dropped once it has loaded.
+
+    Args:
+        run (str): The directory of the run results.
+
+    Returns:
+        RunStore: The in-memory store of the run.
+    """
+    key = os.path.abspath(run)
+
+    with _stores_lock:
+        store = _stores.get(key)
+        record_cache("run_store", store is not None)
+
+        if store is None:
+            store = RunStore(run)
+            _stores[key] = store
+
+        _stores.move_to_end(key)
+        _start_verifier()
+
+    return store
+
+def _store_sizes():
+    with _stores_lock:
+        return {(store.run,): store.nbytes for store in _stores.values()}
+
+register(Gauge("evovis_run_store_bytes", "Estimated memory of the run stores in memory.", _store_sizes, ["run"]))
+
+
+### BACKGROUND CHECK ###
+
+def get_verify_interval():
+    """Seconds between two background checks of every file: EVOVIS_VERIFY_INTERVAL or VERIFY_INTERVAL, 0 turns them off."""
+    return float(os.getenv("EVOVIS_VERIFY_INTERVAL", VERIFY_INTERVAL))
+
+_verifier = None
+
+# Held while the background thread uses a store, a fork waits for it so children never inherit a held store lock
+_verifier_lock = threading.Lock()
+
+def _verify_stores():
+    while True:
+        time.sleep(get_verify_interval())
+
+        with _verifier_lock, _stores_lock:
+            stores = list(_stores.values())
+
+        for store in stores:
+            # Unloaded stores are loaded by their first query, watched stores by their live watcher
+            if store.watched or store._last_refresh is None:
+                continue
+
+            with _verifier_lock:
+                try:
+                    store.verify()
+                except OSError as e:
+                    print(f"Background check of {store.run} failed: {e}")
+
+def _start_verifier():
+    global _verifier
+
+    if _verifier is None and get_verify_interval() > 0:
+        _verifier = threading.Thread(target=_verify_stores, name="evovis-run-verifier", daemon=True)
+        _verifier.start()
+
+def _reset_verifier():
+    # Threads don't survive a fork, the first store lookup of a production worker starts its own
+    global _verifier, _verifier_lock
+    _verifier = None
+    _verifier_lock = threading.Lock()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(before=lambda: _verifier_lock.acquire(), after_in_parent=lambda: _verifier_lock.release(), after_in_child=_reset_verifier)
+
+def build_run_index(run):
+    """
+    Load a run directory and write its run index archive.
+
+    Args:
+        run (str): The directory of the run results.
+
+    Returns:
+        int: Number of indexed individuals.
+    """
+    store = get_run_store(run)
+    store.verify()
+    store.save_index()
+
+    return sum(len(store.individuals(generation)) for generation in store.generations())
@@ -0,0 +1,112 @@
+import os
+import numpy as np
+import plotly.graph_objects as go
+
+##########################################################################################
+
+# MODULE SCATTER
+
+# The Scatter Module keeps per-individual scatter plots responsive for large runs. Traces
+# switch from SVG (go.Scatter) to WebGL (go.Scattergl) above a number of points, and above
+# a larger number the points are downsampled on a 2D grid. Every occupied cell keeps at
+# least one point and dense cells keep points in proportion to their density, so clusters
+# and outliers stay visible. Points passed as 'keep' (e.g. the Pareto front) are never
+# dropped.
+
+###########################################################################################
+
+# Number of points from which traces are rendered with WebGL (EVOVIS_WEBGL_THRESHOLD overrides it)
+WEBGL_THRESHOLD = 2000
+
+# Number of points from which scatter plots are downsampled (EVOVIS_SCATTER_MAX_POINTS overrides it)
+SCATTER_MAX_POINTS = 20000
+
+# Cells per axis of the downsampling grid
+DOWNSAMPLE_BINS = 100
+
+
+### CONFIGURATION ###
+
+def get_webgl_threshold():
+    """Number of points from which traces use WebGL: EVOVIS_WEBGL_THRESHOLD or WEBGL_THRESHOLD."""
+    return int(os.getenv("EVOVIS_WEBGL_THRESHOLD", WEBGL_THRESHOLD))
+
+def get_scatter_max_points():
+    """Maximum number of points of a scatter plot: EVOVIS_SCATTER_MAX_POINTS or SCATTER_MAX_POINTS."""
+    return int(os.getenv("EVOVIS_SCATTER_MAX_POINTS", SCATTER_MAX_POINTS))
+
+
+### TRACES ###
+
+def scatter_trace(x, y, **kwargs):
+    """
+    Create a scatter trace, rendered with WebGL if it has many points.
+
+    Args:
+        x (array-like): X values.
+        y (array-like): Y values.
+        **kwargs: Further properties of the trace.
+
+    Returns:
+        plotly.graph_objs.Scatter or plotly.graph_objs.Scattergl: The scatter trace.
+    """
+    trace = go.Scattergl if len(x) >= get_webgl_threshold() else go.Scatter
+    return trace(x=x, y=y, **kwargs)
+
+
+### DOWNSAMPLING ###
+
+def downsample_indices(x, y, max_points=None, keep=None, bins=DOWNSAMPLE_BINS, seed=0):
+    """
+    Select a density preserving sample of 2D points.
+
+    Args:
+        x (numpy.ndarray): X values.
+        y (numpy.ndarray): Y values.
+        max_points (int, optional): Size of the sample, default is get_scatter_max_points().
+        keep (numpy.ndarray, optional): Boolean mask of points that are always selected.
+        bins (int): Cells per axis of the grid.
+        seed (int): Seed of the random selection within the cells, the sample is reproducible.
+
+    Returns:
+        numpy.ndarray: Sorted indices of the selected points, all indices if there are at most max_points.
+        With many occupied cells or kept points the sample can be larger than max_points.
+
+    Example:
+        >>> idx = downsample_indices(obj1, obj2, 20000, keep=ranks == 1)
+        >>> obj1[idx], obj2[idx]
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    max_points = get_scatter_max_points() if max_points is None else max_points
+
+    if n <= max_points:
+        return np.arange(n)
+
+    def cell_coordinate(values):
+        low, high = np.nanmin(values), np.nanmax(values)
+        span = high - low if high > low else 1.0
+        return np.clip(((values - low) / span * bins).astype(np.int64), 0, bins - 1)
+
+    cell = cell_coordinate(x) * bins + cell_coordinate(y)
+
+    # Random order within each cell
+    order = np.random.default_rng(seed).permutation(n)
+    order = order[np.argsort(cell[order], kind="stable")]
+    sorted_cells = cell[order]
+
+    first = np.r_[True, sorted_cells[1:] != sorted_cells[:-1]]
+    starts = np.flatnonzero(first)
+    counts = np.diff(np.r_[starts, n])
+    position = np.arange(n) - np.repeat(starts, counts)
+
+    # Quota per cell proportional to its share of the points, at least one point
+    quota = np.maximum(1, (counts * (max_points / n)).astype(np.int64))
+    selected = np.zeros(n, dtype=bool)
+    selected[order[position < np.repeat(quota, counts)]] = True
+
+    if keep is not None:
+        selected |= np.asarray(keep, dtype=bool)
+
+    return np.flatnonzero(selected)
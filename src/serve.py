@@ -0,0 +1,147 @@
+import os
+import gc
+import time
+
+##########################################################################################
+
+# MODULE SERVE
+
+# The Serve Module runs the dashboard in production. The run data is loaded, indexed and
+# validated once in the master process, then gunicorn forks the workers, which share the
+# loaded data copy-on-write. Objects created before the fork are moved out of the reach of
+# the garbage collector, so collections in the workers don't write to the shared pages.
+# Without gunicorn (not installed, or on Windows) the Flask server runs threaded.
+# Parameters: run (str) The directory of the run results.
+
+###########################################################################################
+
+# Default serving options (EVOVIS_WORKERS, EVOVIS_THREADS, EVOVIS_HOST and EVOVIS_PORT override them)
+WORKERS = 4
+THREADS = 4
+HOST = "127.0.0.1"
+PORT = 8050
+
+# Seconds a worker may take to answer a request before it is restarted
+TIMEOUT = 120
+
+
+### CONFIGURATION ###
+
+def get_serve_options(workers=None, threads=None, host=None, port=None):
+    """
+    Serving options from the arguments, the environment or the defaults.
+
+    Returns:
+        dict: "workers", "threads", "host" and "port".
+    """
+    return {
+        "workers": max(1, int(workers if workers is not None else os.getenv("EVOVIS_WORKERS", WORKERS))),
+        "threads": max(1, int(threads if threads is not None else os.getenv("EVOVIS_THREADS", THREADS))),
+        "host": host if host is not None else os.getenv("EVOVIS_HOST", HOST),
+        "port": int(port if port is not None else os.getenv("EVOVIS_PORT", PORT)),
+    }
+
+
+### PRELOAD ###
+
+def preload_run(run):
+    """
+    Load everything the pages read from a run into the caches of the process.
+
+    Args:
+        run (str): The directory of the run results.
+
+    Returns:
+        float: Seconds the preload took.
+    """
+    from runstore import get_run_store
+    from lineage import get_lineage_index
+    from dataval import get_validation_report
+    from genepool import get_genepool
+    from measurements import get_results_table, get_meas_aggregate_table
+    from pareto import get_pareto_fronts
+
+    start = time.perf_counter()
+
+    # Reads the run index archive and writes it if individuals had to be read from their files
+    get_run_store(run).refresh(force=True)
+    get_lineage_index(run)
+    report = get_validation_report(run)
+
+    if report["counts"]["search_space"] == 0:
+        get_genepool(run)
+
+    if report["counts"]["hyperparameters"] == 0:
+        get_results_table(run)
+        get_meas_aggregate_table(run)
+        get_pareto_fronts(run)
+
+    return time.perf_counter() - start
+
+def freeze_preloaded():
+    """Collect garbage once and exclude all current objects from later collections before workers fork."""
+    gc.collect()
+    gc.freeze()
+
+
+### SERVERS ###
+
+def _gunicorn_application(server, options):
+    from gunicorn.app.base import BaseApplication
+
+    class EvoVisApplication(BaseApplication):
+        """Gunicorn application serving the already imported Flask server of the dashboard."""
+
+        def load_config(self):
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return server
+
+    return EvoVisApplication()
+
+def serve_production(app, runs=(), workers=None, threads=None, host=None, port=None):
+    """
+    Serve the dashboard with several workers after preloading runs.
+
+    Args:
+        app (dash.Dash): The dashboard app.
+        runs (list): Directories of the runs to preload before the workers fork.
+        workers (int, optional): Number of worker processes.
+        threads (int, optional): Number of threads per worker.
+        host (str, optional): Interface to bind.
+        port (int, optional): Port to bind.
+
+    Example:
+        >>> from app import app
+        >>> serve_production(app, ["my_run"], workers=8, host="0.0.0.0")
+    """
+    options = get_serve_options(workers, threads, host, port)
+
+    for run in runs:
+        try:
+            print(f"Preloaded {run} in {preload_run(run):.2f}s")
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Preloading {run} failed, it is loaded on the first request: {e}")
+
+    # The first request sets up the pages and callbacks of the app, the workers inherit them
+    with app.server.test_client() as client:
+        client.get("/")
+
+    try:
+        application = _gunicorn_application(app.server, {
+            "bind": f"{options['host']}:{options['port']}",
+            "workers": options["workers"],
+            "threads": options["threads"],
+            "worker_class": "gthread" if options["threads"] > 1 else "sync",
+            "preload_app": True,
+            "timeout": TIMEOUT,
+        })
+    except ImportError:
+        print("gunicorn is not installed (pip install gunicorn), serving with the threaded Flask server in one process.")
+        app.run(host=options["host"], port=options["port"], debug=False, threaded=True)
+        return
+
+    freeze_preloaded()
+    application.run()
@@ -0,0 +1,93 @@
+import sys
+import time
+import builtins
+from contextlib import contextmanager
+
+##########################################################################################
+
+# MODULE STARTUP
+
+# The Startup Module measures where the start of the dashboard spends its time. Phases
+# (e.g. importing the app, the first request) are timed as a whole, and while imports are
+# tracked every module imported for the first time is timed including the modules it
+# imports itself. Started with 'python EvoVis.py <run_results_path> --profile-startup'.
+
+###########################################################################################
+
+# Number of slowest imports printed by the report
+REPORT_IMPORTS = 25
+
+# Imports faster than this (seconds) are left out of the report
+REPORT_MIN_SECONDS = 0.005
+
+
+class StartupProfile:
+    """
+    Timings of the startup phases and of the imports of a process.
+
+    Example:
+        >>> profile = StartupProfile()
+        >>> with profile.phase("import app"), profile.track_imports():
+        ...     from app import app
+        >>> profile.report()
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.phases = []
+        self.imports = {}
+        self._depth = 0
+
+    @contextmanager
+    def phase(self, name):
+        """Time the block as a startup phase."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - start))
+
+    @contextmanager
+    def track_imports(self):
+        """Time the absolute imports of modules that aren't loaded yet while the block runs."""
+        original_import = builtins.__import__
+
+        def timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+            # Relative imports and loaded modules are counted in the import that triggers them
+            if level or name in sys.modules:
+                return original_import(name, globals, locals, fromlist, level)
+
+            start = time.perf_counter()
+            self._depth += 1
+            try:
+                return original_import(name, globals, locals, fromlist, level)
+            finally:
+                self._depth -= 1
+                self.imports.setdefault(name, (time.perf_counter() - start, self._depth))
+
+        builtins.__import__ = timed_import
+        try:
+            yield
+        finally:
+            builtins.__import__ = original_import
+
+    def report(self, file=None):
+        """Print the phases and the slowest imports."""
+        file = file or sys.stdout
+        total = time.perf_counter() - self.start
+
+        print("Startup profile", file=file)
+        print(f"{'phase':<48}{'seconds':>10}", file=file)
+        for name, seconds in self.phases:
+            print(f"{name:<48}{seconds:>10.3f}", file=file)
+        print(f"{'total':<48}{total:>10.3f}", file=file)
+
+        imports = sorted(self.imports.items(), key=lambda item: item[1][0], reverse=True)
+        imports = [(name, seconds, depth) for name, (seconds, depth) in imports if seconds >= REPORT_MIN_SECONDS][:REPORT_IMPORTS]
+
+        if imports:
+            print(f"\n{'import (including its own imports)':<48}{'seconds':>10}{'depth':>7}", file=file)
+            for name, seconds, depth in imports:
+                print(f"{name:<48}{seconds:>10.3f}{depth:>7}", file=file)
+
+        file.flush()
@@ -0,0 +1,218 @@
+import os
+import json
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from evolution import get_meas_info
+from measurements import get_meas_aggregate_table
+from pareto import get_pareto_fronts
+from dataval import run_fingerprint
+from runstore import get_run_store, OBJECT_OVERHEAD
+from bulkload import file_stamp, scan_generations, get_load_workers
+from metrics import record_file_read
+
+##########################################################################################
+
+# MODULE RUN SUMMARY
+
+# The Run Summary Module condenses a run into a small table of per generation aggregates of
+# every measurement and its Pareto front, persisted as JSON next to the run index archive.
+# The summary carries a fingerprint of the run directory and of the individual directories
+# of the last generation, which is cheap to compute, so runs can be compared by reading
+# their summary files only. Summaries of changed runs are built from the run store again.
+# Parameters: run (str) The directory of the run results.
+
+###########################################################################################
+
+SUMMARY_FILENAME = "evovis_summary.json"
+
+# Incremented when the layout of the summary changes
+SUMMARY_FORMAT = 1
+
+# Aggregates of each measurement kept in the summary
+SUMMARY_AGGREGATES = ["count", "mean", "std"]
+
+
+### FINGERPRINT ###
+
+def get_summary_path(run):
+    """Path of the summary file of a run."""
+    return os.path.join(run, SUMMARY_FILENAME)
+
+def summary_fingerprint(run):
+    """
+    Fingerprint of the run data a summary is built from.
+
+    Earlier generations are complete once the evolution writes the next one, so besides the
+    run directory only the individual directories of the last generation are checked.
+
+    Args:
+        run (str): The directory of the run results.
+
+    Returns:
+        list: JSON serializable stamps, None if the run directory doesn't exist.
+    """
+    directory = run_fingerprint(run)
+
+    if directory is None:
+        return None
+
+    generations = scan_generations(run)
+    individuals = []
+
+    if generations:
+        with os.scandir(generations[max(generations)]) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    stat = entry.stat()
+                    individuals.append([entry.name, stat.st_mtime_ns])
+
+    return [[list(stamp) for stamp in directory], sorted(individuals)]
+
+
+### BUILD ###
+
+def _json_values(values):
+    """List of floats of an array with None for NaN values."""
+    return [None if np.isnan(value) else value for value in np.asarray(values, dtype=np.float64).tolist()]
+
+def build_run_summary(run):
+    """
+    Build the summary of a run from its run store.
+
+    Args:
+        run (str): The directory of the run results.
+
+    Returns:
+        dict: "format", "fingerprint", "measurements" (measurement key to displayname and unit), "aggregates"
+        (measurement key to "generation" and the SUMMARY_AGGREGATES lists) and "pareto" ("objectives", "directions",
+        and "generation", "individual" and "values" of the individuals of the Pareto front).
+    """
+    fingerprint = summary_fingerprint(run)
+    measurements = get_meas_info(run)
+
+    aggregates = {
+        meas: {
+            "generation": table["generation"].tolist(),
+            **{aggregate: _json_values(table[aggregate]) for aggregate in SUMMARY_AGGREGATES},
+        }
+        for meas, table in get_meas_aggregate_table(run).items()
+    }
+
+    fronts = get_pareto_fronts(run)
+    front = fronts["rank"] == 1
+
+    return {
+        "format": SUMMARY_FORMAT,
+        "fingerprint": fingerprint,
+        "measurements": {
+            meas: {"displayname": meas_info.get("displayname", meas), "unit": meas_info.get("unit", None)}
+            for meas, meas_info in measurements.items()
+        },
+        "aggregates": aggregates,
+        "pareto": {
+            "objectives": fronts["objectives"],
+            "directions": fronts["directions"],
+            "generation": fronts["generation"][front].tolist(),
+            "individual": fronts["individual"][front].tolist(),
+            "values": fronts["values"][front].tolist(),
+        },
+    }
+
+def write_run_summary(run, summary):
+    """
+    Write a summary to the summary file of the run.
+
+    Args:
+        run (str): The directory of the run results.
+        summary (dict): Summary returned by build_run_summary.
+
+    Returns:
+        bool: True if the file was written, False if the run directory isn't writable.
+    """
+    path = get_summary_path(run)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+
+    try:
+        with open(tmp_path, "w") as file:
+            json.dump(summary, file)
+        os.replace(tmp_path, path)
+        return True
+    except OSError as e:
+        print(f"Run summary of {run} not written: {e}")
+        return False
+
+def _read_run_summary(run):
+    try:
+        with open(get_summary_path(run), "rb") as file:
+            data = file.read()
+        record_file_read("json", len(data))
+        summary = json.loads(data)
+    except (OSError, ValueError):
+        return None
+
+    return summary if isinstance(summary, dict) and summary.get("format") == SUMMARY_FORMAT else None
+
+
+### SUMMARIES ###
+
+def _load_run_summary(run, fingerprint):
+    summary = _read_run_summary(run)
+
+    if summary is None or summary["fingerprint"] != fingerprint:
+        summary = build_run_summary(run)
+        write_run_summary(run, summary)
+
+    return summary
+
+def _summary_bytes(run):
+    """Estimated memory of the summary of a run from the size of its summary file."""
+    stamp = file_stamp(get_summary_path(run))
+    return stamp[1] * OBJECT_OVERHEAD if stamp is not None else 0
+
+def get_run_summary(run):
+    """
+    Get the summary of a run, read from its summary file while the run is unchanged.
+
+    The summary is kept with the run store and dropped along with it.
+
+    Args:
+        run (str): The directory of the run results.
+
+    Returns:
+        dict: The summary as returned by build_run_summary, shared between callers and must not be modified.
+
+    Example:
+        >>> summary = get_run_summary('my_run')
+        >>> summary["aggregates"]["fitness"]["mean"]
+        [0.61, 0.72, ...]
+    """
+    fingerprint = summary_fingerprint(run)
+
+    return get_run_store(run).cached(
+        "summary",
+        fingerprint,
+        lambda: _load_run_summary(run, fingerprint),
+        lambda summary: _summary_bytes(run),
+    )
+
+def get_run_summaries(runs, workers=None):
+    """
+    Get the summaries of several runs in parallel.
+
+    Args:
+        runs (dict): Run name to run directory.
+        workers (int, optional): Number of threads, default is the number of reader threads of the bulk load.
+
+    Returns:
+        dict: Run name to summary, runs whose summary can't be built are left out.
+    """
+    def summary_or_none(run):
+        try:
+            return get_run_summary(run)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Run summary of {run} not available: {e}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=get_load_workers(workers)) as pool:
+        summaries = pool.map(summary_or_none, runs.values())
+        return {name: summary for name, summary in zip(runs, summaries) if summary is not None}
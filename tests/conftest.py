@@ -0,0 +1,49 @@
+import os
+import sys
+import json
+import pytest
+
+# The modules of the dashboard are imported from src like app.py does
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+EXAMPLE_RUN = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "enas_example_run_results")
+
+
+def write_json(path, data):
+    with open(path, "w") as file:
+        json.dump(data, file)
+
+def bump_mtime(path, seconds=10):
+    """Move the modification time of a file or directory forward, file systems with coarse timestamps may not change it."""
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + seconds * 10**9))
+
+@pytest.fixture
+def make_run(tmp_path):
+    """
+    Factory writing a run directory in tmp_path.
+
+    Individuals are given as generation number to individual name to (results, chromosome), a None value leaves the
+    file out.
+    """
+    def make(generations, config=None):
+        run = tmp_path / "run"
+        run.mkdir()
+        write_json(run / "config.json", config or {"hyperparameters": {}})
+
+        for generation, individuals in generations.items():
+            generation_path = run / f"Generation_{generation}"
+            generation_path.mkdir()
+
+            for individual, (results, chromosome) in individuals.items():
+                individual_path = generation_path / individual
+                individual_path.mkdir()
+
+                if results is not None:
+                    write_json(individual_path / "results.json", results)
+                if chromosome is not None:
+                    write_json(individual_path / "chromosome.json", chromosome)
+
+        return str(run)
+
+    return make
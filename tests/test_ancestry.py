@@ -0,0 +1,141 @@
+import os
+import random
+import pytest
+from ancestry import AncestryIndex, get_ancestry_index, get_ancestors, get_descendants, descendant_count_in_generation, founder_contributions
+from runstore import get_run_store
+
+CHROMOSOME = [{"layer": "Rescaling", "f_name": "Rescaling"}]
+
+
+class Lineage:
+    """Lineage index of a parents dictionary with the methods the ancestry index uses."""
+
+    def __init__(self, parents):
+        self.parents = parents
+        self.children = {}
+        for child, child_parents in parents.items():
+            for parent, crossover in child_parents:
+                self.children.setdefault(parent, {})[child] = crossover
+
+    def get_parents(self, individual):
+        return self.parents.get(individual, [])
+
+    def get_children(self, individual):
+        return list(self.children.get(individual, {}).items())
+
+def random_lineage(generations, population, best, seed):
+    rng = random.Random(seed)
+    names = {generation: [f"ind_{generation}_{idx}" for idx in range(population)] for generation in range(1, generations + 1)}
+    parents = {}
+
+    for generation in range(2, generations + 1):
+        pool = rng.sample(names[generation - 1], best)
+        for name in names[generation]:
+            parents[name] = [(rng.choice(pool), 1), (rng.choice(pool), 2)]
+
+    # Crossovers of individuals that have no directory
+    parents["ind_1_0"] = [("unknown_a", 1), ("unknown_b", 2)]
+    parents[f"ind_{generations}_0"].append(("unknown_c", 3))
+
+    return names, Lineage(parents)
+
+def reachable(lineage, individual, step):
+    found = set()
+    stack = [individual]
+
+    while stack:
+        for other, _ in step(stack.pop()):
+            if other not in found:
+                found.add(other)
+                stack.append(other)
+
+    return found
+
+
+@pytest.mark.parametrize("best", [2, 5, 40])
+def test_index_matches_brute_force(best):
+    names, lineage = random_lineage(8, 40, best, seed=best)
+    index = AncestryIndex(names, lineage)
+    generation = {name: gen for gen, gen_names in names.items() for name in gen_names}
+
+    for name in generation:
+        ancestors = reachable(lineage, name, lineage.get_parents) & generation.keys()
+        descendants = reachable(lineage, name, lineage.get_children) & generation.keys()
+
+        assert set(index.members(name, "ancestors")) == ancestors
+        assert set(index.members(name, "descendants")) == descendants
+
+        for gen, gen_names in names.items():
+            assert index.members(name, "ancestors", gen) == [other for other in gen_names if other in ancestors]
+            assert index.block(name, "descendants", gen).bit_count() == len(descendants & set(gen_names))
+
+def test_unknown_individual_and_generation():
+    names, lineage = random_lineage(3, 5, 2, seed=0)
+    index = AncestryIndex(names, lineage)
+
+    assert index.members("missing", "ancestors") == []
+    assert index.block("ind_3_1", "ancestors", 99) == 0
+    assert index.generation("ind_2_1") == 2
+    assert index.generation("missing") is None
+
+def test_siblings_share_blocks():
+    names, lineage = random_lineage(6, 200, 2, seed=1)
+    index = AncestryIndex(names, lineage)
+
+    assert len({id(blocks) for blocks in index.ancestors.values()}) < len(index.ancestors) / 10
+    assert index.nbytes > 0
+
+
+### RUN QUERIES ###
+
+def crossover_line(generation, parent1, parent2, individual):
+    return f'Generation: {generation},"Parent_1: ({parent1}, 2)","Parent_2: ({parent2}, 3)",New_Individual: {individual}\n'
+
+@pytest.fixture
+def lineage_run(make_run, monkeypatch):
+    monkeypatch.setenv("EVOVIS_VERIFY_INTERVAL", "0")
+
+    individual = ({"fitness": 0.5}, CHROMOSOME)
+    run = make_run({
+        1: {"f1": individual, "f2": individual, "f3": individual},
+        2: {"a": individual, "b": individual},
+        3: {"c": individual, "d": individual, "e": individual},
+    })
+
+    with open(os.path.join(run, "crossover_parents.csv"), "w") as file:
+        file.write(crossover_line(1, "f1", "f2", "a"))
+        file.write(crossover_line(1, "f2", "f2", "b"))
+        file.write(crossover_line(2, "a", "b", "c"))
+        file.write(crossover_line(2, "a", "a", "d"))
+        file.write(crossover_line(2, "b", "b", "e"))
+
+    return run
+
+def test_queries(lineage_run):
+    run = lineage_run
+
+    assert get_ancestors(run, "c") == ["f1", "f2", "a", "b"]
+    assert get_ancestors(run, "d", generation=1) == ["f1", "f2"]
+    assert get_descendants(run, "f2") == ["a", "b", "c", "d", "e"]
+    assert get_descendants(run, "f3") == []
+    assert descendant_count_in_generation(run, "f1", 3) == 2
+    assert descendant_count_in_generation(run, "b", 3) == 2
+    assert founder_contributions(run) == {"f1": 2, "f2": 3}
+    assert founder_contributions(run, "e") == {"f2": 3}
+    assert founder_contributions(run, "d", generation=2) == {"f1": 1, "f2": 2}
+
+def test_index_counts_into_store_memory_and_follows_lineage(lineage_run):
+    run = lineage_run
+    store = get_run_store(run)
+    store.refresh()
+    nbytes = store.nbytes
+
+    index = get_ancestry_index(run)
+    assert store.nbytes == nbytes + index.nbytes
+    assert get_ancestry_index(run) is index
+
+    with open(os.path.join(run, "crossover_parents.csv"), "a") as file:
+        file.write(crossover_line(2, "f3", "a", "e"))
+
+    assert get_ancestry_index(run) is not index
+    assert founder_contributions(run) == {"f1": 3, "f2": 3, "f3": 1}
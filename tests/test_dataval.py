@@ -0,0 +1,35 @@
+import os
+from conftest import write_json, bump_mtime
+from dataval import get_validation_report, validation_message
+from runstore import get_run_store
+
+CHROMOSOME = [{"layer": "Rescaling", "f_name": "Rescaling"}]
+
+
+def test_config_category_doesnt_load_run(make_run, monkeypatch):
+    monkeypatch.setenv("EVOVIS_VERIFY_INTERVAL", "0")
+    run = make_run({1: {"a": ({"fitness": 0.5}, CHROMOSOME)}}, config={"other": {}})
+
+    assert "hyperparameters" in validation_message(run, ["hyperparameters"])
+    assert get_run_store(run)._last_refresh is None
+
+def test_categories_are_cached_until_their_files_change(make_run, monkeypatch):
+    monkeypatch.setenv("EVOVIS_VERIFY_INTERVAL", "0")
+    run = make_run({1: {"a": ({"fitness": 0.5}, CHROMOSOME)}})
+
+    report = get_validation_report(run)
+    assert report["counts"]["generations"] == 0
+    assert get_validation_report(run)["problems"]["hyperparameters"] is report["problems"]["hyperparameters"]
+
+    os.remove(os.path.join(run, "Generation_1", "a", "chromosome.json"))
+    bump_mtime(os.path.join(run, "Generation_1"))
+
+    report = get_validation_report(run)
+    assert report["counts"]["generations"] == 1
+    assert report["total"] == sum(report["counts"].values())
+
+def test_missing_run_directory(tmp_path):
+    run = str(tmp_path / "missing")
+
+    assert validation_message(run, ["generations"]) == f"Run directory not found: {run}"
+    assert validation_message(run, ["hyperparameters", "chromosomes"]) == ""
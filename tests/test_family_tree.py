@@ -0,0 +1,58 @@
+import os
+import pytest
+from evolution import get_family_tree
+
+CHROMOSOME = [{"layer": "Rescaling", "f_name": "Rescaling"}]
+
+
+def crossover_line(generation, parent1, parent2, individual):
+    return f'Generation: {generation},"Parent_1: ({parent1}, 2)","Parent_2: ({parent2}, 3)",New_Individual: {individual}\n'
+
+@pytest.fixture
+def family_run(make_run, monkeypatch):
+    monkeypatch.setenv("EVOVIS_VERIFY_INTERVAL", "0")
+
+    individual = ({"fitness": 0.5}, CHROMOSOME)
+    run = make_run({
+        1: {"f1": individual, "f2": individual},
+        2: {"a": individual},
+        3: {"c": individual, "d": individual},
+    })
+
+    with open(os.path.join(run, "crossover_parents.csv"), "w") as file:
+        file.write(crossover_line(1, "f1", "f2", "a"))
+        file.write(crossover_line(2, "a", "a", "c"))
+        file.write(crossover_line(2, "a", "a", "d"))
+
+    return run
+
+def split(elements):
+    nodes = [element["data"]["id"] for element in elements if "id" in element["data"]]
+    edges = [(element["data"]["source"], element["data"]["target"]) for element in elements if "source" in element["data"]]
+    return nodes, edges
+
+
+def test_whole_tree(family_run):
+    elements, roots, truncated = get_family_tree(family_run, 2, "a", range(1, 4), max_nodes=10)
+    nodes, edges = split(elements)
+
+    assert not truncated
+    assert set(nodes) == {"a", "f1", "f2", "c", "d"}
+    assert set(edges) == {("f1", "a"), ("f2", "a"), ("a", "c"), ("a", "d")}
+    assert set(roots) == {"f1", "f2"}
+
+@pytest.mark.parametrize("max_nodes, expected", [(3, {"a", "f1", "f2"}), (2, {"a", "f1"}), (1, {"a"})])
+def test_truncated_tree_keeps_ancestors_first(family_run, max_nodes, expected):
+    elements, roots, truncated = get_family_tree(family_run, 2, "a", range(1, 4), max_nodes=max_nodes)
+    nodes, edges = split(elements)
+
+    assert truncated
+    assert set(nodes) == expected
+    assert all(source in nodes and target in nodes for source, target in edges)
+
+def test_generation_range_limits_tree(family_run):
+    elements, roots, truncated = get_family_tree(family_run, 2, "a", range(2, 3), max_nodes=10)
+
+    assert not truncated
+    assert split(elements) == (["a"], [])
+    assert roots == ["a"]
@@ -0,0 +1,77 @@
+import os
+import figcache
+from conftest import write_json, bump_mtime
+from figcache import FigureCache, cached_figure
+
+CHROMOSOME = [{"layer": "Rescaling", "f_name": "Rescaling"}]
+
+
+def test_get_and_put():
+    cache = FigureCache(budget=100)
+
+    assert cache.get("a") == (False, None)
+    assert cache.put("a", "x" * 10)
+    assert cache.get("a") == (True, "x" * 10)
+    assert (cache.hits, cache.misses, cache.size) == (1, 1, 10)
+
+    assert cache.put("a", "y" * 20)
+    assert cache.get("a") == (True, "y" * 20)
+    assert (len(cache), cache.size) == (1, 20)
+
+def test_least_recently_used_entries_are_evicted():
+    cache = FigureCache(budget=30)
+    cache.put("a", "a" * 10)
+    cache.put("b", "b" * 10)
+    cache.put("c", "c" * 10)
+
+    # Reading a makes b the least recently used entry
+    cache.get("a")
+    cache.put("d", "d" * 10)
+
+    assert not cache.get("b")[0]
+    assert all(cache.get(key)[0] for key in "acd")
+    assert cache.size == 30
+
+    cache.put("e", "e" * 25)
+    assert [key for key in "acde" if cache.get(key)[0]] == ["e"]
+    assert cache.size == 25
+
+def test_values_larger_than_budget_are_not_stored():
+    cache = FigureCache(budget=10)
+    cache.put("a", "a" * 5)
+
+    assert not cache.put("a", "a" * 11)
+    assert cache.get("a") == (False, None)
+    assert (len(cache), cache.size) == (0, 0)
+
+def test_zero_budget_disables_caching(monkeypatch):
+    monkeypatch.setenv("EVOVIS_FIGURE_CACHE_MB", "0")
+    cache = FigureCache()
+
+    assert not cache.put("a", "{}")
+    assert len(cache) == 0
+
+
+def test_cached_figure_is_built_again_after_change(make_run, monkeypatch):
+    monkeypatch.setenv("EVOVIS_VERIFY_INTERVAL", "0")
+    monkeypatch.setenv("EVOVIS_REFRESH_INTERVAL", "0")
+    monkeypatch.setattr(figcache, "_figure_cache", FigureCache(budget=10**6))
+    run = make_run({1: {"a": ({"fitness": 0.5}, CHROMOSOME)}})
+    calls = []
+
+    @cached_figure
+    def figure(run, scale=1):
+        calls.append(scale)
+        return {"data": [{"y": [len(calls) * scale]}]}
+
+    first = figure(run)
+    assert figure(run) == first
+    assert figure(run) is not first
+    assert figure(run, scale=2) == {"data": [{"y": [4]}]}
+    assert len(calls) == 2
+
+    path = os.path.join(run, "config.json")
+    write_json(path, {"hyperparameters": {"generations": 2}})
+    bump_mtime(path)
+
+    assert figure(run) == {"data": [{"y": [3]}]}
@@ -0,0 +1,97 @@
+import os
+import copy
+import json
+import numpy as np
+import pytest
+from conftest import EXAMPLE_RUN
+from genepool import SearchSpace
+
+
+def baseline_layer_graph(search_space):
+    """Layer graph as _get_layer_graph of the baseline genepool module built it, without reading the file."""
+    search_space = copy.deepcopy(search_space)
+    groups = {key: [value['layer'] for value in values] for key, values in search_space.get("gene_pool", []).items()}
+    graph = {}
+
+    for layer_rule in search_space.get("rule_set", []):
+        if not (layer_rule.get("exclude", False)):
+            graph[layer_rule["layer"]] = layer_rule["rule"]
+
+    for group_rule in search_space.get("rule_set_group", []):
+        for target_group in group_rule.get("rule", []):
+            source_layers = groups.get(group_rule.get("group", []), [])
+            target_layers = groups.get(target_group, [])
+
+            for src_layer in source_layers:
+                if src_layer in graph:
+                    graph[src_layer] += target_layers
+                else:
+                    graph[src_layer] = target_layers
+
+    return graph
+
+def baseline_transition_matrix(search_space, layers):
+    """Matrix of the transitions the baseline layer graph allows, in the token order of layers."""
+    tokens = {layer: idx for idx, layer in enumerate(layers)}
+    matrix = np.zeros((len(layers) + 1, len(layers) + 1), dtype=np.uint8)
+
+    for layer, targets in baseline_layer_graph(search_space).items():
+        for target in targets:
+            matrix[tokens[layer], tokens[target]] = 1
+
+    return matrix
+
+def example_search_space():
+    with open(os.path.join(EXAMPLE_RUN, "search_space.json")) as file:
+        return json.load(file)
+
+def synthetic_search_space():
+    return {
+        "gene_pool": {
+            "input": [{"layer": "Rescaling"}],
+            "conv": [{"layer": "C_2D"}, {"layer": "DC_2D"}],
+            "pool": [{"layer": "GAP_2D"}, {"layer": "GMP_2D"}],
+            "head": [{"layer": "Dense"}],
+        },
+        "rule_set": [
+            {"layer": "Start", "rule": ["Rescaling"]},
+            {"layer": "Rescaling", "rule": ["C_2D", "DC_2D"]},
+            {"layer": "C_2D", "rule": ["C_2D"]},
+            {"layer": "DC_2D", "rule": ["Dense"], "exclude": True},
+            {"layer": "GAP_2D", "rule": ["Dense"]},
+        ],
+        "rule_set_group": [
+            {"group": "conv", "rule": ["pool"]},
+            {"group": "pool", "rule": ["head", "missing"]},
+            {"group": "missing", "rule": ["head"]},
+        ],
+    }
+
+
+@pytest.mark.parametrize("search_space", [example_search_space(), synthetic_search_space()], ids=["example", "synthetic"])
+def test_transition_matrix_matches_baseline_layer_graph(search_space):
+    parsed = SearchSpace(search_space)
+
+    np.testing.assert_array_equal(parsed.transition_matrix(), baseline_transition_matrix(search_space, parsed.layers))
+
+@pytest.mark.parametrize("search_space", [example_search_space(), synthetic_search_space()], ids=["example", "synthetic"])
+def test_layer_graph_matches_baseline(search_space):
+    parsed = SearchSpace(search_space)
+    baseline = baseline_layer_graph(search_space)
+
+    assert parsed.layer_graph.keys() == baseline.keys()
+    assert {layer: sorted(targets) for layer, targets in parsed.layer_graph.items()} == {layer: sorted(targets) for layer, targets in baseline.items()}
+
+def test_unknown_layers_allow_no_transition():
+    parsed = SearchSpace(synthetic_search_space())
+    matrix = parsed.transition_matrix()
+
+    assert not matrix[-1].any() and not matrix[:, -1].any()
+    assert matrix[parsed.layer_index["Start"], parsed.layer_index["Rescaling"]] == 1
+    assert matrix[parsed.layer_index["DC_2D"], parsed.layer_index["Dense"]] == 0
+
+def test_from_file_keeps_stamp():
+    parsed = SearchSpace.from_file(os.path.join(EXAMPLE_RUN, "search_space.json"))
+
+    assert parsed.stamp[1] == os.path.getsize(os.path.join(EXAMPLE_RUN, "search_space.json"))
+    assert parsed.groups.keys() == example_search_space()["gene_pool"].keys()
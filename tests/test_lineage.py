@@ -0,0 +1,99 @@
+from lineage import CrossoverReader, LineageIndex, parse_crossover_line
+
+
+def line(generation, parent1, crossover1, parent2, crossover2, individual):
+    return f'Generation: {generation},"Parent_1: ({parent1}, {crossover1})","Parent_2: ({parent2}, {crossover2})",New_Individual: {individual}'
+
+def append(path, text):
+    with open(path, "a") as file:
+        file.write(text)
+
+
+def test_parse_reports_problems_of_malformed_line():
+    record, problems = parse_crossover_line('Generation: x,"Parent_1: (a, 2)","Parent_2: (b, y)",New_Individual: c')
+
+    assert record is None
+    assert problems == ["Generation should be a number.", "Parent 2 crossover value should be a number."]
+
+def test_reader_doesnt_count_unterminated_line(tmp_path):
+    path = tmp_path / "crossover_parents.csv"
+    complete = line(1, "a", 2, "b", 3, "c") + "\n"
+    path.write_text(complete + line(1, "a", 4, "b", 5, "fancy_fo"))
+
+    reader = CrossoverReader(str(path))
+    records = list(reader)
+
+    assert [record.individual for record in records] == ["c", "fancy_fo"]
+    assert reader.offset == len(complete)
+    assert reader.row == 1
+    assert reader.tail is records[-1]
+
+def test_partial_trailing_line_is_replaced(tmp_path):
+    run = tmp_path
+    path = run / "crossover_parents.csv"
+    path.write_text(line(1, "a", 2, "b", 3, "c") + "\n" + line(1, "a", 4, "d", 5, "fancy_fo"))
+
+    index = LineageIndex(str(run))
+    assert index.refresh()
+    assert index.get_parents("fancy_fo") == [("a", 4), ("d", 5)]
+
+    # The writer finishes the line, the record of the partial line is retracted
+    append(path, "x\n")
+    assert index.refresh()
+
+    assert "fancy_fo" not in index.parents
+    assert "fancy_fo" not in index.generation
+    assert index.get_parents("fancy_fox") == [("a", 4), ("d", 5)]
+    assert sorted(index.get_children("a")) == [("c", 2), ("fancy_fox", 4)]
+    assert index.get_children("d") == [("fancy_fox", 5)]
+    assert [record["individual"] for record in index.records()] == ["c", "fancy_fox"]
+
+def test_partial_line_with_other_parents_is_replaced(tmp_path):
+    path = tmp_path / "crossover_parents.csv"
+    path.write_text(line(1, "a", 2, "b", 3, "c") + "\n" + line(2, "c", 1, "e", 2, "f"))
+
+    index = LineageIndex(str(tmp_path))
+    index.refresh()
+    assert index.get_children("e") == [("f", 2)]
+
+    # The partial line was cut within the second parent
+    path.write_text(line(1, "a", 2, "b", 3, "c") + "\n" + line(2, "c", 1, "eagle", 2, "f") + "\n")
+    index.refresh()
+
+    assert "e" not in index.children
+    assert index.get_children("eagle") == [("f", 2)]
+    assert index.get_parents("f") == [("c", 1), ("eagle", 2)]
+
+def test_partial_line_restores_replaced_record(tmp_path):
+    path = tmp_path / "crossover_parents.csv"
+    path.write_text(line(1, "a", 2, "b", 3, "c") + "\n" + line(2, "x", 1, "y", 2, "c"))
+
+    index = LineageIndex(str(tmp_path))
+    index.refresh()
+    assert index.get_parents("c") == [("x", 1), ("y", 2)]
+
+    # The unterminated line turns out to name another individual, the earlier record of c is back
+    append(path, "d\n")
+    index.refresh()
+
+    assert index.get_parents("c") == [("a", 2), ("b", 3)]
+    assert index.generation["c"] == 1
+    assert index.get_parents("cd") == [("x", 1), ("y", 2)]
+    assert index.get_children("x") == [("cd", 1)]
+
+def test_appended_lines_are_added(tmp_path):
+    path = tmp_path / "crossover_parents.csv"
+    path.write_text(line(1, "a", 2, "b", 3, "c") + "\n")
+
+    index = LineageIndex(str(tmp_path))
+    index.refresh()
+    version = index.version
+
+    assert not index.refresh()
+
+    append(path, line(2, "c", 1, "a", 5, "g") + "\n")
+    assert index.refresh()
+
+    assert index.version > version
+    assert sorted(index.get_children("a")) == [("c", 2), ("g", 5)]
+    assert index.generation["g"] == 2
@@ -0,0 +1,118 @@
+import os
+import time
+import threading
+import pytest
+from conftest import write_json
+import livewatch
+from livewatch import RunWatcher, IN_CREATE, IN_MODIFY, IN_CLOSE_WRITE, IN_ISDIR, IN_IGNORED, IN_Q_OVERFLOW
+
+CHROMOSOME = [{"layer": "Rescaling", "f_name": "Rescaling"}]
+
+
+class FakeInotify:
+    """Hands out watch descriptors instead of watching directories."""
+
+    def __init__(self):
+        self.paths = {}
+
+    def add_watch(self, path):
+        self.paths[len(self.paths) + 1] = path
+        return len(self.paths)
+
+@pytest.fixture
+def watcher(make_run, monkeypatch):
+    monkeypatch.setenv("EVOVIS_VERIFY_INTERVAL", "0")
+    run = make_run({1: {"a": ({"fitness": 0.5}, CHROMOSOME)}})
+
+    watcher = RunWatcher(run)
+    watcher._inotify = FakeInotify()
+    watcher._watch_run()
+    return watcher
+
+def descriptor(watcher, target):
+    return next(wd for wd, watched in watcher._watches.items() if watched == target)
+
+
+def test_individual_files_map_to_the_individual(watcher):
+    pending = set()
+    wd = descriptor(watcher, (1, "a"))
+
+    assert watcher._pending_targets([(wd, IN_CLOSE_WRITE, "results.json"), (wd, IN_MODIFY, "chromosome.json")], pending)
+    assert pending == {(1, "a")}
+
+def test_other_files_are_no_activity(watcher):
+    pending = set()
+    events = [
+        (descriptor(watcher, (1, "a")), IN_MODIFY, "training.log"),
+        (descriptor(watcher, (1, None)), IN_MODIFY, "notes.txt"),
+        (descriptor(watcher, (None, None)), IN_MODIFY, "checkpoint.h5"),
+        (99, IN_MODIFY, "results.json"),
+    ]
+
+    assert not watcher._pending_targets(events, pending)
+    assert pending == set()
+
+def test_new_directories_are_watched(watcher):
+    pending = set()
+    run = watcher.run
+    os.makedirs(os.path.join(run, "Generation_2", "b"))
+
+    events = [
+        (descriptor(watcher, (None, None)), IN_CREATE | IN_ISDIR, "Generation_2"),
+        (descriptor(watcher, (1, None)), IN_CREATE | IN_ISDIR, "c"),
+    ]
+
+    assert watcher._pending_targets(events, pending)
+    assert pending == {(2, None), (1, None)}
+    assert {(2, None), (2, "b"), (1, "c")} <= set(watcher._watches.values())
+
+def test_run_files_map_to_lineage_and_config(watcher):
+    pending = set()
+    wd = descriptor(watcher, (None, None))
+
+    assert watcher._pending_targets([(wd, IN_CLOSE_WRITE, "crossover_parents.csv"), (wd, IN_CLOSE_WRITE, "config.json")], pending)
+    assert pending == {"lineage", (None, None)}
+
+def test_overflow_and_removed_watch(watcher):
+    pending = set()
+    wd = descriptor(watcher, (1, "a"))
+
+    assert watcher._pending_targets([(-1, IN_Q_OVERFLOW, "")], pending)
+    assert pending == {"run"}
+
+    watcher._pending_targets([(wd, IN_IGNORED, "")], pending)
+    assert wd not in watcher._watches
+
+
+@pytest.mark.skipif(not hasattr(os, "uname") or os.uname().sysname != "Linux", reason="inotify is only available on Linux")
+def test_continuous_events_are_ingested_after_max_delay(make_run, monkeypatch):
+    monkeypatch.setenv("EVOVIS_VERIFY_INTERVAL", "0")
+    monkeypatch.setattr(livewatch, "MAX_DELAY", 0.5)
+    monkeypatch.setattr(livewatch, "DEBOUNCE", 0.3)
+
+    run = make_run({1: {"a": ({"fitness": 0.5}, CHROMOSOME)}})
+    watcher = RunWatcher(run).start()
+    path = os.path.join(run, "Generation_1", "a", "results.json")
+    stop = threading.Event()
+
+    # Rewrites more often than the debounce interval never leave the watcher idle
+    def write():
+        step = 0
+        while not stop.is_set():
+            step += 1
+            write_json(path, {"fitness": 0.5, "step": step})
+            time.sleep(0.05)
+
+    writer = threading.Thread(target=write)
+    writer.start()
+
+    try:
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline and "step" not in watcher.store.individual(1, "a", "results"):
+            time.sleep(0.05)
+
+        assert "step" in watcher.store.individual(1, "a", "results")
+    finally:
+        stop.set()
+        writer.join()
+        watcher.stop()
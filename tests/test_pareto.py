@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+from pareto import non_dominated_sort, crowding_distance
+
+
+def dominates(a, b):
+    return all(x <= y for x, y in zip(a, b)) and any(x < y for x, y in zip(a, b))
+
+def brute_force_ranks(points):
+    """Front rank per point by repeatedly removing the points no remaining point dominates."""
+    points = [tuple(point) for point in points]
+    ranks = [0] * len(points)
+    remaining = set(range(len(points)))
+    front = 1
+
+    while remaining:
+        current = {i for i in remaining if not any(dominates(points[j], points[i]) for j in remaining)}
+        for i in current:
+            ranks[i] = front
+        remaining -= current
+        front += 1
+
+    return ranks
+
+def brute_force_crowding(points, ranks):
+    """NSGA-II crowding distance, points of equal value are ordered by their position like a stable sort."""
+    distance = [0.0] * len(points)
+
+    for rank in set(ranks):
+        front = [i for i in range(len(points)) if ranks[i] == rank]
+
+        for m in range(len(points[0])):
+            ordered = sorted(front, key=lambda i: points[i][m])
+            span = points[ordered[-1]][m] - points[ordered[0]][m]
+
+            for position, i in enumerate(ordered):
+                if position == 0 or position == len(ordered) - 1:
+                    distance[i] = np.inf
+                elif span > 0:
+                    distance[i] += (points[ordered[position + 1]][m] - points[ordered[position - 1]][m]) / span
+
+    return distance
+
+
+def test_docstring_example():
+    assert non_dominated_sort(np.array([[1, 2], [2, 1], [2, 2], [3, 3]])).tolist() == [1, 1, 2, 3]
+
+def test_empty_objectives():
+    assert len(non_dominated_sort(np.zeros((0, 2)))) == 0
+    assert len(crowding_distance(np.zeros((0, 2)), np.zeros(0, dtype=np.int64))) == 0
+
+@pytest.mark.parametrize("objectives", [1, 2, 3, 4, 5])
+@pytest.mark.parametrize("values", [4, 1000])
+def test_non_dominated_sort_matches_brute_force(objectives, values):
+    rng = np.random.default_rng(objectives * values)
+
+    # Few distinct values produce equal points and ties in single objectives
+    for _ in range(5):
+        points = rng.integers(0, values, size=(int(rng.integers(1, 120)), objectives)).astype(float)
+        assert non_dominated_sort(points).tolist() == brute_force_ranks(points)
+
+@pytest.mark.parametrize("objectives", [2, 3, 4])
+def test_crowding_distance_matches_brute_force(objectives):
+    rng = np.random.default_rng(objectives)
+
+    for values in (3, 50, None):
+        size = (int(rng.integers(1, 80)), objectives)
+        points = rng.random(size) if values is None else rng.integers(0, values, size=size).astype(float)
+        ranks = non_dominated_sort(points)
+
+        expected = brute_force_crowding(points.tolist(), ranks.tolist())
+        np.testing.assert_allclose(crowding_distance(points, ranks), expected)
@@ -0,0 +1,108 @@
+import os
+import numpy as np
+from conftest import write_json, bump_mtime
+from runindex import get_index_path, read_index, write_index
+from runstore import RunStore
+
+CHROMOSOME = [{"layer": "Rescaling", "f_name": "Rescaling", "scale": 0.0039}, {"layer": "C_2D", "filters": 16, "padding": "same"}]
+
+
+def test_round_trip_keeps_values_and_types(tmp_path):
+    generations = {
+        1: {
+            "a": {"results": {"fitness": 0.5, "memory": 8381304, "error": False}, "chromosome": CHROMOSOME, "stamp": ((1, 10), (2, 20))},
+            "b": {"results": {"fitness": 0.25, "label": "text", "big": 2 ** 60}, "chromosome": CHROMOSOME[:1], "stamp": ((3, 30), (4, 40))},
+        },
+        2: {
+            "c": {"results": None, "chromosome": {"error": "Expecting value"}, "stamp": (None, (5, 50))},
+            "d": {"results": {}, "chromosome": [], "stamp": ((6, 60), (7, 70))},
+        },
+        3: {},
+    }
+    write_index(str(tmp_path), generations, {1: 100, 2: 200, 3: 300})
+
+    read_generations, generation_stamps = read_index(str(tmp_path))
+
+    assert read_generations == generations
+    assert generation_stamps == {1: (100, 2), 2: (200, 2), 3: (300, 0)}
+
+    results = read_generations[1]["a"]["results"]
+    assert type(results["memory"]) is int and type(results["error"]) is bool and type(results["fitness"]) is float
+
+def test_read_rejects_other_format(tmp_path):
+    with open(get_index_path(str(tmp_path)), "wb") as file:
+        np.savez(file, format=np.array(1))
+
+    assert read_index(str(tmp_path)) is None
+
+def test_read_rejects_corrupt_archive(tmp_path):
+    with open(get_index_path(str(tmp_path)), "wb") as file:
+        file.write(b"not an archive")
+
+    assert read_index(str(tmp_path)) is None
+
+def test_store_round_trip_through_index(make_run):
+    run = make_run({1: {"a": ({"fitness": 0.5}, CHROMOSOME)}, 2: {"b": ({"fitness": 0.7}, CHROMOSOME), "c": (None, CHROMOSOME)}})
+    store = RunStore(run, refresh_interval=0, use_index=True, workers=1)
+    store.refresh()
+
+    assert os.path.isfile(get_index_path(run))
+
+    warm = RunStore(run, refresh_interval=0, use_index=True, workers=1)
+    warm.refresh()
+
+    for generation in store.generations():
+        assert warm.generation_values(generation, "results") == store.generation_values(generation, "results")
+        assert warm.generation_values(generation, "chromosome") == store.generation_values(generation, "chromosome")
+
+def test_stale_generation_is_read_from_files(make_run):
+    run = make_run({1: {"a": ({"fitness": 0.5}, CHROMOSOME)}, 2: {"b": ({"fitness": 0.7}, CHROMOSOME)}})
+    RunStore(run, refresh_interval=0, use_index=True, workers=1).refresh()
+
+    # A replaced individual changes the directory of its generation, the archive entry of that generation is stale
+    path = os.path.join(run, "Generation_2", "b", "results.json")
+    write_json(path, {"fitness": 0.9})
+    bump_mtime(path)
+    bump_mtime(os.path.dirname(os.path.dirname(path)))
+
+    store = RunStore(run, refresh_interval=0, use_index=True, workers=1)
+    store.refresh()
+
+    assert store.individual(2, "b", "results") == {"fitness": 0.9}
+    assert store.individual(1, "a", "results") == {"fitness": 0.5}
+
+    # The archive was rewritten with the new data
+    generations, _ = read_index(run)
+    assert generations[2]["b"]["results"] == {"fitness": 0.9}
+
+def test_changed_individual_count_rejects_generation(make_run):
+    run = make_run({1: {"a": ({"fitness": 0.5}, CHROMOSOME)}})
+    RunStore(run, refresh_interval=0, use_index=True, workers=1).refresh()
+
+    generation_path = os.path.join(run, "Generation_1")
+    mtime = os.stat(generation_path).st_mtime_ns
+    os.mkdir(os.path.join(generation_path, "b"))
+    write_json(os.path.join(generation_path, "b", "results.json"), {"fitness": 0.6})
+
+    # Same directory modification time, e.g. on a file system with coarse timestamps
+    os.utime(generation_path, ns=(mtime, mtime))
+
+    store = RunStore(run, refresh_interval=0, use_index=True, workers=1)
+    store.refresh()
+
+    assert store.individuals(1) == ["a", "b"]
+    assert store.individual(1, "b", "results") == {"fitness": 0.6}
+
+def test_removed_generation_is_dropped(make_run):
+    run = make_run({1: {"a": ({"fitness": 0.5}, CHROMOSOME)}, 2: {"b": ({"fitness": 0.7}, CHROMOSOME)}})
+    RunStore(run, refresh_interval=0, use_index=True, workers=1).refresh()
+
+    generation_path = os.path.join(run, "Generation_2")
+    for name in os.listdir(os.path.join(generation_path, "b")):
+        os.remove(os.path.join(generation_path, "b", name))
+    os.rmdir(os.path.join(generation_path, "b"))
+    os.rmdir(generation_path)
+
+    store = RunStore(run, refresh_interval=0, use_index=True, workers=1)
+
+    assert store.generations() == [1]
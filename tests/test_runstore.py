@@ -0,0 +1,153 @@
+import os
+import time
+import threading
+from conftest import write_json, bump_mtime
+from runstore import RunStore
+
+CHROMOSOME = [{"layer": "Rescaling", "f_name": "Rescaling"}]
+
+
+def load_store(run):
+    store = RunStore(run, refresh_interval=0, use_index=False, workers=1)
+    store.refresh()
+    return store
+
+
+def test_load_reads_all_individuals(make_run):
+    run = make_run({1: {"a": ({"fitness": 0.5}, CHROMOSOME), "b": ({"fitness": 0.7}, CHROMOSOME)}})
+    store = load_store(run)
+
+    assert store.generations() == [1]
+    assert store.generation_values(1, "results") == {"a": {"fitness": 0.5}, "b": {"fitness": 0.7}}
+    assert store.individual(1, "a", "chromosome") == CHROMOSOME
+
+def test_refresh_picks_up_new_individual(make_run):
+    run = make_run({1: {"a": ({"fitness": 0.5}, CHROMOSOME)}})
+    store = load_store(run)
+    version = store.version
+
+    individual_path = os.path.join(run, "Generation_1", "b")
+    os.mkdir(individual_path)
+    write_json(os.path.join(individual_path, "results.json"), {"fitness": 0.9})
+    write_json(os.path.join(individual_path, "chromosome.json"), CHROMOSOME)
+    bump_mtime(os.path.dirname(individual_path))
+
+    assert store.refresh()
+    assert store.version > version
+    assert store.individual(1, "b", "results") == {"fitness": 0.9}
+
+def test_refresh_picks_up_new_generation_and_removed_individual(make_run):
+    run = make_run({1: {"a": ({"fitness": 0.5}, CHROMOSOME), "b": ({"fitness": 0.6}, CHROMOSOME)}})
+    store = load_store(run)
+
+    for name in os.listdir(os.path.join(run, "Generation_1", "b")):
+        os.remove(os.path.join(run, "Generation_1", "b", name))
+    os.rmdir(os.path.join(run, "Generation_1", "b"))
+    bump_mtime(os.path.join(run, "Generation_1"))
+
+    os.makedirs(os.path.join(run, "Generation_2", "c"))
+    write_json(os.path.join(run, "Generation_2", "c", "results.json"), {"fitness": 0.8})
+
+    assert store.refresh()
+    assert store.generations() == [1, 2]
+    assert store.individuals(1) == ["a"]
+    assert store.individual(2, "c", "results") == {"fitness": 0.8}
+
+def test_refresh_reads_file_of_incomplete_individual(make_run):
+    run = make_run({1: {"a": (None, CHROMOSOME)}})
+    store = load_store(run)
+    assert store.individual(1, "a", "results") is None
+
+    # Writing a file into an individual directory doesn't change the generation directory
+    write_json(os.path.join(run, "Generation_1", "a", "results.json"), {"fitness": 0.4})
+
+    assert store.refresh()
+    assert store.individual(1, "a", "results") == {"fitness": 0.4}
+
+def test_verify_reads_file_rewritten_in_place(make_run):
+    run = make_run({1: {"a": ({"fitness": 0.5}, CHROMOSOME), "b": ({"fitness": 0.6}, CHROMOSOME)}})
+    store = load_store(run)
+    nbytes = store.nbytes
+
+    path = os.path.join(run, "Generation_1", "a", "results.json")
+    write_json(path, {"fitness": 0.75, "val_acc": 0.8})
+    bump_mtime(path)
+
+    # The generation directory is unchanged, only the full check sees the file
+    assert not store.refresh()
+    assert store.individual(1, "a", "results") == {"fitness": 0.5}
+
+    assert store.verify()
+    assert store.individual(1, "a", "results") == {"fitness": 0.75, "val_acc": 0.8}
+    assert store.individual(1, "b", "results") == {"fitness": 0.6}
+    assert store.nbytes > nbytes
+
+def test_config_change_bumps_version(make_run):
+    run = make_run({1: {"a": ({"fitness": 0.5}, CHROMOSOME)}})
+    store = load_store(run)
+    version = store.version
+
+    path = os.path.join(run, "config.json")
+    write_json(path, {"hyperparameters": {"generations": 10}})
+    bump_mtime(path)
+
+    assert store.refresh()
+    assert store.version > version
+    assert store.config() == {"hyperparameters": {"generations": 10}}
+
+def test_derived_build_doesnt_block_queries(make_run):
+    run = make_run({1: {"a": ({"fitness": 0.5}, CHROMOSOME)}})
+    store = load_store(run)
+    answered = threading.Event()
+
+    def build():
+        # A query of another thread is answered while the data is built
+        threading.Thread(target=lambda: store.individuals(1) and answered.set()).start()
+        return answered.wait(5)
+
+    assert store.derived("probe", build)
+
+def test_derived_is_built_once_for_concurrent_callers(make_run):
+    run = make_run({1: {"a": ({"fitness": 0.5}, CHROMOSOME)}})
+    store = load_store(run)
+    builds = []
+
+    def build():
+        builds.append(1)
+        time.sleep(0.1)
+        return len(builds)
+
+    threads = [threading.Thread(target=lambda: store.derived("slow", build)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(builds) == 1
+    assert store.derived("slow", build) == 1
+
+def test_derived_is_built_again_after_change(make_run):
+    run = make_run({1: {"a": ({"fitness": 0.5}, CHROMOSOME)}})
+    store = load_store(run)
+    build = lambda: store.individuals(1)
+
+    assert store.derived("names", build) == ["a"]
+
+    os.mkdir(os.path.join(run, "Generation_1", "b"))
+    write_json(os.path.join(run, "Generation_1", "b", "results.json"), {"fitness": 0.2})
+    bump_mtime(os.path.join(run, "Generation_1"))
+
+    assert store.derived("names", build) == ["a", "b"]
+    assert store.derived("names", build, key=1) == ["a", "b"]
+
+def test_cached_counts_into_memory(make_run):
+    run = make_run({1: {"a": ({"fitness": 0.5}, CHROMOSOME)}})
+    store = load_store(run)
+    nbytes = store.nbytes
+
+    assert store.cached("data", 1, lambda: "one", lambda value: 100) == "one"
+    assert store.nbytes == nbytes + 100
+
+    assert store.cached("data", 2, lambda: "two", lambda value: 40) == "two"
+    assert store.nbytes == nbytes + 40
+    assert store.cached("data", 2, lambda: "three") == "two"
@@ -0,0 +1,28 @@
+import numpy as np
+from scatter import downsample_indices
+
+
+def test_small_sample_is_returned_whole():
+    x = np.arange(10.0)
+
+    assert downsample_indices(x, x, max_points=10).tolist() == list(range(10))
+
+def test_kept_points_are_always_selected():
+    rng = np.random.default_rng(0)
+    x, y = rng.random(5000), rng.random(5000)
+    keep = np.zeros(5000, dtype=bool)
+    keep[rng.choice(5000, 300, replace=False)] = True
+
+    idx = downsample_indices(x, y, max_points=500, keep=keep, bins=10)
+    without = downsample_indices(x, y, max_points=500, bins=10)
+
+    assert set(np.flatnonzero(keep)) <= set(idx.tolist())
+    assert set(without.tolist()) <= set(idx.tolist())
+    assert len(without) < len(idx) < 5000
+    assert np.all(np.diff(idx) > 0)
+
+def test_sample_is_reproducible():
+    rng = np.random.default_rng(1)
+    x, y = rng.random(3000), rng.random(3000)
+
+    assert np.array_equal(downsample_indices(x, y, max_points=300), downsample_indices(x, y, max_points=300))
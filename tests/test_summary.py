@@ -0,0 +1,68 @@
+import os
+import json
+import pytest
+import summary as summary_module
+from conftest import EXAMPLE_RUN, write_json, bump_mtime
+from summary import get_run_summary, get_summary_path, summary_fingerprint, _load_run_summary
+
+CHROMOSOME = [{"layer": "Rescaling", "f_name": "Rescaling"}]
+
+
+def results(fitness):
+    return {"memory_footprint_h5": 1000 * fitness, "val_acc": fitness, "inference_time": 0.1, "fitness": fitness, "error": False}
+
+@pytest.fixture
+def summary_run(make_run, monkeypatch):
+    monkeypatch.setenv("EVOVIS_VERIFY_INTERVAL", "0")
+    monkeypatch.setenv("EVOVIS_REFRESH_INTERVAL", "0")
+
+    with open(os.path.join(EXAMPLE_RUN, "config.json")) as file:
+        config = json.load(file)
+
+    return make_run({
+        1: {"a": (results(0.5), CHROMOSOME), "b": (results(0.6), CHROMOSOME)},
+        2: {"c": (results(0.7), CHROMOSOME)},
+    }, config=config)
+
+def add_individual(run, generation, name, fitness):
+    path = os.path.join(run, f"Generation_{generation}", name)
+    os.mkdir(path)
+    write_json(os.path.join(path, "results.json"), results(fitness))
+    write_json(os.path.join(path, "chromosome.json"), CHROMOSOME)
+    bump_mtime(os.path.dirname(path))
+
+
+def test_summary_is_written_with_fingerprint(summary_run):
+    summary = get_run_summary(summary_run)
+
+    assert summary["aggregates"]["fitness"]["generation"] == [1, 2]
+    assert summary["aggregates"]["fitness"]["count"] == [2, 1]
+    assert get_run_summary(summary_run) is summary
+
+    with open(get_summary_path(summary_run)) as file:
+        assert json.load(file)["fingerprint"] == summary_fingerprint(summary_run)
+
+def test_summary_file_is_reused_while_fingerprint_is_unchanged(summary_run, monkeypatch):
+    summary = get_run_summary(summary_run)
+
+    def build(run):
+        raise AssertionError("summary built again")
+
+    monkeypatch.setattr(summary_module, "build_run_summary", build)
+    assert _load_run_summary(summary_run, summary_fingerprint(summary_run)) == summary
+
+def test_summary_is_built_again_after_change(summary_run):
+    fingerprint = summary_fingerprint(summary_run)
+    get_run_summary(summary_run)
+
+    add_individual(summary_run, 2, "d", 0.9)
+
+    assert summary_fingerprint(summary_run) != fingerprint
+    summary = get_run_summary(summary_run)
+    assert summary["aggregates"]["fitness"]["count"] == [2, 2]
+
+    with open(get_summary_path(summary_run)) as file:
+        assert json.load(file)["fingerprint"] == summary_fingerprint(summary_run)
+
+def test_fingerprint_of_missing_run(tmp_path):
+    assert summary_fingerprint(str(tmp_path / "missing")) is None
@@ -0,0 +1,48 @@
+import os
+import sys
+import json
+import random
+from conftest import EXAMPLE_RUN
+from genepool import SearchSpace
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+from synthetic_run import ChromosomeSampler, write_synthetic_run
+
+
+def sampler(length, seed=0):
+    return ChromosomeSampler(SearchSpace.from_file(os.path.join(EXAMPLE_RUN, "search_space.json")), length, random.Random(seed))
+
+def chromosome_lengths(run, generation):
+    generation_path = os.path.join(run, f"Generation_{generation}")
+    lengths = []
+
+    for individual in os.listdir(generation_path):
+        with open(os.path.join(generation_path, individual, "chromosome.json")) as file:
+            lengths.append(len(json.load(file)))
+
+    return lengths
+
+
+def test_crossover_of_long_parents_is_cut():
+    long_parents = sampler(200, seed=1)
+    short = sampler(14, seed=2)
+
+    for _ in range(50):
+        parent1, parent2 = long_parents.random(), long_parents.random()
+        child, _, _ = short.crossover(parent1, parent2)
+
+        assert len(child) <= short.max_length()
+        assert not short.search_space.successors.get(child[-1]["layer"])
+
+def test_chromosome_length_stays_bounded_over_generations(tmp_path):
+    run = write_synthetic_run(str(tmp_path / "run"), generations=12, population=30, chromosome_length=14, seed=3)
+    bound = sampler(14).max_length()
+    first = chromosome_lengths(run, 1)
+
+    for generation in range(1, 13):
+        lengths = chromosome_lengths(run, generation)
+        assert max(lengths) <= bound
+
+    # Selection doesn't favour longer chromosomes
+    assert sum(chromosome_lengths(run, 12)) / 30 <= sum(first) / 30 + 4